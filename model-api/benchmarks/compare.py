@@ -0,0 +1,51 @@
+import argparse
+import json
+import sys
+
+
+def compare(baseline, current, threshold):
+    """İki sonuç dosyasını karşılaştırır; eşikten kötü değişen ölçümleri döndürür"""
+    regressions = []
+    rows = []
+    for name in sorted(set(baseline['results']) | set(current['results'])):
+        old = baseline['results'].get(name)
+        new = current['results'].get(name)
+        if old is None or new is None or not old['value']:
+            rows.append((name, old and old['value'], new and new['value'], None, ''))
+            continue
+
+        change = (new['value'] - old['value']) / old['value'] * 100
+        worse = change > threshold if new['better'] == 'lower' else change < -threshold
+        if worse:
+            regressions.append(name)
+        rows.append((name, old['value'], new['value'], change, 'GERİLEME' if worse else ''))
+    return rows, regressions
+
+
+def main():
+    """İki benchmark sonucunu karşılaştırır; gerileme varsa 1 ile çıkar"""
+    parser = argparse.ArgumentParser(description="Benchmark sonuçlarını karşılaştırır")
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="Gerileme sayılacak yüzde değişim (varsayılan: 10)")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+
+    rows, regressions = compare(baseline, current, args.threshold)
+    print(f"{baseline.get('commit')} -> {current.get('commit')}")
+    for name, old, new, change, flag in rows:
+        change_text = '-' if change is None else f"{change:+.1f}%"
+        print(f"{name:40s} {old if old is not None else '-':>14} {new if new is not None else '-':>14} {change_text:>9} {flag}")
+
+    if regressions:
+        print(f"{len(regressions)} ölçümde %{args.threshold:g} üzeri gerileme")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
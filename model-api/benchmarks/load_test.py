@@ -0,0 +1,401 @@
+import argparse
+import ast
+import http.client
+import itertools
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from synthetic_models import API_DIR, MODELS_DIR
+from run_benchmarks import RESULTS_DIR, git_revision, metric, percentile
+from workload import flight_payloads
+
+# Yük yalnızca yerel sunucuya gönderilir
+LOCAL_HOSTS = ('127.0.0.1', 'localhost', '::1')
+
+LATENCY_QUANTILES = (('p50', 0.5), ('p90', 0.9), ('p95', 0.95), ('p99', 0.99))
+
+# Bağlantı/okuma hatalarında durum kodu yerine kullanılan etiket
+CONNECTION_ERROR = 'connection_error'
+
+
+def api_mappings(path=os.path.join(API_DIR, 'cancel_delay_api.py')):
+    """AIRLINE_MAPPING ve CITY_MAPPING tablolarını API modülünü import etmeden okur"""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+
+    mappings = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            if node.targets[0].id in ('AIRLINE_MAPPING', 'CITY_MAPPING'):
+                mappings[node.targets[0].id] = ast.literal_eval(node.value)
+    return mappings['AIRLINE_MAPPING'], mappings['CITY_MAPPING']
+
+
+def encoder_classes(model_dir):
+    """Havayolu ve şehir encoder'larının bildiği değerler"""
+    import joblib
+    airlines = joblib.load(os.path.join(model_dir, 'label_enc_airline.joblib')).classes_
+    cities = joblib.load(os.path.join(model_dir, 'label_enc_origin.joblib')).classes_
+    return [str(value) for value in airlines], [str(value) for value in cities]
+
+
+def generate_payloads(model_dir, n, seed, popular_share, unknown_rate):
+    """Encoder sınıfları ve eşleme tablolarından gerçekçi /predict gövdeleri üretir
+
+    Eşleme tablolarının hedefleri (arayüzün en sık gönderdiği rotalar)
+    `popular_share` oranında, tablo anahtarları ise encoder'da olmayan değer
+    olarak `unknown_rate` oranında kullanılır.
+    """
+    airline_mapping, city_mapping = api_mappings()
+    airlines, cities = encoder_classes(model_dir)
+    return flight_payloads(
+        airlines, cities, n=n, seed=seed, unknown_rate=unknown_rate,
+        popular_airlines=[a for a in airline_mapping.values() if a in airlines],
+        popular_cities=[c for c in city_mapping.values() if c in cities],
+        popular_share=popular_share,
+        unknown_airlines=list(airline_mapping), unknown_cities=list(city_mapping)
+    )
+
+
+def load_replay(path):
+    """Kaydedilmiş istekleri okur
+
+    JSON liste, {'flights': [...]} veya JSONL kabul edilir. JSONL satırı istek
+    gövdesi ya da 'payload' alanı olan bir API günlük kaydı olabilir; diğer
+    günlük satırları atlanır.
+    """
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = None
+    if isinstance(data, dict) and 'flights' in data:
+        data = data['flights']
+    if isinstance(data, list):
+        return data
+
+    payloads = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(record, dict):
+            continue
+        if isinstance(record.get('payload'), dict):
+            payloads.append(record['payload'])
+        elif 'airline' in record and 'date' in record:
+            payloads.append(record)
+    return payloads
+
+
+def request_bodies(payloads, endpoint, batch_size):
+    """Uç noktaya göre gönderilecek JSON gövdelerini önceden kodlar"""
+    if endpoint == '/predict_batch':
+        bodies = []
+        for start in range(0, len(payloads), batch_size):
+            chunk = payloads[start:start + batch_size]
+            while len(chunk) < batch_size:
+                chunk = chunk + payloads[:batch_size - len(chunk)]
+            bodies.append(json.dumps({'flights': chunk}).encode('utf-8'))
+        return bodies, batch_size
+    return [json.dumps(payload).encode('utf-8') for payload in payloads], 1
+
+
+class LoadClient:
+    """İş parçacığı başına kalıcı (keep-alive) HTTP bağlantısı"""
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.connection = None
+
+    def post(self, path, body):
+        """İsteği gönderir; durum kodunu veya bağlantı hatası etiketini döndürür"""
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request('POST', path, body=body, headers={'Content-Type': 'application/json'})
+                response = self.connection.getresponse()
+                response.read()
+                if response.will_close:
+                    self.close()
+                return response.status
+            except (OSError, http.client.HTTPException):
+                self.close()
+                # Sunucunun kapattığı boşta bağlantı için bir kez yeniden dene
+                if attempt:
+                    return CONNECTION_ERROR
+        return CONNECTION_ERROR
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class Recorder:
+    """Gecikmeleri ve durumları toplar (iş parçacığı başına liste, sonda birleştirilir)"""
+
+    def __init__(self):
+        self.parts = []
+        self.lock = threading.Lock()
+
+    def part(self):
+        latencies, statuses = [], Counter()
+        with self.lock:
+            self.parts.append((latencies, statuses))
+        return latencies, statuses
+
+    def merged(self):
+        latencies, statuses = [], Counter()
+        for part_latencies, part_statuses in self.parts:
+            latencies.extend(part_latencies)
+            statuses.update(part_statuses)
+        return latencies, statuses
+
+
+def run_closed_loop(target, bodies, concurrency, duration, max_requests, timeout):
+    """Sabit sayıda eşzamanlı istemci; her istemci yanıtı alınca sıradakini gönderir"""
+    host, port, path = target
+    recorder = Recorder()
+    sequence = itertools.count()
+    deadline = time.perf_counter() + duration if duration else None
+
+    def worker():
+        client = LoadClient(host, port, timeout)
+        latencies, statuses = recorder.part()
+        while True:
+            i = next(sequence)
+            if max_requests and i >= max_requests:
+                break
+            if deadline and time.perf_counter() >= deadline:
+                break
+            started = time.perf_counter()
+            status = client.post(path, bodies[i % len(bodies)])
+            latencies.append(time.perf_counter() - started)
+            statuses[status] += 1
+        client.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder, time.perf_counter() - started, {}
+
+
+def run_open_loop(target, bodies, rate, duration, max_requests, timeout, max_in_flight, poisson, seed):
+    """Sabit veya Poisson varış hızında istek gönderir
+
+    Gecikme, isteğin planlanan gönderim anından ölçülür; sunucu yavaşladığında
+    bekleyen istekler de gecikmeye yansır (coordinated omission düzeltmesi).
+    """
+    host, port, path = target
+    recorder = Recorder()
+    schedule = queue.Queue()
+    rng = random.Random(seed)
+    total = max_requests or int(rate * duration)
+
+    def worker():
+        client = LoadClient(host, port, timeout)
+        latencies, statuses = recorder.part()
+        while True:
+            item = schedule.get()
+            if item is None:
+                break
+            intended, body = item
+            status = client.post(path, body)
+            latencies.append(time.perf_counter() - intended)
+            statuses[status] += 1
+        client.close()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max_in_flight)]
+    for thread in threads:
+        thread.start()
+
+    started = time.perf_counter()
+    intended = started
+    max_backlog = 0
+    for i in range(total):
+        intended += rng.expovariate(rate) if poisson else 1.0 / rate
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        schedule.put((intended, bodies[i % len(bodies)]))
+        max_backlog = max(max_backlog, schedule.qsize())
+
+    for _ in threads:
+        schedule.put(None)
+    for thread in threads:
+        thread.join()
+    return recorder, time.perf_counter() - started, {'max_backlog': max_backlog}
+
+
+def summarize(recorder, elapsed, rows_per_request):
+    """Verim, gecikme yüzdelikleri ve hata oranı"""
+    latencies, statuses = recorder.merged()
+    latencies.sort()
+    count = len(latencies)
+    errors = sum(n for status, n in statuses.items() if status != 200)
+
+    summary = {
+        'requests': count,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(count / elapsed, 2) if elapsed else 0.0,
+        'rows_per_s': round(count * rows_per_request / elapsed, 2) if elapsed else 0.0,
+        'error_rate': round(errors / count, 6) if count else 0.0,
+        'statuses': {str(status): n for status, n in sorted(statuses.items(), key=lambda item: str(item[0]))}
+    }
+    if latencies:
+        for name, q in LATENCY_QUANTILES:
+            summary[f'latency_{name}_ms'] = round(percentile(latencies, q) * 1000, 3)
+        summary['latency_max_ms'] = round(latencies[-1] * 1000, 3)
+        summary['latency_mean_ms'] = round(sum(latencies) / count * 1000, 3)
+    return summary
+
+
+def comparable_results(label, summary):
+    """compare.py ile karşılaştırılabilecek ölçüm kayıtları"""
+    results = {
+        f'load.{label}.throughput': metric(summary['throughput_rps'], 'req/s', 'higher'),
+        f'load.{label}.error_rate': metric(summary['error_rate'], 'ratio', 'lower')
+    }
+    for name, _ in LATENCY_QUANTILES:
+        key = f'latency_{name}_ms'
+        if key in summary:
+            results[f'load.{label}.latency_{name}'] = metric(summary[key], 'ms', 'lower')
+    return results
+
+
+def wait_for_server(host, port, timeout):
+    """/health yanıt verene kadar bekler"""
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=2)
+            connection.request('GET', '/health')
+            connection.getresponse().read()
+            connection.close()
+            return
+        except (OSError, http.client.HTTPException):
+            if time.perf_counter() >= deadline:
+                raise SystemExit(f"Sunucuya ulaşılamadı: {host}:{port}")
+            time.sleep(0.2)
+
+
+def parse_target(url, endpoint):
+    """URL'yi (host, port, path) olarak ayırır; yerel olmayan adresleri reddeder"""
+    parts = urlsplit(url)
+    if parts.scheme != 'http' or parts.hostname not in LOCAL_HOSTS:
+        raise SystemExit(f"Yalnızca yerel http sunucusu desteklenir: {url}")
+    return parts.hostname, parts.port or 80, endpoint
+
+
+def main():
+    """Yerel tahmin sunucusuna yük üretir veya kayıtlı istekleri yeniden oynatır"""
+    parser = argparse.ArgumentParser(description="Yerel /predict yük testi ve istek yeniden oynatma")
+    parser.add_argument('--url', default='http://127.0.0.1:5050', help="Yerel sunucu adresi")
+    parser.add_argument('--endpoint', choices=('/predict', '/predict_batch'), default='/predict')
+    parser.add_argument('--batch-size', type=int, default=32, help="/predict_batch istek başına uçuş sayısı")
+    parser.add_argument('--concurrency', default='8',
+                        help="Kapalı döngü eşzamanlı istemci sayısı; virgülle birden çok değer (örn. 1,4,16)")
+    parser.add_argument('--rate', type=float, help="Açık döngü varış hızı (istek/sn); verilirse --concurrency kullanılmaz")
+    parser.add_argument('--poisson', action='store_true', help="Açık döngüde sabit aralık yerine Poisson varışları")
+    parser.add_argument('--max-in-flight', type=int, default=64, help="Açık döngüde en fazla eşzamanlı istek")
+    parser.add_argument('--duration', type=float, default=10.0, help="Her aşamanın süresi (sn)")
+    parser.add_argument('--requests', type=int, help="Süre yerine aşama başına istek sayısı")
+    parser.add_argument('--warmup', type=int, default=50, help="Ölçülmeyen ısınma isteği sayısı")
+    parser.add_argument('--timeout', type=float, default=30.0, help="İstek zaman aşımı (sn)")
+    parser.add_argument('--replay', help="Yeniden oynatılacak JSON/JSONL istek dosyası")
+    parser.add_argument('--payloads', type=int, default=2000, help="Üretilecek farklı istek sayısı")
+    parser.add_argument('--model-dir', default=MODELS_DIR, help="Encoder sınıflarının okunacağı model klasörü")
+    parser.add_argument('--popular-share', type=float, default=0.6, help="Eşleme tablosu rotalarının oranı")
+    parser.add_argument('--unknown-rate', type=float, default=0.05, help="Encoder'da olmayan değer oranı")
+    parser.add_argument('--save-payloads', help="Üretilen istekleri JSONL olarak kaydet")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    target = parse_target(args.url, args.endpoint)
+    if args.replay:
+        payloads = load_replay(args.replay)
+        if not payloads:
+            raise SystemExit(f"Yeniden oynatılacak istek bulunamadı: {args.replay}")
+    else:
+        payloads = generate_payloads(args.model_dir, args.payloads, args.seed,
+                                     args.popular_share, args.unknown_rate)
+    if args.save_payloads:
+        with open(args.save_payloads, 'w', encoding='utf-8') as f:
+            for payload in payloads:
+                f.write(json.dumps(payload, ensure_ascii=False) + '\n')
+
+    bodies, rows_per_request = request_bodies(payloads, args.endpoint, args.batch_size)
+    wait_for_server(target[0], target[1], args.timeout)
+    if args.warmup:
+        run_closed_loop(target, bodies, 1, None, args.warmup, args.timeout)
+
+    duration = None if args.requests else args.duration
+    phases = []
+    if args.rate:
+        recorder, elapsed, extra = run_open_loop(target, bodies, args.rate, args.duration, args.requests,
+                                                 args.timeout, args.max_in_flight, args.poisson, args.seed)
+        phases.append((f'rate{args.rate:g}', {'mode': 'open', 'rate': args.rate}, recorder, elapsed, extra))
+    else:
+        for concurrency in (int(value) for value in args.concurrency.split(',')):
+            recorder, elapsed, extra = run_closed_loop(target, bodies, concurrency, duration,
+                                                       args.requests, args.timeout)
+            phases.append((f'c{concurrency}', {'mode': 'closed', 'concurrency': concurrency},
+                           recorder, elapsed, extra))
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_revision(),
+        'target': f"{args.url}{args.endpoint}",
+        'source': args.replay or 'generated',
+        'payloads': len(payloads),
+        'rows_per_request': rows_per_request,
+        'phases': {},
+        'results': {}
+    }
+    print(f"{'aşama':>10} {'istek':>8} {'istek/sn':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'hata':>8}")
+    for label, settings, recorder, elapsed, extra in phases:
+        summary = summarize(recorder, elapsed, rows_per_request)
+        summary.update(settings, **extra)
+        report['phases'][label] = summary
+        report['results'].update(comparable_results(label, summary))
+        print(f"{label:>10} {summary['requests']:>8} {summary['throughput_rps']:>10.1f} "
+              f"{summary.get('latency_p50_ms', 0):>9.2f} {summary.get('latency_p95_ms', 0):>9.2f} "
+              f"{summary.get('latency_p99_ms', 0):>9.2f} {summary.get('latency_max_ms', 0):>9.2f} "
+              f"{summary['error_rate']:>8.2%}")
+        if summary['error_rate']:
+            print(f"{'':>10} durumlar: {summary['statuses']}")
+
+    if args.output:
+        output = args.output
+        if output == 'auto':
+            os.makedirs(RESULTS_DIR, exist_ok=True)
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            output = os.path.join(RESULTS_DIR, f"load-{stamp}-{report['commit'] or 'nogit'}.json")
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1, sort_keys=True, ensure_ascii=False)
+        print(f"Sonuçlar: {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+from datetime import datetime
+
+from synthetic_models import API_DIR, prepare_model_dir
+from workload import flight_payloads
+
+# Benchmark sonuçlarının varsayılan klasörü (git'e eklenmez)
+RESULTS_DIR = os.path.join(API_DIR, 'benchmarks', 'results')
+
+BATCH_SIZES = (1, 8, 64, 256, 1000)
+
+# Soğuk başlangıç ölçümü ayrı bir Python sürecinde çalışır
+COLD_START_SCRIPT = '''
+import json, resource, time
+start = time.perf_counter()
+import cancel_delay_api
+imported = time.perf_counter()
+loaded = cancel_delay_api.load_models()
+done = time.perf_counter()
+print(json.dumps({
+    'loaded': loaded,
+    'import_s': imported - start,
+    'load_s': done - imported,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+}))
+'''
+
+
+def metric(value, unit, better):
+    """Karşılaştırılabilir tek bir ölçüm kaydı"""
+    return {'value': round(value, 6), 'unit': unit, 'better': better}
+
+
+def time_call(function, repeat=5, min_time=0.2):
+    """Fonksiyonun çağrı başına süresini (ns) tekrarların medyanı olarak ölçer"""
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    runs = timer.repeat(repeat=repeat, number=number)
+    return statistics.median(runs) / number * 1e9
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=API_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def bench_functions(api, features, bundle, payloads, results):
+    """Özellik hazırlama ve yardımcı fonksiyonların tek çağrı süreleri"""
+    payload = payloads[0]
+    weather = api.DEFAULT_WEATHER
+    known_airline = bundle.airline_index.classes[0]
+
+    cases = {
+        # Ayrıştırma, kodlama ve hava durumu dahil (her çağrı yeni bir istek gibi)
+        'prepare_features': lambda: api.prepare_features(api.parse_request(payload), bundle),
+        'prepare_delay_features': lambda: api.prepare_delay_features(api.parse_request(payload), bundle),
+        'parse_request': lambda: api.parse_request(payload),
+        'safe_encode_known': lambda: api.safe_encode(bundle.airline_index, known_airline, 0),
+        'safe_encode_unknown': lambda: api.safe_encode(bundle.airline_index, 'XX', 0),
+        'weather_composite_score': lambda: features.weather_composite_score(weather),
+        'categorize_time_detailed': lambda: features.categorize_time_detailed(1430)
+    }
+    for name, function in cases.items():
+        results[f'function.{name}'] = metric(time_call(function), 'ns/call', 'lower')
+
+
+def bench_request_path(api, bundle, payloads, results, requests=500):
+    """Mikro toplu iş ve HTTP olmadan tek isteğin ayrıştırma + kaskad süresi ve bellek tahsisi
+
+    Tahsis, isteğin ayırdığı Python/NumPy belleğinin tepe değeridir (tracemalloc);
+    ara kopyalar ve tekrar ayrıştırmalar bu değeri büyütür.
+    """
+    def run(payload):
+        result, status = api.compute_prediction(api.parse_request(payload), bundle)
+        if status != 200:
+            raise RuntimeError(f"compute_prediction {status}: {result}")
+
+    timings = []
+    for i in range(requests):
+        payload = payloads[i % len(payloads)]
+        started = time.perf_counter()
+        run(payload)
+        timings.append(time.perf_counter() - started)
+
+    peaks = []
+    tracemalloc.start()
+    for i in range(min(requests, 200)):
+        payload = payloads[i % len(payloads)]
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        run(payload)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    results['request.compute_prediction'] = metric(statistics.median(timings) * 1e6, 'us', 'lower')
+    results['request.peak_alloc'] = metric(statistics.median(peaks) / 1024, 'KiB', 'lower')
+
+
+def bench_predict(client, payloads, results, requests=500, warmup=50):
+    """/predict uçtan uca tek satır gecikmesi (önbellek kapalı)"""
+    for payload in payloads[:warmup]:
+        client.post('/predict', json=payload)
+
+    latencies = []
+    for i in range(requests):
+        payload = payloads[i % len(payloads)]
+        started = time.perf_counter()
+        response = client.post('/predict', json=payload)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise RuntimeError(f"/predict {response.status_code}: {response.get_json()}")
+
+    latencies.sort()
+    for name, q in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99)):
+        results[f'predict.latency_{name}'] = metric(percentile(latencies, q) * 1000, 'ms', 'lower')
+    results['predict.throughput'] = metric(len(latencies) / sum(latencies), 'req/s', 'higher')
+
+
+def bench_batches(api, bundle, client, payloads, results, repeat=5):
+    """predict_flights ve /predict_batch için farklı boyutlarda satır/saniye"""
+    for size in BATCH_SIZES:
+        records = [payloads[i % len(payloads)] for i in range(size)]
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            api.predict_flights(records, bundle)
+            timings.append(time.perf_counter() - started)
+        results[f'batch.predict_flights.{size}'] = metric(size / statistics.median(timings), 'rows/s', 'higher')
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            client.post('/predict_batch', json={'flights': records})
+            timings.append(time.perf_counter() - started)
+        results[f'batch.http.{size}'] = metric(size / statistics.median(timings), 'rows/s', 'higher')
+
+
+def bench_cold_start(env, results, repeat=3):
+    """Yeni süreçte modül importu + model yükleme süresi ve o sürecin tepe RSS'i"""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', COLD_START_SCRIPT], cwd=API_DIR, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        wall = time.perf_counter() - started
+        run = json.loads(output.strip().splitlines()[-1])
+        if not run['loaded']:
+            raise RuntimeError("Soğuk başlangıçta modeller yüklenemedi")
+        run['wall_s'] = wall
+        runs.append(run)
+
+    results['cold_start.process_wall'] = metric(statistics.median(r['wall_s'] for r in runs), 's', 'lower')
+    results['cold_start.import'] = metric(statistics.median(r['import_s'] for r in runs), 's', 'lower')
+    results['cold_start.load_models'] = metric(statistics.median(r['load_s'] for r in runs), 's', 'lower')
+    results['cold_start.peak_rss'] = metric(max(r['max_rss_kb'] for r in runs) / 1024, 'MiB', 'lower')
+
+
+def main():
+    """Model API sıcak yolları için benchmark'ları çalıştırıp JSON sonuç dosyası yazar"""
+    parser = argparse.ArgumentParser(description="Model API benchmark'ları")
+    parser.add_argument('--output', help="Sonuç dosyası (varsayılan: benchmarks/results/<tarih>-<commit>.json)")
+    parser.add_argument('--requests', type=int, default=500, help="/predict gecikme ölçümü istek sayısı")
+    parser.add_argument('--skip-cold-start', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # Ölçümü etkilememesi için önbellek, günlük ve yazdırmalar kapalı; modül importundan önce ayarlanır
+    env = dict(os.environ, MODEL_DIR=prepare_model_dir(), RESULT_CACHE_SIZE='0', LOG_LEVEL='WARNING')
+    os.environ.update(env)
+    os.chdir(API_DIR)
+    sys.path.insert(0, API_DIR)
+
+    import cancel_delay_api as api
+    import flight_features as features
+
+    results = {}
+    if not args.skip_cold_start:
+        bench_cold_start(env, results)
+
+    bundle = api.get_bundle()
+    if bundle is None:
+        raise SystemExit("Modeller yüklenemedi")
+    payloads = flight_payloads(bundle.airline_index.classes, bundle.city_index.classes,
+                               n=1000, seed=args.seed)
+    client = api.app.test_client()
+
+    bench_functions(api, features, bundle, payloads, results)
+    bench_request_path(api, bundle, payloads, results, requests=args.requests)
+    bench_predict(client, payloads, results, requests=args.requests)
+    bench_batches(api, bundle, client, payloads, results)
+    results['process.peak_rss'] = metric(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 'MiB', 'lower')
+
+    import numpy
+    import sklearn
+    import xgboost
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_revision(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': numpy.__version__,
+            'scikit-learn': sklearn.__version__,
+            'xgboost': xgboost.__version__,
+            'inference_engine': api.INFERENCE_ENGINE,
+            'model_version': bundle.version,
+            'micro_batch_size': api.MICRO_BATCH_SIZE
+        },
+        'results': results
+    }
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{report['commit'] or 'nogit'}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+
+    for name, value in sorted(results.items()):
+        print(f"{name:40s} {value['value']:>14.3f} {value['unit']}")
+    print(f"Sonuçlar: {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import os
+import numpy as np
+import joblib
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS_DIR = os.path.join(API_DIR, 'models')
+
+# Sentetik modeller ve bağlantılı model klasörü burada tutulur (git'e eklenmez)
+CACHE_DIR = os.path.join(API_DIR, 'benchmarks', '.cache')
+
+# Gecikme modelinin kullandığı özellik ve sınıf sayısı (scaler_delay çıktısının ilk 17 sütunu)
+DELAY_FEATURES = 17
+DELAY_CLASSES = 4
+
+
+def build_delay_stand_in(path, seed=0, n_rows=4000, n_estimators=30, max_depth=5):
+    """Eksik model_delay.joblib yerine aynı arayüzde sentetik bir ImbPipeline kaydeder
+
+    Girdi ölçeklenmiş özellikler olduğu için standart normal veriyle eğitilir;
+    ağaç sayısı/derinliği gerçek modele yakın bir çıkarım maliyeti verir.
+    """
+    from xgboost import XGBClassifier
+    from imblearn.pipeline import Pipeline as ImbPipeline
+
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, DELAY_FEATURES))
+    y = ((X[:, 0] + 0.5 * X[:, 3] + 0.5 * rng.normal(size=n_rows) > 0).astype(int)
+         + 2 * (X[:, 5] > 0.8).astype(int))
+
+    model = ImbPipeline([('classifier', XGBClassifier(
+        n_estimators=n_estimators, max_depth=max_depth, random_state=seed,
+        n_jobs=1, eval_metric='mlogloss'))])
+    model.fit(X, y)
+    joblib.dump(model, path)
+    return path
+
+
+def prepare_model_dir(cache_dir=CACHE_DIR):
+    """Benchmark'ların kullanacağı model klasörünü döndürür
+
+    Gerçek model_delay.joblib varsa models klasörü doğrudan kullanılır; yoksa
+    diğer artefaktlara bağlantı içeren bir klasöre sentetik model eklenir.
+    """
+    if os.path.exists(os.path.join(MODELS_DIR, 'model_delay.joblib')):
+        return MODELS_DIR
+
+    model_dir = os.path.join(cache_dir, 'models')
+    os.makedirs(model_dir, exist_ok=True)
+    for filename in os.listdir(MODELS_DIR):
+        if not filename.endswith(('.joblib', '.npy')):
+            continue
+        link = os.path.join(model_dir, filename)
+        if not os.path.lexists(link):
+            os.symlink(os.path.join(MODELS_DIR, filename), link)
+
+    delay_path = os.path.join(model_dir, 'model_delay.joblib')
+    if not os.path.exists(delay_path):
+        build_delay_stand_in(delay_path)
+    return model_dir
@@ -0,0 +1,47 @@
+import random
+
+# Bilinmeyen kategori yolunu da ölçmek için encoder'da bulunmayan değerler
+UNKNOWN_AIRLINES = ['XX', 'ZZ']
+UNKNOWN_CITIES = ['Nowhere, ZZ']
+
+DISTANCES = [150, 450, 900, 1200, 2500, 4000]
+
+
+def flight_payloads(airlines, cities, n=1000, seed=0, unknown_rate=0.05,
+                    start_year=2025, end_year=2025, popular_airlines=(), popular_cities=(),
+                    popular_share=0.0, unknown_airlines=UNKNOWN_AIRLINES, unknown_cities=UNKNOWN_CITIES):
+    """/predict istek gövdeleri üretir (aynı tohumla her çalıştırmada aynı liste)
+
+    `airlines` / `cities` genellikle encoder sınıflarıdır; `unknown_rate`
+    oranında encoder'da olmayan değer kullanılır. `popular_share` oranındaki
+    istekler `popular_*` listelerinden (örneğin eşleme tablolarındaki rotalar) seçilir.
+    """
+    rng = random.Random(seed)
+    airlines = list(airlines)
+    cities = list(cities)
+    popular_airlines = list(popular_airlines) or airlines
+    popular_cities = list(popular_cities) or cities
+
+    def pick(values, popular, unknown):
+        draw = rng.random()
+        if draw < unknown_rate:
+            return rng.choice(unknown)
+        if draw < unknown_rate + popular_share:
+            return rng.choice(popular)
+        return rng.choice(values)
+
+    payloads = []
+    for _ in range(n):
+        airline = pick(airlines, popular_airlines, unknown_airlines)
+        origin = pick(cities, popular_cities, unknown_cities)
+        destination = pick(cities, popular_cities, unknown_cities)
+        payloads.append({
+            'date': f"{rng.randint(start_year, end_year)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'airline': airline,
+            'origin': origin,
+            'destination': destination,
+            'departure_time': f"{rng.randint(0, 23):02d}:{rng.choice([0, 15, 30, 45]):02d}",
+            'arrival_time': f"{rng.randint(0, 23):02d}:{rng.choice([0, 30]):02d}",
+            'distance': rng.choice(DISTANCES)
+        })
+    return payloads
@@ -1,28 +1,63 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
-import joblib
-import pandas as pd
 import numpy as np
 from datetime import datetime
-from meteostat import Point, Daily
-from sklearn.preprocessing import LabelEncoder
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
 import warnings
+import logging
 warnings.filterwarnings('ignore')
-from sklearn.preprocessing import StandardScaler
-from sklearn.impute import SimpleImputer
+import hmac
 import os
+import signal
+import threading
+import time
 import traceback
+from model_bundle import load_bundle, artifact_paths
+from metrics import counter, histogram, stage_timer, render_prometheus
+from weather_store import WeatherStore, WEATHER_FIELDS
+from flight_features import CANCEL_FEATURES, DELAY_FEATURES, derived_features
+from result_cache import ResultCache
+from micro_batcher import MicroBatcher
+from flight_request import FlightRequest
+from structured_log import setup_logging, log_event, sampled, LOG_SAMPLE_RATE
 
 # Flask uygulaması ve CORS ayarları
 app = Flask(__name__)
 CORS(app)
 
+# Kuyruk tabanlı yapılandırılmış günlük (yazma arka plan iş parçacığında yapılır)
+logger = setup_logging()
+
 # Model yolları - models klasöründen yükle
-MODEL_CANCELLED_PATH = os.path.join('models', 'model_cancelled.joblib')
-MODEL_CODE_PATH = os.path.join('models', 'model_cancel_code.joblib')
-MODEL_DELAY_PATH = os.path.join('models', 'model_delay.joblib')
+MODEL_DIR = os.environ.get('MODEL_DIR', 'models')
+MODEL_CANCELLED_PATH = os.path.join(MODEL_DIR, 'model_cancelled.joblib')
+MODEL_CODE_PATH = os.path.join(MODEL_DIR, 'model_cancel_code.joblib')
+MODEL_DELAY_PATH = os.path.join(MODEL_DIR, 'model_delay.joblib')
+
+# Yönetim uç noktaları için belirteç; tanımlı değilse yönetim uç noktaları kapalıdır (403)
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# /admin/reload ile yüklenebilecek model klasörlerinin kökü (gerçek yolu bu kökün altında olmalı)
+ADMIN_MODEL_ROOT = os.path.realpath(os.environ.get('ADMIN_MODEL_ROOT', MODEL_DIR))
+
+# Artefaktları paralel yükleyen iş parçacığı sayısı
+LOAD_WORKERS = int(os.environ.get('MODEL_LOAD_WORKERS', 4))
+
+# Çıkarım motoru: 'compiled' (imputer/scaler gömülü NumPy ağaçları) veya 'sklearn'
+INFERENCE_ENGINE = os.environ.get('INFERENCE_ENGINE', 'compiled')
+
+# Model dosya biçimi: 'auto' (güncel model_bundle.bin varsa bellek eşlemeli düz paket), 'flat' veya 'joblib'
+MODEL_FORMAT = os.environ.get('MODEL_FORMAT', 'auto')
+
+# Tahmin sonucu önbelleği ayarları (boyut 0 ise önbellek kapalı)
+RESULT_CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE', 10000))
+RESULT_CACHE_TTL = float(os.environ.get('RESULT_CACHE_TTL', 300))
+
+# /predict mikro toplu iş ayarları (boyut 1 veya altı ise kapalı, istekler tek tek işlenir)
+MICRO_BATCH_SIZE = int(os.environ.get('MICRO_BATCH_SIZE', 32))
+MICRO_BATCH_WAIT_MS = float(os.environ.get('MICRO_BATCH_WAIT_MS', 2))
+
+# Yerel hava durumu deposu; tanımlıysa kayıtlı hava verisi mevsimsel profillerin yerine kullanılır
+WEATHER_STORE_PATH = os.environ.get('WEATHER_STORE_PATH')
 
 # İptal kodları açıklamaları
 CANCELLATION_CODES = {
@@ -62,525 +97,1012 @@ CITY_MAPPING = {
     'Kayseri': 'Denver, CO'
 }
 
-# Global nesneleri tanımla
-model_cancelled = None
-model_code = None
-model_delay = None
-imputer = None
-scaler = None
-imputer_delay = None
-scaler_delay = None
-airline_encoder = None
-city_encoder = None
-
-# Model eğitiminde kullanılan özellik sırası
-FEATURE_ORDER = [
-    'YEAR_NORMALIZED', 'MONTH', 'DAY', 'DAY_OF_WEEK', 'SEASON',
-    'MONTH_SIN', 'MONTH_COS', 'DAY_SIN', 'DAY_COS',
-    'AIR', 'ORG', 'DST', 'CRS_DEP_TIME', 'CRS_ARR_TIME',
-    'DISTANCE', 'DISTANCE_CATEGORY', 'DEP_TIME_DETAILED',
-    'tmin', 'tmax', 'prcp', 'snow', 'wdir', 'wspd',
-    'wpgt', 'pres', 'tsun', 'WEATHER_COMPOSITE',
-    'ROUTE_POPULARITY_LOG', 'AIRLINE_RELIABILITY'
-]
-
-def load_models():
-    """Model ve diğer dosyaları yükler"""
-    global model_cancelled, model_code, model_delay, imputer, scaler, imputer_delay, scaler_delay, airline_encoder, city_encoder
+# Mevsimsel hava durumu profilleri (canlı hava verisi yerine kullanılır)
+SUMMER_WEATHER = {
+    'tmin': 22.0,
+    'tmax': 30.0,
+    'prcp': 0.0,
+    'snow': 0.0,
+    'wdir': 180.0,
+    'wspd': 3.0,
+    'wpgt': 0.0,
+    'pres': 1015.0,
+    'tsun': 10.0
+}
 
-    try:
-        model_cancelled = joblib.load(MODEL_CANCELLED_PATH)
-        model_code = joblib.load(MODEL_CODE_PATH)
-        model_delay = joblib.load(MODEL_DELAY_PATH)
-        
-        # Encoder'ları yükle
-        airline_encoder = joblib.load(os.path.join('models', 'label_enc_airline.joblib'))
-        city_encoder = joblib.load(os.path.join('models', 'label_enc_origin.joblib'))
-        
-        # Orijinal imputer ve scaler'ı yükle
-        imputer = joblib.load(os.path.join('models', 'imputer.joblib'))
-        scaler = joblib.load(os.path.join('models', 'scaler.joblib'))
-        
-        # Gecikme modeli için imputer ve scaler'ı yükle
-        imputer_delay = joblib.load(os.path.join('models', 'imputer_delay.joblib'))
-        scaler_delay = joblib.load(os.path.join('models', 'scaler_delay.joblib'))
-        
-        return True
-    except Exception as e:
-        print(f"Model yükleme hatası: {str(e)}")
-        return False
+DEFAULT_WEATHER = {
+    'tmin': 15.0,
+    'tmax': 25.0,
+    'prcp': 0.0,
+    'snow': 0.0,
+    'wdir': 180.0,
+    'wspd': 5.0,
+    'wpgt': 0.0,
+    'pres': 1015.0,
+    'tsun': 8.0
+}
 
-# Geocoding servisi
-class GeocodingService:
-    def __init__(self):
-        self.geolocator = Nominatim(user_agent="flight_predictor")
-        self.cache = {}
+# Ay numarasına göre mevsimsel profil (0. eleman kullanılmaz); model yüklenirken özellik planına derlenir
+SEASONAL_WEATHER = [SUMMER_WEATHER if month in [6, 7, 8] else DEFAULT_WEATHER for month in range(13)]
 
-    def get_coordinates(self, city_name, country=None):
-        cache_key = f"{city_name}, {country}" if country else city_name
-        if cache_key in self.cache:
-            return self.cache[cache_key]
-        try:
-            location = self.geolocator.geocode(cache_key, timeout=10)
-            if location:
-                coords = {'lat': location.latitude, 'lon': location.longitude}
-                self.cache[cache_key] = coords
-                return coords
-            return {'lat': 0, 'lon': 0}  # Varsayılan koordinatlar
-        except Exception:
-            return {'lat': 0, 'lon': 0}  # Hata durumunda varsayılan
-
-geocoding_service = GeocodingService()
-
-def get_weather_data(city_name, date):
-    """Hava durumu verisi alır, hata durumunda varsayılan değerler döndürür"""
-    default_weather = {
-        'tmin': 0, 'tmax': 0, 'prcp': 0, 'snow': 0,
-        'wdir': 0, 'wspd': 0, 'wpgt': 0, 'pres': 1013.25, 'tsun': 0
-    }
+# Etkin model paketi; yeniden yüklemede tek referans atamasıyla değiştirilir
+model_bundle = None
 
-    try:
-        coords = geocoding_service.get_coordinates(city_name)
-        point = Point(coords['lat'], coords['lon'])
-        weather_data = Daily(point, date, date).fetch()
-
-        if weather_data.empty:
-            return default_weather
-
-        weather_dict = weather_data.iloc[0].fillna(0).to_dict()
-        result = {}
-        for key in default_weather.keys():
-            result[key] = weather_dict.get(key, default_weather[key])
-        return result
-    except Exception:
-        return default_weather
-
-def weather_composite_score(weather):
-    """Hava durumu composite score hesaplar"""
-    score = 0
-
-    # Yağış etkisi
-    if weather['prcp'] > 0:
-        score += min(weather['prcp'] / 10, 3)  # Max 3 puan
-
-    # Kar etkisi (daha ağır)
-    if weather['snow'] > 0:
-        score += min(weather['snow'] / 5, 4)   # Max 4 puan
-
-    # Rüzgar etkisi
-    if weather['wspd'] > 10:
-        score += min((weather['wspd'] - 10) / 10, 2)  # Max 2 puan
-
-    # Sıcaklık ekstremleği
-    if weather['tmax'] > 35 or weather['tmin'] < -10:
-        score += 1
-
-    # Basınç etkisi
-    if weather['pres'] < 1000 or weather['pres'] > 1025:
-        score += 0.5
-
-    return min(score, 10)  # Maximum 10
-
-def categorize_time_detailed(time):
-    """Uçuş zamanını kategorize eder"""
-    if pd.isna(time):
-        return 0
-    hour = int(time // 100)
-    if 5 <= hour < 8:
-        return 1   # Erken sabah (yoğun)
-    elif 8 <= hour < 12:
-        return 2   # Sabah (orta)
-    elif 12 <= hour < 15:
-        return 3   # Öğlen (düşük)
-    elif 15 <= hour < 19:
-        return 4   # Öğleden sonra (yoğun)
-    elif 19 <= hour < 22:
-        return 5   # Akşam (orta)
-    else:
-        return 6   # Gece (düşük)
+# (şehir, tarih) anahtarlı yerel hava durumu deposu
+weather_store = None
 
-def prepare_features(data):
-    """İstek verisinden model özellikleri hazırlar"""
-    try:
-        # Tarihi parse et
-        flight_date = datetime.strptime(data['date'], '%Y-%m-%d')
-        
-        # Yıl normalizasyonu
-        min_year = 2015  # Model eğitimindeki minimum yıl
-        max_year = 2024  # Model eğitimindeki maximum yıl
-        year_normalized = (flight_date.year - min_year) / (max_year - min_year)
-
-        # Mevsimsel özellikler
-        season = {12: 0, 1: 0, 2: 0,  # Kış
-                 3: 1, 4: 1, 5: 1,   # İlkbahar
-                 6: 2, 7: 2, 8: 2,   # Yaz
-                 9: 3, 10: 3, 11: 3}[flight_date.month]
-
-        # Yaz ayı için ideal hava durumu değerleri
-        if season == 2:  # Yaz
-            weather = {
-                'tmin': 22.0,
-                'tmax': 30.0,
-                'prcp': 0.0,
-                'snow': 0.0,
-                'wdir': 180.0,
-                'wspd': 3.0,
-                'wpgt': 0.0,
-                'pres': 1015.0,
-                'tsun': 10.0
-            }
-        else:
-            # Diğer mevsimler için varsayılan değerler
-            weather = {
-                'tmin': 15.0,
-                'tmax': 25.0,
-                'prcp': 0.0,
-                'snow': 0.0,
-                'wdir': 180.0,
-                'wspd': 5.0,
-                'wpgt': 0.0,
-                'pres': 1015.0,
-                'tsun': 8.0
-            }
+# Normalize edilmiş istek anahtarlı tahmin sonucu önbelleği
+result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL) if RESULT_CACHE_SIZE > 0 else None
 
-        # Havayolu ve şehir kodlarını dönüştür
-        airline_code = safe_encode(airline_encoder, data.get('airline', 'Unknown'), 0)
-        origin_code = safe_encode(city_encoder, data.get('origin', 'Unknown'), 0)
-        dest_code = safe_encode(city_encoder, data.get('destination', 'Unknown'), 0)
-
-        # Zaman değerlerini düzenle
-        dep_time = int(data.get('departure_time', '00:00').replace(':', ''))
-        arr_time = int(data.get('arrival_time', '00:00').replace(':', ''))
-
-        # Mesafe değerini al ve kategorize et
-        distance = float(data.get('distance', 0))
-        distance_category = pd.cut([distance], 
-                                 bins=[0, 400, 800, 1500, 3000, 6000],
-                                 labels=[0, 1, 2, 3, 4])[0]
-
-        # Trigonometric features
-        month_sin = np.sin(2 * np.pi * flight_date.month / 12)
-        month_cos = np.cos(2 * np.pi * flight_date.month / 12)
-        day_sin = np.sin(2 * np.pi * flight_date.day / 31)
-        day_cos = np.cos(2 * np.pi * flight_date.day / 31)
-
-        # Hava durumu composite score
-        weather_score = weather_composite_score(weather)
-
-        # Uçuş zamanı kategorisi
-        dep_time_detailed = categorize_time_detailed(dep_time)
-
-        # Route popularity ve airline reliability için sabit değerler
-        route_popularity_log = 5.0  # Yüksek rota popülerliği
-        airline_reliability = 0.05  # Düşük iptal oranı
-
-        # Model özelliklerini oluştur
-        features = {
-            'YEAR_NORMALIZED': year_normalized,
-            'MONTH': flight_date.month,
-            'DAY': flight_date.day,
-            'DAY_OF_WEEK': flight_date.weekday(),
-            'SEASON': season,
-            'MONTH_SIN': month_sin,
-            'MONTH_COS': month_cos,
-            'DAY_SIN': day_sin,
-            'DAY_COS': day_cos,
-            'AIR': airline_code,
-            'ORG': origin_code,
-            'DST': dest_code,
-            'CRS_DEP_TIME': dep_time,
-            'CRS_ARR_TIME': arr_time,
-            'DISTANCE': distance,
-            'DISTANCE_CATEGORY': distance_category,
-            'DEP_TIME_DETAILED': dep_time_detailed,
-            'tmin': weather['tmin'],
-            'tmax': weather['tmax'],
-            'prcp': weather['prcp'],
-            'snow': weather['snow'],
-            'wdir': weather['wdir'],
-            'wspd': weather['wspd'],
-            'wpgt': weather['wpgt'],
-            'pres': weather['pres'],
-            'tsun': weather['tsun'],
-            'WEATHER_COMPOSITE': weather_score,
-            'ROUTE_POPULARITY_LOG': route_popularity_log,
-            'AIRLINE_RELIABILITY': airline_reliability
-        }
+# İptal kararı için kullanılan eşik değeri
+CANCEL_THRESHOLD = 0.45
 
-        # Özellikleri sıralı bir şekilde numpy array'e dönüştür
-        features_array = np.array([[features[name] for name in FEATURE_ORDER]])
+# Toplu tahmin isteğinde kabul edilen en fazla uçuş sayısı
+MAX_BATCH_SIZE = 1000
 
-        # Veriyi impute et
-        features_imputed = imputer.transform(features_array)
+# Model değerlendirme sayaçları (satır başına bir ağaç topluluğu geçişi)
+MODEL_EVALUATIONS = counter('model_evaluations_total',
+                            'Satır başına model değerlendirme sayısı', ('model',))
+PREDICTED_ROWS = counter('predicted_rows_total', 'Tahmin edilen uçuş sayısı', ('endpoint',))
+PREDICTION_BRANCH = counter('prediction_branch_total', 'İptal veya gecikme dalına giden tahmin sayısı', ('branch',))
 
-        # Ölçeklendirme
-        features_scaled = scaler.transform(features_imputed)
+# HTTP istek sayaçları ve uç nokta bazında toplam süre
+HTTP_REQUESTS = counter('http_requests_total', 'HTTP istek sayısı', ('endpoint', 'status'))
+HTTP_ERRORS = counter('http_request_errors_total', 'Hata durum koduyla biten HTTP istek sayısı', ('endpoint',))
+HTTP_LATENCY = histogram('http_request_duration_seconds', 'HTTP isteğinin toplam süresi',
+                         (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+                         ('endpoint',))
 
-        return features_scaled[0]  # Tek boyutlu array döndür
+# Yükleme/yeniden yükleme tek seferde bir kez çalışır
+_load_lock = threading.Lock()
 
-    except Exception as e:
-        print(f"Özellik hazırlama hatası: {str(e)}")
-        return None
+# Bu sürecin bilgisi; pre-fork modunda init_worker ile güncellenir
+worker_info = {'pid': os.getpid(), 'master_pid': None, 'mode': 'single',
+               'started_at': datetime.now().isoformat(timespec='seconds')}
 
-def prepare_delay_features(data):
-    """Gecikme modeli için özellik hazırlar"""
-    try:
-        # Tarihi parse et
-        flight_date = datetime.strptime(data['date'], '%Y-%m-%d')
-        
-        # Havayolu ve şehir kodlarını dönüştür
-        airline_code = safe_encode(airline_encoder, data.get('airline', 'Unknown'), 0)
-        origin_code = safe_encode(city_encoder, data.get('origin', 'Unknown'), 0)
-        dest_code = safe_encode(city_encoder, data.get('destination', 'Unknown'), 0)
-
-        # Zaman değerlerini düzenle
-        dep_time = int(data.get('departure_time', '00:00').replace(':', ''))
-        arr_time = int(data.get('arrival_time', '00:00').replace(':', ''))
-
-        # Mesafe değerini al
-        distance = float(data.get('distance', 0))
-
-        # Yaz ayı için ideal hava durumu değerleri
-        if flight_date.month in [6, 7, 8]:  # Yaz
-            weather = {
-                'tmin': 22.0,
-                'tmax': 30.0,
-                'prcp': 0.0,
-                'snow': 0.0,
-                'wdir': 180.0,
-                'wspd': 3.0,
-                'wpgt': 0.0,
-                'pres': 1015.0,
-                'tsun': 10.0
-            }
-        else:
-            # Diğer mevsimler için varsayılan değerler
-            weather = {
-                'tmin': 15.0,
-                'tmax': 25.0,
-                'prcp': 0.0,
-                'snow': 0.0,
-                'wdir': 180.0,
-                'wspd': 5.0,
-                'wpgt': 0.0,
-                'pres': 1015.0,
-                'tsun': 8.0
-            }
-
-        # Gecikme modeli için özellikleri oluştur (imputer'ın beklediği tüm özellikler)
-        features = {
-            'YEAR': flight_date.year,
-            'MONTH': flight_date.month,
-            'DAY': flight_date.day,
-            'AIR': airline_code,
-            'ORG': origin_code,
-            'DST': dest_code,
-            'CRS_DEP_TIME': dep_time,
-            'DISTANCE': distance,
-            'tmin': weather['tmin'],
-            'tmax': weather['tmax'],
-            'prcp': weather['prcp'],
-            'snow': weather['snow'],
-            'wdir': weather['wdir'],
-            'wspd': weather['wspd'],
-            'wpgt': weather['wpgt'],
-            'pres': weather['pres'],
-            'tsun': weather['tsun'],
-            'DEP_TIME': dep_time,  # İmputer'ın beklediği ek özellik
-            'CRS_ARR_TIME': arr_time  # İmputer'ın beklediği ek özellik
-        }
+# Son arka plan yeniden yüklemesinin durumu
+reload_status = {'state': 'idle'}
+_reload_lock = threading.Lock()
 
-        # Özellikleri sıralı bir şekilde numpy array'e dönüştür
-        features_array = np.array([[features[name] for name in sorted(features.keys())]])
+def load_models(model_dir=None, reload=False):
+    """Yeni model paketini kurar, ısıtır ve tek atamayla etkinleştirir
 
-        # Veriyi impute et (gecikme modeli için)
-        features_imputed = imputer_delay.transform(features_array)
+    `model_dir` verilirse tüm artefaktlar o klasörden okunur. Kurulum sırasında
+    istekler mevcut paketle sunulmaya devam eder; hata olursa eski paket kalır.
+    """
+    global model_bundle, weather_store
 
-        # Ölçeklendirme (gecikme modeli için)
-        features_scaled = scaler_delay.transform(features_imputed)
+    if model_dir is None:
+        paths = artifact_paths(MODEL_DIR)
+        paths.update(model_cancelled=MODEL_CANCELLED_PATH, model_code=MODEL_CODE_PATH,
+                     model_delay=MODEL_DELAY_PATH)
+    else:
+        paths = artifact_paths(model_dir)
 
-        # Model için gerekli olan 17 özelliği seç
-        model_features = features_scaled[0][:17]  # İlk 17 özelliği al
+    # Eşzamanlı ilk istekler modelleri tek seferde yüklesin
+    with _load_lock:
+        if model_bundle is not None and not reload:
+            return True
 
-        return model_features  # Tek boyutlu array döndür
+        try:
+            bundle = load_bundle(paths, CANCEL_FEATURES, INFERENCE_ENGINE, LOAD_WORKERS, SEASONAL_WEATHER,
+                                 MODEL_FORMAT)
+
+            if WEATHER_STORE_PATH and weather_store is None:
+                weather_store = WeatherStore(WEATHER_STORE_PATH)
+
+            previous = model_bundle
+            model_bundle = bundle
+
+            # Yeni modellerle eski sonuçlar geçersiz
+            if result_cache is not None:
+                result_cache.invalidate()
+
+            log_event(logger, logging.INFO, 'Model paketi yüklendi', version=bundle.version,
+                      previous_version=previous.version if previous else None,
+                      total_ms=bundle.load_report['total_ms'],
+                      artifacts_ms=bundle.load_report['artifacts_ms'])
+            return True
+        except Exception as e:
+            log_event(logger, logging.ERROR, 'Model yükleme hatası', exc_info=True, error=str(e))
+            return False
+
+def reload_in_background(model_dir=None):
+    """Yeni paketi arka plan iş parçacığında kurar; zaten sürüyorsa False döndürür"""
+    with _reload_lock:
+        if reload_status['state'] == 'running':
+            return False
+        reload_status.clear()
+        reload_status.update(state='running', model_dir=model_dir or MODEL_DIR,
+                             started_at=datetime.now().isoformat(timespec='seconds'))
+
+    def run():
+        succeeded = load_models(model_dir, reload=True)
+        reload_status.update(state='succeeded' if succeeded else 'failed',
+                             finished_at=datetime.now().isoformat(timespec='seconds'),
+                             version=model_bundle.version if model_bundle else None)
+
+    threading.Thread(target=run, name='model-reload', daemon=True).start()
+    return True
+
+def init_worker(master_pid):
+    """Pre-fork modunda her worker fork edildikten sonra çağrılır
+
+    Modeller master'dan copy-on-write olarak devralınır; fork ile paylaşılamayan
+    SQLite bağlantısı worker içinde yeniden açılır.
+    """
+    global weather_store
+
+    worker_info.update(pid=os.getpid(), master_pid=master_pid, mode='prefork',
+                       started_at=datetime.now().isoformat(timespec='seconds'))
+    # Günlük dinleyici iş parçacığı fork ile devralınmaz
+    setup_logging()
+    if weather_store is not None:
+        weather_store = WeatherStore(weather_store.path)
+
+def get_bundle():
+    """Etkin model paketini döndürür; henüz yüklenmemişse yükler"""
+    bundle = model_bundle
+    if bundle is None and load_models():
+        bundle = model_bundle
+    return bundle
+
+def stored_weather(city_name, flight_date):
+    """Uçuş günü için depodaki hava durumu; depo veya kayıt yoksa None (mevsimsel profil kullanılır)"""
+    if weather_store is None:
+        return None
+    return weather_store.get(city_name, flight_date)
 
+def parse_request(data):
+    """İstek gövdesini bir kez ayrıştırıp FlightRequest döndürür; hatalı istekte None döndürür"""
+    try:
+        started = time.perf_counter()
+        flight = FlightRequest.parse(data)
+        stage_timer.lap('parse', started)
+        return flight
     except Exception as e:
-        print(f"Gecikme özellik hazırlama hatası: {str(e)}")
+        log_event(logger, logging.WARNING, 'Özellik hazırlama hatası', error=str(e))
         return None
 
-def safe_encode(encoder, value, default=0):
-    """Güvenli bir şekilde encode eder, hata durumunda default değeri döndürür"""
+def resolve_request(flight, bundle):
+    """Kayıtlı hava durumunu ve havayolu/şehir kodlarını isteğe bir kez yazar
+
+    İptal ve gecikme özellikleri aynı değerleri kullanır; ikinci çağrı bir şey yapmaz.
+    """
+    if flight.resolved:
+        return flight
+
+    # Kalkış şehrinin kayıtlı hava durumu (yoksa planın mevsimsel profili kullanılır)
+    started = time.perf_counter()
+    flight.weather = stored_weather(flight.origin, flight.flight_date)
+    started = stage_timer.lap('weather', started)
+
+    # Havayolu ve şehir kodlarını dönüştür
+    flight.airline_code = safe_encode(bundle.airline_index, flight.airline, 0)
+    flight.origin_code = safe_encode(bundle.city_index, flight.origin, 0)
+    flight.dest_code = safe_encode(bundle.city_index, flight.destination, 0)
+    stage_timer.lap('encode', started)
+    flight.resolved = True
+    return flight
+
+def prepare_features(flight, bundle):
+    """Ayrıştırılmış istekten ham (imputer/scaler uygulanmamış) model özelliklerini hazırlar"""
     try:
-        # Havayolu kodları için büyük harfe çevir
-        if value in AIRLINE_MAPPING.values():
-            value = str(value).upper()
-        # Şehir isimleri için orijinal formatı koru
-        else:
-            value = str(value)
-        result = encoder.transform([value])[0]
-        return int(result)
+        resolve_request(flight, bundle)
+
+        # CANCEL_FEATURES sırasında vektör: tarih ve profil blokları plandan, kalanlar bu istekten
+        # (türetilmiş özellikler eğitimle aynı tanımlardan; impute ve ölçeklendirme tahminci içinde yapılır)
+        started = time.perf_counter()
+        vector = bundle.feature_plan.cancel_vector(flight)
+        stage_timer.lap('features', started)
+        return vector
+
     except Exception as e:
-        print(f"Encoding error for {value}: {str(e)}")
-        return default
+        log_event(logger, logging.WARNING, 'Özellik hazırlama hatası', error=str(e))
+        return None
 
-@app.route('/predict', methods=['POST'])
-def predict():
-    """Hızlı düzeltme ile tahmin fonksiyonu"""
+def prepare_delay_features(flight, bundle):
+    """Gecikme modeli için ham (imputer/scaler uygulanmamış) özellikleri hazırlar"""
     try:
-        data = request.json
-        print("\nGelen istek verisi:", data)
+        resolve_request(flight, bundle)
 
-        if model_cancelled is None:
-            if not load_models():
-                return jsonify({'error': 'Modeller yüklenemedi'}), 500
+        # DELAY_FEATURES sırasında vektör (imputer'ın beklediği tüm özellikler; DEP_TIME = CRS_DEP_TIME)
+        # (impute, ölçeklendirme ve modelin kullandığı ilk 17 özelliğin seçimi tahminci içinde yapılır)
+        started = time.perf_counter()
+        vector = bundle.feature_plan.delay_vector(flight)
+        stage_timer.lap('delay_features', started)
+        return vector
 
-        features_scaled = prepare_features(data)
-        if features_scaled is None:
-            return jsonify({'error': 'Özellik hazırlama hatası'}), 400
+    except Exception as e:
+        log_event(logger, logging.WARNING, 'Gecikme özellik hazırlama hatası', error=str(e))
+        return None
 
-        # İptal tahmini
-        cancelled_pred = model_cancelled.predict([features_scaled])[0]
-        cancelled_proba = model_cancelled.predict_proba([features_scaled])[0]
+def safe_encode(index, value, default=0):
+    """Sözlük indeksi ile encode eder, bilinmeyen değerde default değeri döndürür
+
+    Bilinmeyen değerler istisna fırlatmaz, `unknown_category_total` sayacına yazılır.
+    """
+    return index.encode(value, default)
+
+def evaluate_model(name, predictor, features):
+    """Modeli tek geçişte değerlendirip sınıf olasılıklarını döndürür
+
+    Sınıf etiketleri ayrı bir predict çağrısı yerine bu olasılıklardan
+    (argmax/eşik) türetilir.
+    """
+    features = np.atleast_2d(features)
+    MODEL_EVALUATIONS.inc(len(features), model=name)
+    started = time.perf_counter()
+    proba = predictor.predict_proba(features)
+    stage_timer.lap('predict_proba_' + name, started)
+    return proba
+
+def parse_flight_records(records, bundle):
+    """Uçuş kayıtlarını sütun dizilerine ayrıştırır, hatalı kayıtları ayrıca döndürür"""
+    names = ['year', 'month', 'day', 'day_of_week', 'dep_time', 'arr_time', 'distance']
+    columns = {name: [] for name in names}
+    airlines, origins, destinations, dates = [], [], [], []
+    valid_rows = []
+    errors = {}
+
+    started = time.perf_counter()
+    for i, data in enumerate(records):
+        # Mikro toplu işten gelen /predict istekleri zaten ayrıştırılmıştır
+        if isinstance(data, FlightRequest):
+            flight = data
+        else:
+            try:
+                flight = FlightRequest.parse(data)
+            except Exception as e:
+                errors[i] = str(e)
+                continue
+
+        flight_date = flight.flight_date
+        valid_rows.append(i)
+        airlines.append(flight.airline)
+        origins.append(flight.origin)
+        destinations.append(flight.destination)
+        dates.append(flight_date)
+        columns['year'].append(flight_date.year)
+        columns['month'].append(flight_date.month)
+        columns['day'].append(flight_date.day)
+        columns['day_of_week'].append(flight_date.weekday())
+        columns['dep_time'].append(flight.dep_time)
+        columns['arr_time'].append(flight.arr_time)
+        columns['distance'].append(flight.distance)
+
+    columns = {name: np.array(values, dtype=float) for name, values in columns.items()}
+    started = stage_timer.lap('parse', started)
+
+    # Kategorik alanları tek geçişte kodla
+    columns['air'] = bundle.airline_index.encode_many(airlines).astype(float)
+    columns['org'] = bundle.city_index.encode_many(origins).astype(float)
+    columns['dst'] = bundle.city_index.encode_many(destinations).astype(float)
+    stage_timer.lap('encode', started)
+    columns['airline'] = np.array(airlines, dtype=object)
+    columns['origin'] = np.array(origins, dtype=object)
+    columns['date'] = np.array(dates, dtype=object)
+    return valid_rows, errors, columns
+
+def weather_columns(columns):
+    """Hava durumu sütunlarını dizi olarak döndürür (depoda kayıt yoksa mevsimsel profil)"""
+    summer = np.isin(columns['month'], [6, 7, 8])
+    weather = {key: np.where(summer, SUMMER_WEATHER[key], DEFAULT_WEATHER[key])
+               for key in SUMMER_WEATHER}
+
+    if weather_store is not None:
+        for i, (city_name, flight_date) in enumerate(zip(columns['origin'], columns['date'])):
+            stored = weather_store.get(city_name, flight_date)
+            if stored is not None:
+                for key in WEATHER_FIELDS:
+                    weather[key][i] = stored[key]
+
+    return weather
+
+def build_feature_matrix(columns, bundle):
+    """İptal modelleri için ham (N, 29) özellik matrisini oluşturur"""
+    month = columns['month']
+
+    started = time.perf_counter()
+    features = weather_columns(columns)
+    started = stage_timer.lap('weather', started)
+    features.update(derived_features(columns['year'], month, columns['day'], columns['dep_time'],
+                                     columns['distance'], features, bundle.min_year, bundle.max_year))
+    features.update({
+        'MONTH': month,
+        'DAY': columns['day'],
+        'DAY_OF_WEEK': columns['day_of_week'],
+        'AIR': columns['air'],
+        'ORG': columns['org'],
+        'DST': columns['dst'],
+        'CRS_DEP_TIME': columns['dep_time'],
+        'CRS_ARR_TIME': columns['arr_time'],
+        'DISTANCE': columns['distance'],
+        'ROUTE_POPULARITY_LOG': bundle.route_popularity_log(columns['org'], columns['dst']),
+        'AIRLINE_RELIABILITY': bundle.airline_reliability_rate(columns['air'])
+    })
+
+    matrix = np.column_stack([features[name] for name in CANCEL_FEATURES]).astype(float)
+    stage_timer.lap('features', started)
+    return matrix
+
+def build_delay_feature_matrix(columns):
+    """Gecikme modeli için ham (N, 19) özellik matrisini oluşturur"""
+    started = time.perf_counter()
+    features = weather_columns(columns)
+    features.update({
+        'YEAR': columns['year'],
+        'MONTH': columns['month'],
+        'DAY': columns['day'],
+        'AIR': columns['air'],
+        'ORG': columns['org'],
+        'DST': columns['dst'],
+        'CRS_DEP_TIME': columns['dep_time'],
+        'DISTANCE': columns['distance'],
+        'DEP_TIME': columns['dep_time'],
+        'CRS_ARR_TIME': columns['arr_time']
+    })
+
+    matrix = np.column_stack([features[name] for name in DELAY_FEATURES]).astype(float)
+    stage_timer.lap('delay_features', started)
+    return matrix
+
+def compute_corrections(month, dep_time, distance, airlines):
+    """Hızlı düzeltme faktörlerini ve nedenlerini dizi olarak hesaplar"""
+    rules = [
+        (np.isin(month, [6, 7, 8]), 0.3, "Yaz ayı"),
+        ((dep_time >= 800) & (dep_time <= 1800), 0.5, "Gündüz uçuşu"),
+        (distance < 1000, 0.6, "Kısa mesafe"),
+        (np.isin(airlines, ['AA', 'DL', 'UA']), 0.7, "Güvenilir havayolu")
+    ]
+
+    factors = np.ones(len(month))
+    reasons = [[] for _ in range(len(month))]
+    for mask, factor, reason in rules:
+        factors = np.where(mask, factors * factor, factors)
+        for i in np.flatnonzero(mask):
+            reasons[i].append(reason)
+
+    return factors, reasons
+
+def apply_corrections(cancelled_proba, factors):
+    """Düzeltme faktörlerini iptal olasılıklarına uygular (%2 - %95 sınırı ile)"""
+    corrected = factors < 1.0
+    adjusted = np.clip(cancelled_proba[:, 1] * factors, 0.02, 0.95)
+    cancel_prob = np.where(corrected, adjusted, cancelled_proba[:, 1])
+    not_cancel_prob = np.where(corrected, 1 - adjusted, cancelled_proba[:, 0])
+    return np.column_stack([not_cancel_prob, cancel_prob])
+
+def predict_flights(records, bundle, endpoint='predict_batch'):
+    """Uçuş listesi için iptal/gecikme kaskadını tek matris üzerinde çalıştırır"""
+    valid_rows, errors, columns = parse_flight_records(records, bundle)
+    results = [None] * len(records)
+    for i in errors:
+        results[i] = {'error': 'Özellik hazırlama hatası'}
+
+    if not valid_rows:
+        return results
+
+    # İptal modelleri için ham (N, 29) matris; gecikme matrisi yalnızca iptal edilmeyen satırlar için kurulur
+    features = build_feature_matrix(columns, bundle)
+
+    def delay_features(rows):
+        return build_delay_feature_matrix({name: values[rows] for name, values in columns.items()})
+
+    predictions, _ = predict_cascade(features, delay_features, columns, bundle, endpoint)
+
+    started = time.perf_counter()
+    for i, prediction in zip(valid_rows, predictions):
+        results[i] = {'predictions': prediction}
+    stage_timer.lap('assemble', started)
+    return results
+
+def predict_cascade(features, delay_features, columns, bundle, endpoint):
+    """Hazır iptal matrisi üzerinde iptal/gecikme kaskadını çalıştırır
+
+    `delay_features(satırlar)` iptal edilmeyen satırların gecikme matrisini
+    döndürür; `columns` düzeltmelerin kullandığı month/dep_time/distance/airline
+    dizileridir. (tahminler, satır başına model değerlendirme sayısı) döndürür.
+    """
+    n_rows = len(features)
+    # İptal tahmini (tek imputer/scaler/predict_proba çağrısı)
+    PREDICTED_ROWS.inc(n_rows, endpoint=endpoint)
+    cancelled_proba = evaluate_model('cancelled', bundle.cancel_predictor, features)
+
+    started = time.perf_counter()
+    raw_cancel_prob = cancelled_proba[:, 1]
+    factors, reasons = compute_corrections(columns['month'], columns['dep_time'],
+                                           columns['distance'], columns['airline'])
+    cancelled_proba = apply_corrections(cancelled_proba, factors)
+    cancelled_pred = cancelled_proba[:, 1] > CANCEL_THRESHOLD
+    started = stage_timer.lap('corrections', started)
+    # Her satır iptal modelinden, ardından iptal kodu veya gecikme modelinden geçer
+    evaluations = np.ones(n_rows, dtype=int)
+
+    n_cancelled = int(cancelled_pred.sum())
+    PREDICTION_BRANCH.inc(n_cancelled, branch='cancelled')
+    PREDICTION_BRANCH.inc(n_rows - n_cancelled, branch='delay')
+
+    predictions = []
+    for j in range(n_rows):
+        predictions.append({
+            'cancelled': bool(cancelled_pred[j]),
+            'cancelled_probability': {
+                'not_cancelled': float(cancelled_proba[j, 0]),
+                'cancelled': float(cancelled_proba[j, 1])
+            },
+            'confidence': float(cancelled_proba[j].max()),
+            'model_adjustments': {
+                'corrections_applied': reasons[j],
+                'correction_factor': float(factors[j]),
+                'threshold_used': CANCEL_THRESHOLD
+            }
+        })
+
+    # Ham olasılık, düzeltmeler ve karar (örneklenen satırlarda)
+    if logger.isEnabledFor(logging.INFO):
+        for j in range(n_rows):
+            if sampled():
+                log_event(logger, logging.INFO, 'Tahmin kararı', endpoint=endpoint,
+                          raw_cancel_probability=float(raw_cancel_prob[j]), corrections=reasons[j],
+                          correction_factor=float(factors[j]),
+                          cancel_probability=float(cancelled_proba[j, 1]), threshold=CANCEL_THRESHOLD,
+                          cancelled=bool(cancelled_pred[j]),
+                          branch='cancelled' if cancelled_pred[j] else 'delay')
+
+    # İptal kodu tahmini sadece iptal edilen satırlar için
+    cancelled_idx = np.flatnonzero(cancelled_pred)
+    if len(cancelled_idx):
+        code_probs = evaluate_model('cancel_code', bundle.code_predictor, features[cancelled_idx])
+        evaluations[cancelled_idx] += 1
+        for j, probs in zip(cancelled_idx, code_probs):
+            predictions[j]['cancellation_code'] = CANCELLATION_CODES[int(np.argmax(probs))]
+            predictions[j]['cancellation_code_probabilities'] = {
+                CANCELLATION_CODES[i]: float(prob)
+                for i, prob in enumerate(probs) if i in CANCELLATION_CODES
+            }
 
-        print(f"Ham tahmin: İptal={cancelled_pred}, Olasılık={cancelled_proba}")
+    # Gecikme tahmini sadece iptal edilmeyen satırlar için
+    delay_idx = np.flatnonzero(~cancelled_pred)
+    if len(delay_idx):
+        delay_probs = evaluate_model('delay', bundle.delay_predictor, delay_features(delay_idx))
+        evaluations[delay_idx] += 1
+        for j, probs in zip(delay_idx, delay_probs):
+            predictions[j]['delay'] = {
+                'delay_class': DELAY_CLASSES[int(np.argmax(probs))],
+                'delay_probabilities': {
+                    DELAY_CLASSES[i]: float(prob)
+                    for i, prob in enumerate(probs) if i in DELAY_CLASSES
+                }
+            }
 
-        # === HİZLI DÜZELTMELERİ UYGULA ===
-        flight_date = datetime.strptime(data['date'], '%Y-%m-%d')
-        dep_time = int(data.get('departure_time', '00:00').replace(':', ''))
-        distance = float(data.get('distance', 0))
-        
-        # Düzeltme faktörü hesapla
-        correction_factor = 1.0
-        correction_reasons = []
-        
-        # 1. Yaz ayları düzeltmesi
-        if flight_date.month in [6, 7, 8]:
-            correction_factor *= 0.3  # %70 azaltma
-            correction_reasons.append("Yaz ayı")
-        
-        # 2. Gündüz uçuşları düzeltmesi  
-        if 800 <= dep_time <= 1800:
-            correction_factor *= 0.5  # %50 azaltma
-            correction_reasons.append("Gündüz uçuşu")
-        
-        # 3. Kısa mesafe düzeltmesi
-        if distance < 1000:
-            correction_factor *= 0.6  # %40 azaltma
-            correction_reasons.append("Kısa mesafe")
+    return predictions, evaluations.tolist()
+
+def predict_requests(flights, bundle):
+    """Mikro toplu işteki ayrıştırılmış istekleri tek matris geçişinde tahmin eder
+
+    Kodlar ve hava durumu resolve_request ile istek başına bir kez çözülür;
+    iptal ve gecikme matrisleri özellik planı vektörleri yığılarak kurulur.
+    compute_prediction ile aynı (sonuç, durum kodu) biçiminde, istek sırasıyla döndürür.
+    """
+    outputs = [None] * len(flights)
+    valid_rows, vectors = [], []
+    for i, flight in enumerate(flights):
+        vector = prepare_features(flight, bundle)
+        if vector is None:
+            outputs[i] = ({'error': 'Özellik hazırlama hatası'}, 400)
+            continue
+        valid_rows.append(i)
+        vectors.append(vector)
+
+    if not valid_rows:
+        return outputs
+
+    resolved = [flights[i] for i in valid_rows]
+    columns = {
+        'month': np.array([flight.flight_date.month for flight in resolved], dtype=float),
+        'dep_time': np.array([flight.dep_time for flight in resolved], dtype=float),
+        'distance': np.array([flight.distance for flight in resolved], dtype=float),
+        'airline': np.array([flight.airline for flight in resolved], dtype=object)
+    }
+
+    def delay_features(rows):
+        started = time.perf_counter()
+        matrix = np.vstack([bundle.feature_plan.delay_vector(resolved[j]) for j in rows])
+        stage_timer.lap('delay_features', started)
+        return matrix
+
+    predictions, evaluations = predict_cascade(np.vstack(vectors), delay_features, columns, bundle, 'predict')
+    for i, prediction, count in zip(valid_rows, predictions, evaluations):
+        outputs[i] = ({'predictions': prediction, 'model_evaluations': count, 'model_version': bundle.version}, 200)
+    return outputs
+
+def compute_prediction(flight, bundle):
+    """Ayrıştırılmış tek uçuş için iptal/gecikme kaskadını çalıştırır; (sonuç, durum kodu) döndürür"""
+    features = prepare_features(flight, bundle)
+    if features is None:
+        return {'error': 'Özellik hazırlama hatası'}, 400
+
+    PREDICTED_ROWS.inc(endpoint='predict')
+
+    # İptal tahmini (tek geçiş, etiket olasılıktan türetilir)
+    cancelled_proba = evaluate_model('cancelled', bundle.cancel_predictor, features)[0]
+    cancelled_pred = int(np.argmax(cancelled_proba))
+    raw_cancel_prob = float(cancelled_proba[1])
+    model_evaluations = 1
+
+    # === HİZLI DÜZELTMELERİ UYGULA ===
+    # (tarih, saat ve mesafe istek başında bir kez ayrıştırıldı)
+    started = time.perf_counter()
+    dep_time = flight.dep_time
+    distance = flight.distance
+    
+    # Düzeltme faktörü hesapla
+    correction_factor = 1.0
+    correction_reasons = []
+    
+    # 1. Yaz ayları düzeltmesi
+    if flight.flight_date.month in [6, 7, 8]:
+        correction_factor *= 0.3  # %70 azaltma
+        correction_reasons.append("Yaz ayı")
+    
+    # 2. Gündüz uçuşları düzeltmesi  
+    if 800 <= dep_time <= 1800:
+        correction_factor *= 0.5  # %50 azaltma
+        correction_reasons.append("Gündüz uçuşu")
+    
+    # 3. Kısa mesafe düzeltmesi
+    if distance < 1000:
+        correction_factor *= 0.6  # %40 azaltma
+        correction_reasons.append("Kısa mesafe")
+    
+    # 4. Popüler havayolları düzeltmesi
+    if flight.airline in ['AA', 'DL', 'UA']:
+        correction_factor *= 0.7  # %30 azaltma
+        correction_reasons.append("Güvenilir havayolu")
+    
+    # Düzeltmeyi uygula
+    if correction_factor < 1.0:
+        original_cancel_prob = cancelled_proba[1]
+        adjusted_cancel_prob = original_cancel_prob * correction_factor
         
-        # 4. Popüler havayolları düzeltmesi
-        if data.get('airline') in ['AA', 'DL', 'UA']:
-            correction_factor *= 0.7  # %30 azaltma
-            correction_reasons.append("Güvenilir havayolu")
+        # Minimum %2, maksimum %95 sınırı
+        adjusted_cancel_prob = max(0.02, min(0.95, adjusted_cancel_prob))
         
-        # Düzeltmeyi uygula
-        if correction_factor < 1.0:
-            original_cancel_prob = cancelled_proba[1]
-            adjusted_cancel_prob = original_cancel_prob * correction_factor
-            
-            # Minimum %2, maksimum %95 sınırı
-            adjusted_cancel_prob = max(0.02, min(0.95, adjusted_cancel_prob))
-            
-            cancelled_proba = np.array([1 - adjusted_cancel_prob, adjusted_cancel_prob])
+        cancelled_proba = np.array([1 - adjusted_cancel_prob, adjusted_cancel_prob])
+    
+    # Yeni karar ver (yüksek threshold)
+    THRESHOLD = CANCEL_THRESHOLD
+    cancelled_pred = 1 if cancelled_proba[1] > THRESHOLD else 0
+    
+    stage_timer.lap('corrections', started)
+    branch = 'cancelled' if cancelled_pred == 1 else 'delay'
+    PREDICTION_BRANCH.inc(branch=branch)
+
+    # Ham olasılık, düzeltmeler ve karar (örneklenen isteklerde)
+    log_event(logger, logging.INFO, 'Tahmin kararı', sample_rate=LOG_SAMPLE_RATE,
+              endpoint='predict', raw_cancel_probability=raw_cancel_prob, corrections=correction_reasons,
+              correction_factor=correction_factor, cancel_probability=float(cancelled_proba[1]),
+              threshold=THRESHOLD, cancelled=bool(cancelled_pred), branch=branch)
+    
+    # Güven skoru
+    confidence = max(cancelled_proba)
+    
+    # Sonuç hazırla
+    result = {
+        'predictions': {
+            'cancelled': bool(cancelled_pred),
+            'cancelled_probability': {
+                'not_cancelled': float(cancelled_proba[0]),
+                'cancelled': float(cancelled_proba[1])
+            },
+            'confidence': float(confidence),
+            'model_adjustments': {
+                'corrections_applied': correction_reasons,
+                'correction_factor': correction_factor,
+                'threshold_used': THRESHOLD
+            }
+        }
+    }
+
+    # İptal kodu tahmini
+    if cancelled_pred == 1:
+        code_probs = evaluate_model('cancel_code', bundle.code_predictor, features)[0]
+        code_pred = int(np.argmax(code_probs))
+        model_evaluations += 1
+        result['predictions']['cancellation_code'] = CANCELLATION_CODES[code_pred]
+        result['predictions']['cancellation_code_probabilities'] = {}
+        for i, prob in enumerate(code_probs):
+            if i in CANCELLATION_CODES:
+                result['predictions']['cancellation_code_probabilities'][CANCELLATION_CODES[i]] = float(prob)
+    else:
+        # İptal olmayan uçuşlar için gecikme tahmini
+        delay_features = prepare_delay_features(flight, bundle)
+        if delay_features is None:
+            return {'error': 'Gecikme özellik hazırlama hatası'}, 400
             
-            print(f"Düzeltmeler uygulandı: {correction_reasons}")
-            print(f"Düzeltme faktörü: {correction_factor}")
-            print(f"Orijinal: {original_cancel_prob:.4f} -> Düzeltilmiş: {adjusted_cancel_prob:.4f}")
+        delay_probs = evaluate_model('delay', bundle.delay_predictor, delay_features)[0]
+        delay_pred = int(np.argmax(delay_probs))
+        model_evaluations += 1
         
-        # Yeni karar ver (yüksek threshold)
-        THRESHOLD = 0.45
-        cancelled_pred = 1 if cancelled_proba[1] > THRESHOLD else 0
-        
-        print(f"Final karar: İptal={cancelled_pred} (Threshold: {THRESHOLD})")
-        
-        # Güven skoru
-        confidence = max(cancelled_proba)
+        result['predictions']['delay'] = {
+            'delay_class': DELAY_CLASSES[delay_pred],
+            'delay_probabilities': {}
+        }
         
-        # Sonuç hazırla
-        result = {
-            'predictions': {
-                'cancelled': bool(cancelled_pred),
-                'cancelled_probability': {
-                    'not_cancelled': float(cancelled_proba[0]),
-                    'cancelled': float(cancelled_proba[1])
-                },
-                'confidence': float(confidence),
-                'model_adjustments': {
-                    'corrections_applied': correction_reasons,
-                    'correction_factor': correction_factor,
-                    'threshold_used': THRESHOLD
+        for i, prob in enumerate(delay_probs):
+            if i in DELAY_CLASSES:
+                result['predictions']['delay']['delay_probabilities'][DELAY_CLASSES[i]] = float(prob)
+
+    # Bu istekte yapılan model değerlendirme sayısı ve model sürümü
+    result['model_evaluations'] = model_evaluations
+    result['model_version'] = bundle.version
+
+    return result, 200
+
+def predict_micro_batch(items):
+    """Mikro toplu işteki (FlightRequest, paket) çiftlerini paket başına tek matris geçişinde tahmin eder
+
+    compute_prediction ile aynı (sonuç, durum kodu) biçiminde, istek sırasıyla döndürür.
+    """
+    outputs = [None] * len(items)
+    groups = {}
+    for i, (flight, bundle) in enumerate(items):
+        groups.setdefault(bundle.version, (bundle, []))[1].append(i)
+
+    for bundle, indexes in groups.values():
+        # Tek istek (düşük yükte olağan durum) özellik planıyla tek satır yolundan geçer
+        if len(indexes) == 1:
+            flight = items[indexes[0]][0]
+            outputs[indexes[0]] = compute_prediction(flight, bundle)
+            continue
+
+        for i, output in zip(indexes, predict_requests([items[i][0] for i in indexes], bundle)):
+            outputs[i] = output
+    return outputs
+
+# Eşzamanlı /predict isteklerini tek model geçişinde birleştiren toplayıcı
+micro_batcher = (MicroBatcher(predict_micro_batch, MICRO_BATCH_SIZE, MICRO_BATCH_WAIT_MS / 1000)
+                 if MICRO_BATCH_SIZE > 1 else None)
+
+def run_prediction(flight, bundle):
+    """Tek uçuş tahminini mikro toplu iş kuyruğu üzerinden (kapalıysa doğrudan) çalıştırır"""
+    if micro_batcher is None:
+        return compute_prediction(flight, bundle)
+    return micro_batcher.submit((flight, bundle)).result()
+
+def prediction_cache_key(flight, bundle):
+    """Ayrıştırılmış istekten kanonik önbellek anahtarı üretir
+
+    Anahtar model sürümünü de içerir; farklı paketlerin sonuçları paylaşılmaz.
+    """
+    return (
+        bundle.version,
+        flight.flight_date.date().isoformat(),
+        str(flight.airline),
+        str(flight.origin),
+        str(flight.destination),
+        flight.dep_time,
+        flight.arr_time,
+        flight.distance
+    )
+
+def date_range_columns(start_date, n_days):
+    """Tarih aralığının yıl/ay/gün/haftanın günü sütunlarını dizi olarak üretir"""
+    dates = np.datetime64(start_date, 'D') + np.arange(n_days)
+    months = dates.astype('datetime64[M]')
+    return dates, {
+        'year': dates.astype('datetime64[Y]').astype(int) + 1970.0,
+        'month': months.astype(int) % 12 + 1.0,
+        'day': (dates - months).astype(int) + 1.0,
+        # 1970-01-01 Perşembe (weekday=3)
+        'day_of_week': (dates.astype(int) + 3) % 7 + 0.0
+    }
+
+def score_route_grid(data, bundle):
+    """Tek rota için tarih x kalkış saati ızgarasını tek vektörel geçişte skorlar"""
+    start_date = datetime.strptime(data['start_date'], '%Y-%m-%d')
+    if data.get('end_date'):
+        n_days = (datetime.strptime(data['end_date'], '%Y-%m-%d') - start_date).days + 1
+    else:
+        n_days = int(data.get('days', 7))
+
+    departure_times = list(data['departure_times'])
+    arrival_times = list(data.get('arrival_times') or ['00:00'] * len(departure_times))
+    if n_days < 1 or not departure_times or len(arrival_times) != len(departure_times):
+        raise ValueError("Geçersiz tarih aralığı veya saat listesi")
+    if n_days * len(departure_times) > MAX_BATCH_SIZE:
+        raise ValueError(f"Izgara en fazla {MAX_BATCH_SIZE} hücre olabilir")
+
+    n_slots = len(departure_times)
+    dates, date_columns = date_range_columns(start_date.date(), n_days)
+
+    # Sabit alanlar bir kez kodlanır, tarih ve saat sütunları ızgaraya yayılır
+    airline = data.get('airline', 'Unknown')
+    origin = data.get('origin', 'Unknown')
+    n_cells = n_days * n_slots
+    columns = {name: np.repeat(values, n_slots) for name, values in date_columns.items()}
+    columns.update({
+        'air': np.full(n_cells, float(safe_encode(bundle.airline_index, airline, 0))),
+        'org': np.full(n_cells, float(safe_encode(bundle.city_index, origin, 0))),
+        'dst': np.full(n_cells, float(safe_encode(bundle.city_index, data.get('destination', 'Unknown'), 0))),
+        'dep_time': np.tile([float(t.replace(':', '')) for t in departure_times], n_days),
+        'arr_time': np.tile([float(t.replace(':', '')) for t in arrival_times], n_days),
+        'distance': np.full(n_cells, float(data.get('distance', 0))),
+        'airline': np.full(n_cells, airline, dtype=object),
+        'origin': np.full(n_cells, origin, dtype=object),
+        'date': np.repeat(dates, n_slots)
+    })
+    PREDICTED_ROWS.inc(n_cells, endpoint='route_calendar')
+
+    # İptal ve gecikme modelleri tüm ızgara üzerinde birer kez çalışır
+    cancelled_proba = evaluate_model('cancelled', bundle.cancel_predictor, build_feature_matrix(columns, bundle))
+    factors, _ = compute_corrections(columns['month'], columns['dep_time'],
+                                     columns['distance'], columns['airline'])
+    cancel_prob = apply_corrections(cancelled_proba, factors)[:, 1]
+    delay_probs = evaluate_model('delay', bundle.delay_predictor, build_delay_feature_matrix(columns))
+    delay_pred = np.argmax(delay_probs, axis=1)
+
+    grid = []
+    for d in range(n_days):
+        cells = []
+        for k in range(n_slots):
+            i = d * n_slots + k
+            cells.append({
+                'departure_time': departure_times[k],
+                'cancelled': bool(cancel_prob[i] > CANCEL_THRESHOLD),
+                'cancelled_probability': float(cancel_prob[i]),
+                'delay_class': DELAY_CLASSES[int(delay_pred[i])],
+                'delay_probabilities': {
+                    DELAY_CLASSES[j]: float(prob)
+                    for j, prob in enumerate(delay_probs[i]) if j in DELAY_CLASSES
                 }
-            }
-        }
+            })
+        grid.append({'date': str(dates[d]), 'slots': cells})
+
+    return {
+        'route': {
+            'airline': airline,
+            'origin': origin,
+            'destination': data.get('destination'),
+            'distance': float(data.get('distance', 0))
+        },
+        'threshold_used': CANCEL_THRESHOLD,
+        'model_version': bundle.version,
+        'calendar': grid
+    }
 
-        # İptal kodu tahmini
-        if cancelled_pred == 1:
-            code_pred = int(model_code.predict([features_scaled])[0])
-            code_probs = model_code.predict_proba([features_scaled])[0]
-            result['predictions']['cancellation_code'] = CANCELLATION_CODES[code_pred]
-            result['predictions']['cancellation_code_probabilities'] = {}
-            for i, prob in enumerate(code_probs):
-                if i in CANCELLATION_CODES:
-                    result['predictions']['cancellation_code_probabilities'][CANCELLATION_CODES[i]] = float(prob)
-        else:
-            # İptal olmayan uçuşlar için gecikme tahmini
-            delay_features = prepare_delay_features(data)
-            if delay_features is None:
-                return jsonify({'error': 'Gecikme özellik hazırlama hatası'}), 400
-                
-            delay_pred = int(model_delay.predict([delay_features])[0])
-            delay_probs = model_delay.predict_proba([delay_features])[0]
-            
-            result['predictions']['delay'] = {
-                'delay_class': DELAY_CLASSES[delay_pred],
-                'delay_probabilities': {}
-            }
-            
-            for i, prob in enumerate(delay_probs):
-                if i in DELAY_CLASSES:
-                    result['predictions']['delay']['delay_probabilities'][DELAY_CLASSES[i]] = float(prob)
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def count_request(response):
+    """İstek sayacını, hata sayacını ve uç nokta süre histogramını günceller"""
+    endpoint = request.endpoint or 'unknown'
+    HTTP_REQUESTS.inc(endpoint=endpoint, status=str(response.status_code))
+    if response.status_code >= 400:
+        HTTP_ERRORS.inc(endpoint=endpoint)
+    started = g.get('request_started')
+    if started is not None:
+        HTTP_LATENCY.record((endpoint,), time.perf_counter() - started)
+    return response
 
-        return jsonify(result)
+@app.route('/predict', methods=['POST'])
+def predict():
+    """Hızlı düzeltme ile tahmin fonksiyonu"""
+    try:
+        data = request.json
+        log_event(logger, logging.DEBUG, 'Gelen istek verisi', sample_rate=LOG_SAMPLE_RATE, payload=data)
+
+        bundle = get_bundle()
+        if bundle is None:
+            return jsonify({'error': 'Modeller yüklenemedi'}), 500
+
+        # İstek bir kez ayrıştırılır; önbellek anahtarı, özellikler ve düzeltmeler aynı değerleri kullanır
+        flight = parse_request(data)
+        if flight is None:
+            return jsonify({'error': 'Özellik hazırlama hatası'}), 400
+
+        if result_cache is None:
+            result, status = run_prediction(flight, bundle)
+        else:
+            (result, status), computed = result_cache.get_or_compute(
+                prediction_cache_key(flight, bundle), lambda: run_prediction(flight, bundle),
+                should_store=lambda value: value[1] == 200)
+            if not computed and status == 200:
+                # Önbellekten gelen sonuç için bu istekte model değerlendirilmedi
+                result = dict(result, model_evaluations=0)
+
+        started = time.perf_counter()
+        response = jsonify(result)
+        stage_timer.lap('jsonify', started)
+        return response, status
 
     except Exception as e:
         traceback_str = traceback.format_exc()
-        print(f"Hata: {str(e)}\nStack trace: {traceback_str}")
+        log_event(logger, logging.ERROR, 'İstek hatası', endpoint=request.endpoint,
+                  error=str(e), traceback=traceback_str)
         return jsonify({
             'error': f"Tahmin hatası: {str(e)}",
             'details': traceback_str
         }), 400
         
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    """Birden fazla uçuş için tek seferde (vektörel) tahmin yapar"""
+    try:
+        data = request.json
+        records = data.get('flights') if isinstance(data, dict) else data
+
+        if not isinstance(records, list) or not records:
+            return jsonify({'error': "'flights' listesi gerekli"}), 400
+        if len(records) > MAX_BATCH_SIZE:
+            return jsonify({'error': f"En fazla {MAX_BATCH_SIZE} uçuş gönderilebilir"}), 400
+
+        bundle = get_bundle()
+        if bundle is None:
+            return jsonify({'error': 'Modeller yüklenemedi'}), 500
+
+        results = predict_flights(records, bundle)
+        started = time.perf_counter()
+        response = jsonify({'results': results, 'count': len(results), 'model_version': bundle.version})
+        stage_timer.lap('jsonify', started)
+        return response
+
+    except Exception as e:
+        traceback_str = traceback.format_exc()
+        log_event(logger, logging.ERROR, 'İstek hatası', endpoint=request.endpoint,
+                  error=str(e), traceback=traceback_str)
+        return jsonify({
+            'error': f"Toplu tahmin hatası: {str(e)}",
+            'details': traceback_str
+        }), 400
+
+@app.route('/route_calendar', methods=['POST'])
+def route_calendar():
+    """Bir rotayı tarih aralığı ve kalkış saatleri ızgarasında tek çağrıda skorlar"""
+    try:
+        data = request.json
+
+        bundle = get_bundle()
+        if bundle is None:
+            return jsonify({'error': 'Modeller yüklenemedi'}), 500
+
+        try:
+            result = score_route_grid(data, bundle)
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({'error': f"Geçersiz takvim isteği: {str(e)}"}), 400
+
+        return jsonify(result)
+
+    except Exception as e:
+        traceback_str = traceback.format_exc()
+        log_event(logger, logging.ERROR, 'İstek hatası', endpoint=request.endpoint,
+                  error=str(e), traceback=traceback_str)
+        return jsonify({
+            'error': f"Takvim tahmin hatası: {str(e)}",
+            'details': traceback_str
+        }), 400
+
 @app.route('/airlines', methods=['GET'])
 def get_airlines():
     """Desteklenen havayollarını döndürür"""
-    if airline_encoder is None:
-        load_models()
-
-    if airline_encoder is not None:
-        return jsonify({'airlines': list(airline_encoder.classes_)})
+    bundle = get_bundle()
+    if bundle is not None:
+        return jsonify({'airlines': list(bundle.airline_encoder.classes_)})
     else:
         return jsonify({'error': 'Havayolu kodlayıcı yüklenemedi'}), 500
 
 @app.route('/cities', methods=['GET'])
 def get_cities():
     """Desteklenen şehirleri döndürür"""
-    if city_encoder is None:
-        load_models()
-
-    if city_encoder is not None:
-        return jsonify({'cities': list(city_encoder.classes_)})
+    bundle = get_bundle()
+    if bundle is not None:
+        return jsonify({'cities': list(bundle.city_encoder.classes_)})
     else:
         return jsonify({'error': 'Şehir kodlayıcı yüklenemedi'}), 500
 
+@app.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Tahmin sonucu önbelleğinin boyut ve hit/miss/eviction sayaçlarını döndürür"""
+    if result_cache is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(result_cache.stats(), enabled=True))
+
+@app.route('/batching/stats', methods=['GET'])
+def get_batching_stats():
+    """/predict mikro toplu iş ayarlarını ve toplu iş boyutu / kuyruk bekleme histogramlarını döndürür"""
+    if micro_batcher is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(micro_batcher.stats(), enabled=True))
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Sayaçları ve aşama/istek süre histogramlarını Prometheus metin biçiminde döndürür
+
+    Pre-fork modunda her worker kendi metriklerini raporlar.
+    """
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/health', methods=['GET'])
+def health():
+    """Modellerin yüklü olup olmadığını, model sürümünü ve yükleme süre dökümünü döndürür"""
+    bundle = model_bundle
+    ready = bundle is not None
+    return jsonify({
+        'status': 'ok' if ready else 'loading',
+        'models_loaded': ready,
+        'model_version': bundle.version if ready else None,
+        'load_report': bundle.load_report if ready else {},
+        'reload': reload_status,
+        'worker': dict(worker_info, predicted_rows=int(sum(value for _, value in PREDICTED_ROWS.snapshot())))
+    }), 200 if ready else 503
+
+def admin_authorized():
+    """Yönetim isteğinin ADMIN_TOKEN belirteciyle geldiğini doğrular; belirteç tanımlı değilse reddeder"""
+    if not ADMIN_TOKEN:
+        return False
+    token = request.headers.get('X-Admin-Token', '')
+    return hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8'))
+
+def allowed_model_dir(model_dir):
+    """Model klasörünün (sembolik bağlar çözülerek) ADMIN_MODEL_ROOT altında olup olmadığını döndürür"""
+    real_path = os.path.realpath(model_dir)
+    return os.path.commonpath([real_path, ADMIN_MODEL_ROOT]) == ADMIN_MODEL_ROOT
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """Yeni model paketini arka planda yükleyip hazır olunca etkinleştirir"""
+    if not admin_authorized():
+        return jsonify({'error': 'Yetkisiz istek'}), 403
+
+    data = request.get_json(silent=True) or {}
+    model_dir = data.get('model_dir')
+    if model_dir is not None:
+        if not isinstance(model_dir, str):
+            return jsonify({'error': 'model_dir metin olmalı'}), 400
+        if not allowed_model_dir(model_dir):
+            return jsonify({'error': 'Model klasörü izin verilen kökün dışında'}), 403
+        if not os.path.isdir(model_dir):
+            return jsonify({'error': f"Model klasörü bulunamadı: {model_dir}"}), 400
+
+    if worker_info['master_pid'] is not None:
+        # Pre-fork modunda modeller master'da yüklenir: SIGHUP ile master yeni paketi
+        # yükler, yeni worker'ları başlatır ve eskileri isteklerini bitirince kapatır
+        if model_dir is not None:
+            return jsonify({'error': 'Pre-fork modunda model klasörü MODEL_DIR ile belirlenir'}), 400
+        os.kill(worker_info['master_pid'], signal.SIGHUP)
+        return jsonify({'reload': {'state': 'signalled', 'master_pid': worker_info['master_pid']},
+                        'model_version': model_bundle.version if model_bundle else None}), 202
+
+    if not reload_in_background(model_dir):
+        return jsonify({'error': 'Yeniden yükleme zaten sürüyor', 'reload': reload_status}), 409
+
+    return jsonify({'reload': reload_status,
+                    'model_version': model_bundle.version if model_bundle else None}), 202
+
+@app.route('/admin/model', methods=['GET'])
+def admin_model():
+    """Etkin model paketinin sürüm/config özetini ve son yeniden yükleme durumunu döndürür"""
+    if not admin_authorized():
+        return jsonify({'error': 'Yetkisiz istek'}), 403
+
+    bundle = model_bundle
+    return jsonify({
+        'model': bundle.describe() if bundle is not None else None,
+        'reload': reload_status
+    })
+
 @app.route('/test', methods=['GET'])
 def test():
     """API'nin çalıştığını test eder"""
     return jsonify({'status': 'ok', 'message': 'API çalışıyor'})
 
 if __name__ == '__main__':
-    # Modelleri yükle
+    # Modelleri sunucu açılmadan önce yükle (ilk istekte tembel yükleme olmasın)
     if not load_models():
-        print("Modeller yüklenemedi! Uygulama kapatılıyor...")
+        log_event(logger, logging.CRITICAL, 'Modeller yüklenemedi! Uygulama kapatılıyor...')
         exit(1)
     
     # Sunucuyu başlat
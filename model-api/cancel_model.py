@@ -4,12 +4,15 @@ from sklearn.model_selection import train_test_split, cross_val_score, Stratifie
 from xgboost import XGBClassifier
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.impute import SimpleImputer
-from imblearn.over_sampling import SMOTE
 from sklearn.metrics import classification_report, roc_auc_score, accuracy_score, confusion_matrix
 from sklearn.metrics import precision_recall_curve, roc_curve, auc
 from google.colab import drive
 import os
 import joblib
+from flight_features import (CANCEL_FEATURES, airline_reliability_table, city_codes, derived_features,
+                             route_popularity_table, save_lookup_tables)
+from flight_ingest import load_training_frame
+from oversampling import sample_weights, smote_resample
 import matplotlib.pyplot as plt
 import seaborn as sns
 
@@ -17,83 +20,32 @@ import seaborn as sns
 drive.mount('/content/drive')
 os.chdir('/content/drive/My Drive/Bitirme')
 
-# Veri setini okuma
-df = pd.read_csv("flights_Cancel_final.csv")
+# Veri setini okuma: ilk çalıştırmada CSV, yalnızca kullanılan sütunları küçük tiplerle
+# içeren Parquet kopyasına dönüştürülür; sonraki çalıştırmalar doğrudan onu okur
+df = load_training_frame("flights_Cancel_final.csv", 'cancel')
 
-# Tarih işleme - YEAR'ın etkisini azaltmak için normalizasyon
-df['FL_DATE'] = pd.to_datetime(df['FL_DATE'], format='%Y-%m-%d')
+# Tarih işleme - YEAR'ın etkisini azaltmak için normalizasyon (FL_DATE Parquet'te tarih tipinde)
 min_year = df['FL_DATE'].dt.year.min()
 max_year = df['FL_DATE'].dt.year.max()
 
-df['YEAR_NORMALIZED'] = (df['FL_DATE'].dt.year - min_year) / (max_year - min_year)
 df['MONTH'] = df['FL_DATE'].dt.month
 df['DAY'] = df['FL_DATE'].dt.day
 df['DAY_OF_WEEK'] = df['FL_DATE'].dt.dayofweek
 
-# Mevsimsel özellikler - daha detaylı
-df['SEASON'] = df['MONTH'].map({12: 0, 1: 0, 2: 0,  # Kış
-                                3: 1, 4: 1, 5: 1,   # İlkbahar
-                                6: 2, 7: 2, 8: 2,   # Yaz
-                                9: 3, 10: 3, 11: 3}) # Sonbahar
-
-# Trigonometric features for cyclical data
-df['MONTH_SIN'] = np.sin(2 * np.pi * df['MONTH'] / 12)
-df['MONTH_COS'] = np.cos(2 * np.pi * df['MONTH'] / 12)
-df['DAY_SIN'] = np.sin(2 * np.pi * df['DAY'] / 31)
-df['DAY_COS'] = np.cos(2 * np.pi * df['DAY'] / 31)
-
-# Hava durumu composite score - daha sofistike
-def weather_composite_score(row):
-    score = 0
-
-    # Yağış etkisi
-    if row['prcp'] > 0:
-        score += min(row['prcp'] / 10, 3)  # Max 3 puan
-
-    # Kar etkisi (daha ağır)
-    if row['snow'] > 0:
-        score += min(row['snow'] / 5, 4)   # Max 4 puan
-
-    # Rüzgar etkisi
-    if row['wspd'] > 10:
-        score += min((row['wspd'] - 10) / 10, 2)  # Max 2 puan
-
-    # Sıcaklık ekstremleği
-    if row['tmax'] > 35 or row['tmin'] < -10:
-        score += 1
-
-    # Basınç etkisi
-    if row['pres'] < 1000 or row['pres'] > 1025:
-        score += 0.5
-
-    return min(score, 10)  # Maximum 10
-
-df['WEATHER_COMPOSITE'] = df.apply(weather_composite_score, axis=1)
-
-# Uçuş zamanı kategorisi - daha detaylı
-def categorize_time_detailed(time):
-    if pd.isna(time):
-        return 0
-    hour = int(time // 100)
-    if 5 <= hour < 8:
-        return 1   # Erken sabah (yoğun)
-    elif 8 <= hour < 12:
-        return 2   # Sabah (orta)
-    elif 12 <= hour < 15:
-        return 3   # Öğlen (düşük)
-    elif 15 <= hour < 19:
-        return 4   # Öğleden sonra (yoğun)
-    elif 19 <= hour < 22:
-        return 5   # Akşam (orta)
-    else:
-        return 6   # Gece (düşük)
-
-df['DEP_TIME_DETAILED'] = df['CRS_DEP_TIME'].apply(categorize_time_detailed)
-
-# Mesafe kategorisi - daha dengeli
-df['DISTANCE_CATEGORY'] = pd.cut(df['DISTANCE'],
-                                bins=[0, 400, 800, 1500, 3000, 6000],
-                                labels=[0, 1, 2, 3, 4])
+# Türetilmiş özellikler (mevsim, döngüsel kodlamalar, hava durumu skoru, zaman ve mesafe
+# kategorileri) API ile ortak, vektörel flight_features modülünden hesaplanır
+derived = derived_features(
+    year=df['FL_DATE'].dt.year.to_numpy(),
+    month=df['MONTH'].to_numpy(),
+    day=df['DAY'].to_numpy(),
+    dep_time=df['CRS_DEP_TIME'].to_numpy(dtype=float),
+    distance=df['DISTANCE'].to_numpy(dtype=float),
+    weather={name: df[name].to_numpy(dtype=float) for name in ['prcp', 'snow', 'wspd', 'tmax', 'tmin', 'pres']},
+    min_year=min_year,
+    max_year=max_year
+)
+for name, values in derived.items():
+    df[name] = values
 
 # Label Encoding
 label_enc_airline = LabelEncoder()
@@ -106,21 +58,22 @@ df['ORG'] = label_enc_origin.fit_transform(df['ORIGIN_CITY_NAME'])
 df['DST'] = label_enc_dest.fit_transform(df['DEST_CITY_NAME'])
 
 # İptal kodları için özel işlem
-df['CANCELLATION_CODE_FILLED'] = df['CANCELLATION_CODE'].fillna('N')  # N = Not Cancelled
+df['CANCELLATION_CODE_FILLED'] = df['CANCELLATION_CODE'].cat.add_categories('N').fillna('N')  # N = Not Cancelled
 df['CANCELLATION_CODE_ENCODED'] = label_enc_cancel_code.fit_transform(df['CANCELLATION_CODE_FILLED'])
 
-# Route popularity (may affect cancellation)
-route_counts = df.groupby(['ORG', 'DST']).size()
-df['ROUTE_POPULARITY'] = df.apply(lambda x: route_counts.get((x['ORG'], x['DST']), 0), axis=1)
-df['ROUTE_POPULARITY_LOG'] = np.log1p(df['ROUTE_POPULARITY'])
-
-# Airline reliability score
-airline_cancel_rate = df.groupby('AIR')['CANCELLED'].mean()
-df['AIRLINE_RELIABILITY'] = df['AIR'].map(airline_cancel_rate)
+# Route popularity (may affect cancellation) ve airline reliability score:
+# kodlanmış ORG/DST ve AIR ile indekslenen float32 tablolar; API aynı tabloları kullanır.
+# API varış şehrini de label_enc_origin ile kodladığı için rota tablosunun iki ekseni de bu kodlayıcıdır
+route_dst = city_codes(df['DEST_CITY_NAME'].to_numpy(dtype=object), label_enc_origin.classes_)
+route_popularity = route_popularity_table(df['ORG'].to_numpy(), route_dst, len(label_enc_origin.classes_))
+airline_reliability = airline_reliability_table(df['AIR'].to_numpy(), df['CANCELLED'].to_numpy(),
+                                                len(label_enc_airline.classes_))
+df['ROUTE_POPULARITY_LOG'] = route_popularity[df['ORG'].to_numpy(), route_dst].astype(float)
+df['AIRLINE_RELIABILITY'] = airline_reliability[df['AIR'].to_numpy()].astype(float)
 
 # Gereksiz sütunları silme
 columns_to_drop = ['AIRLINE_CODE', 'ORIGIN_CITY_NAME', 'DEST_CITY_NAME', 'FL_DATE',
-                   'ROUTE_POPULARITY', 'CANCELLATION_CODE', 'CANCELLATION_CODE_FILLED']
+                   'CANCELLATION_CODE', 'CANCELLATION_CODE_FILLED']
 df.drop(columns_to_drop, axis=1, inplace=True)
 
 print("Class Dağılımı:")
@@ -133,7 +86,8 @@ print(df['CANCELLATION_CODE_ENCODED'].value_counts())
 # Özellikleri ve hedefleri hazırlama
 y_cancelled = df['CANCELLED']
 y_cancel_code = df['CANCELLATION_CODE_ENCODED']
-X = df.drop(["CANCELLED", "CANCELLATION_CODE_ENCODED", "DEP_TIME"], axis=1)
+# Sütun sırası API'nin kullandığı CANCEL_FEATURES ile aynıdır
+X = df[CANCEL_FEATURES]
 
 print(f"Toplam özellik sayısı: {X.shape[1]}")
 print("Özellikler:", list(X.columns))
@@ -162,9 +116,20 @@ print("\n" + "="*50)
 print("İPTAL MODELİ EĞİTİMİ")
 print("="*50)
 
+# Azınlık sınıfı dengeleme: 'smote' imblearn SMOTE ile aynı satırları üretir (komşu araması yalnızca
+# örneklenen azınlık satırlarında, çıktı önceden ayrılmış tek dizide); 'weights' veriyi çoğaltmadan
+# aynı sınıf oranını satır ağırlıklarıyla verir
+OVERSAMPLING = 'smote'
+
 # Daha konservatif SMOTE
-smote = SMOTE(sampling_strategy=0.15, random_state=42, k_neighbors=3)
-X_train_resampled, y_cancelled_train_resampled = smote.fit_resample(X_train_scaled, y_cancelled_train)
+if OVERSAMPLING == 'smote':
+    X_train_resampled, y_cancelled_train_resampled = smote_resample(
+        X_train_scaled, y_cancelled_train, sampling_strategy=0.15, k_neighbors=3, random_state=42
+    )
+    train_weights = None
+else:
+    X_train_resampled, y_cancelled_train_resampled = X_train_scaled, y_cancelled_train
+    train_weights = sample_weights(y_cancelled_train, sampling_strategy=0.15)
 
 print(f"Resampling sonrası dağılım:")
 print(pd.Series(y_cancelled_train_resampled).value_counts())
@@ -188,7 +153,7 @@ model_cancelled = XGBClassifier(
 )
 
 # Model eğitimi
-model_cancelled.fit(X_train_resampled, y_cancelled_train_resampled)
+model_cancelled.fit(X_train_resampled, y_cancelled_train_resampled, sample_weight=train_weights)
 
 # Tahminler
 y_pred_cancelled_proba = model_cancelled.predict_proba(X_test_scaled)
@@ -424,6 +389,9 @@ model_config = {
 }
 joblib.dump(model_config, 'model_config.joblib')
 
+# Rota popülerliği ve havayolu güvenilirliği tabloları (API bellek eşlemeli okur)
+save_lookup_tables('.', route_popularity, airline_reliability)
+
 print("Kaydedilen dosyalar:")
 saved_files = [
     'model_cancelled.joblib',
@@ -433,7 +401,9 @@ saved_files = [
     'label_enc_origin.joblib',
     'label_enc_dest.joblib',
     'label_enc_cancel_code.joblib',
-    'model_config.joblib'
+    'model_config.joblib',
+    'route_popularity.npy',
+    'airline_reliability.npy'
 ]
 
 if model_cancel_code is not None:
@@ -5,13 +5,15 @@ from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 from xgboost import XGBClassifier
-from imblearn.over_sampling import SMOTE
 from imblearn.pipeline import Pipeline as ImbPipeline
 from google.colab import drive
 import os
 import warnings
 import matplotlib.pyplot as plt
 import joblib
+from flight_features import delay_class
+from flight_ingest import load_training_frame
+from oversampling import sample_weights, smote_resample
 warnings.filterwarnings('ignore')
 
 # Google Drive'ı bağlama
@@ -20,14 +22,11 @@ drive.mount('/content/drive')
 # Çalışma dizinini ayarlama
 os.chdir('/content/drive/My Drive/Bitirme')
 
-df = pd.read_csv(r"flights_Delay_final.csv")
+# Parquet kopyasından (ilk çalıştırmada CSV'den oluşturulur) yalnızca iptal edilmemiş uçuşları okuma
+df = load_training_frame(r"flights_Delay_final.csv", 'delay', filters=[('CANCELLED', '==', 0)])
 df.head(5)
 
-# İptal edilmiş uçuşları kaldırma
-df = df[df['CANCELLED'] == 0]
-
-# Tarih sütununu datetime'a çevirme ve yıl, ay, gün olarak ayırma
-df['FL_DATE'] = pd.to_datetime(df['FL_DATE'], format='%Y-%m-%d')
+# Tarih sütununu yıl, ay, gün olarak ayırma (FL_DATE Parquet'te tarih tipinde)
 df['YEAR'] = df['FL_DATE'].dt.year
 df['MONTH'] = df['FL_DATE'].dt.month
 df['DAY'] = df['FL_DATE'].dt.day
@@ -39,7 +38,8 @@ df['ORG'] = label_enc.fit_transform(df['ORIGIN_CITY'])
 df['DST'] = label_enc.fit_transform(df['DEST_CITY'])
 
 # Gereksiz sütunları silme
-df.drop(['AIRLINE_CODE', 'ORIGIN_CITY', 'DEST_CITY', 'CANCELLED', 'FL_DATE', 'CANCELLATION_CODE', "CRS_ARR_TIME"], axis=1, inplace=True)
+# (CANCELLATION_CODE ve CRS_ARR_TIME DELAY_SCHEMA'da olmadığı için hiç okunmaz)
+df.drop(['AIRLINE_CODE', 'ORIGIN_CITY', 'DEST_CITY', 'CANCELLED', 'FL_DATE'], axis=1, inplace=True)
 
 df.head()
 
@@ -54,9 +54,7 @@ scaler = StandardScaler()
 df[df.columns] = scaler.fit_transform(df[df.columns])
 
 # Gecikme sürelerini sınıflara ayırma (Hedef değişken oluşturma)
-df['DELAY_CLASS'] = df['DEP_DELAY'].apply(lambda x: 0 if x <= 0 else
-                                         (1 if x <= 15 else
-                                          (2 if x <= 30 else 3)))
+df['DELAY_CLASS'] = delay_class(df['DEP_DELAY'].to_numpy())
 
 # Sınıf dağılımını kontrol etme
 print("\nSınıf dağılımı:")
@@ -69,10 +67,16 @@ X = df.drop(['DELAY_CLASS', 'DEP_DELAY', "DEP_TIME"], axis=1)
 # Verileri bölme
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-# Veri Dengesizliğini Giderme (SMOTE)
-print("Veri SMOTE ile Dengesizlik Gideriliyor...")
-smote = SMOTE(random_state=42, k_neighbors=5)
-X_train, y_train = smote.fit_resample(X_train, y_train)
+# Veri Dengesizliğini Giderme: 'smote' imblearn SMOTE ile aynı satırları üretir,
+# 'weights' veriyi çoğaltmadan sınıf ağırlıkları kullanır
+OVERSAMPLING = 'smote'
+fit_params = {}
+if OVERSAMPLING == 'smote':
+    print("Veri SMOTE ile Dengesizlik Gideriliyor...")
+    X_train, y_train = smote_resample(X_train, y_train, k_neighbors=5, random_state=42)
+else:
+    print("Dengesizlik sınıf ağırlıklarıyla gideriliyor...")
+    fit_params = {'classifier__sample_weight': sample_weights(y_train)}
 
 df["DELAY_CLASS"].value_counts()
 
@@ -96,7 +100,7 @@ pipeline = ImbPipeline([
 
 # Modeli eğitme
 print("\nModel eğitimi başlıyor...")
-pipeline.fit(X_train, y_train)
+pipeline.fit(X_train, y_train, **fit_params)
 print("Model eğitimi tamamlandı!")
 
 # Model performansını değerlendirme
@@ -138,7 +142,7 @@ plt.title("Confusion Matrix")
 plt.show()
 
 # Eğitim ve test doğruluğunu karşılaştırma
-pipeline.fit(X_train, y_train)
+pipeline.fit(X_train, y_train, **fit_params)
 
 y_train_pred_delay = pipeline.predict(X_train)
 train_accuracy_delay = accuracy_score(y_train, y_train_pred_delay)
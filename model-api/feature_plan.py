@@ -0,0 +1,147 @@
+from bisect import bisect_left, bisect_right
+import numpy as np
+from flight_features import (CANCEL_FEATURES, DELAY_FEATURES, DEP_HOUR_BINS, DEP_TIME_CATEGORIES, DISTANCE_BINS,
+                             cyclic, season, weather_composite_score, year_normalized)
+from weather_store import WEATHER_FIELDS
+
+# Yalnızca (ay, gün) çiftine bağlı iptal özellikleri; 12 x 31 tablodan okunur
+DATE_FEATURES = ['MONTH', 'DAY', 'SEASON', 'MONTH_SIN', 'MONTH_COS', 'DAY_SIN', 'DAY_COS']
+
+# Hava durumu satırı: WEATHER_FIELDS ve bunlardan türetilen WEATHER_COMPOSITE
+WEATHER_ROW_FEATURES = WEATHER_FIELDS + ['WEATHER_COMPOSITE']
+
+# İstek başına yazılan iptal özellikleri (cancel_vector'daki değer sırası)
+CANCEL_DYNAMIC_FEATURES = [
+    'CRS_DEP_TIME', 'CRS_ARR_TIME', 'DISTANCE', 'YEAR_NORMALIZED', 'DAY_OF_WEEK',
+    'DEP_TIME_DETAILED', 'DISTANCE_CATEGORY', 'AIR', 'ORG', 'DST',
+    'ROUTE_POPULARITY_LOG', 'AIRLINE_RELIABILITY'
+]
+
+# İstek başına yazılan gecikme özellikleri (delay_vector'daki değer sırası)
+DELAY_DYNAMIC_FEATURES = ['YEAR', 'MONTH', 'DAY', 'AIR', 'ORG', 'DST', 'CRS_DEP_TIME', 'DISTANCE',
+                          'DEP_TIME', 'CRS_ARR_TIME']
+
+
+def slots(order, names):
+    """Özellik adlarının vektördeki konumları"""
+    position = {name: i for i, name in enumerate(order)}
+    return np.array([position[name] for name in names], dtype=np.intp)
+
+
+def date_table():
+    """(ay, gün) -> DATE_FEATURES tablosu, (13, 32, 7); 0. satır/sütun kullanılmaz
+
+    Değerler istek yolundaki fonksiyonlarla tek tek hesaplanır, böylece
+    derived_features'ın ürettiği değerlerle bit düzeyinde aynıdır.
+    """
+    table = np.full((13, 32, len(DATE_FEATURES)), np.nan)
+    for month in range(1, 13):
+        month_sin, month_cos = cyclic(month, 12)
+        for day in range(1, 32):
+            day_sin, day_cos = cyclic(day, 31)
+            table[month, day] = [month, day, season(month), month_sin, month_cos, day_sin, day_cos]
+    return table
+
+
+def weather_row(weather):
+    """Hava durumu eşlemesinin WEATHER_ROW_FEATURES sırasındaki değerleri"""
+    row = np.array([weather[key] for key in WEATHER_FIELDS] + [0.0], dtype=float)
+    row[-1] = weather_composite_score(weather)
+    return row
+
+
+def departure_category(dep_time):
+    """categorize_time_detailed'ın tek değer (tamsayı HHMM) için karşılığı"""
+    return DEP_TIME_CATEGORIES[bisect_right(DEP_HOUR_BINS, dep_time // 100)]
+
+
+def distance_category(distance):
+    """categorize_distance'ın tek değer için karşılığı (aralık dışı ve NaN için NaN)"""
+    index = bisect_left(DISTANCE_BINS, distance) - 1
+    return index if 0 <= index < len(DISTANCE_BINS) - 1 else np.nan
+
+
+class FeaturePlan:
+    """Model yüklenirken kurulan, tek istek için ham özellik vektörlerini üreten plan
+
+    Yalnızca tarihe bağlı özellikler (12 ay x 31 gün) ve mevsimsel hava durumu
+    profilleri (hava durumu sütunları ve WEATHER_COMPOSITE) yüklemede bir kez
+    hesaplanır. İstekte profilin hazır vektörü kopyalanır, tarih bloğu tablodan
+    okunur ve yalnızca isteğe bağlı konumlar doldurulur; özellik sözlüğü ve
+    sıralama yapılmaz. Vektörler prepare_features/prepare_delay_features'ın
+    önceki çıktısıyla aynıdır (impute/ölçekleme tahminci içinde kalır).
+    """
+
+    def __init__(self, min_year, max_year, route_popularity_log, airline_reliability_rate, seasonal_weather=None):
+        self.min_year = min_year
+        self.max_year = max_year
+        self.route_popularity_log = route_popularity_log
+        self.airline_reliability_rate = airline_reliability_rate
+
+        self.date_table = date_table()
+        self.cancel_date_slots = slots(CANCEL_FEATURES, DATE_FEATURES)
+        self.cancel_weather_slots = slots(CANCEL_FEATURES, WEATHER_ROW_FEATURES)
+        self.cancel_dynamic_slots = slots(CANCEL_FEATURES, CANCEL_DYNAMIC_FEATURES)
+        self.delay_weather_slots = slots(DELAY_FEATURES, WEATHER_FIELDS)
+        self.delay_dynamic_slots = slots(DELAY_FEATURES, DELAY_DYNAMIC_FEATURES)
+
+        # Ay numarasına göre profil şablonları (aynı profili paylaşan aylar aynı şablonu kullanır)
+        self.cancel_templates = [None] * 13
+        self.delay_templates = [None] * 13
+        templates = {}
+        for month, weather in enumerate(seasonal_weather or []):
+            if weather is None:
+                continue
+            if id(weather) not in templates:
+                row = weather_row(weather)
+                cancel = np.zeros(len(CANCEL_FEATURES))
+                cancel[self.cancel_weather_slots] = row
+                delay = np.zeros(len(DELAY_FEATURES))
+                delay[self.delay_weather_slots] = row[:len(WEATHER_FIELDS)]
+                templates[id(weather)] = (cancel, delay)
+            self.cancel_templates[month], self.delay_templates[month] = templates[id(weather)]
+
+    def seasonal_template(self, templates, month):
+        template = templates[month]
+        if template is None:
+            raise ValueError(f"{month}. ay için mevsimsel hava durumu profili yok")
+        return template.copy()
+
+    def cancel_vector(self, flight):
+        """İptal modelleri için CANCEL_FEATURES sırasında ham özellik vektörü
+
+        `flight` kodları ve hava durumu çözümlenmiş bir FlightRequest'tir;
+        kayıtlı hava durumu yoksa (None) ayın mevsimsel profili kullanılır.
+        """
+        flight_date = flight.flight_date
+        month = flight_date.month
+        if flight.weather is None:
+            vector = self.seasonal_template(self.cancel_templates, month)
+        else:
+            vector = np.zeros(len(CANCEL_FEATURES))
+            vector[self.cancel_weather_slots] = weather_row(flight.weather)
+        vector[self.cancel_date_slots] = self.date_table[month, flight_date.day]
+        vector[self.cancel_dynamic_slots] = (
+            flight.dep_time, flight.arr_time, flight.distance,
+            year_normalized(flight_date.year, self.min_year, self.max_year),
+            flight_date.weekday(), departure_category(flight.dep_time), distance_category(flight.distance),
+            flight.airline_code, flight.origin_code, flight.dest_code,
+            self.route_popularity_log(flight.origin_code, flight.dest_code),
+            self.airline_reliability_rate(flight.airline_code)
+        )
+        return vector
+
+    def delay_vector(self, flight):
+        """Gecikme modeli için DELAY_FEATURES sırasında ham özellik vektörü"""
+        flight_date = flight.flight_date
+        if flight.weather is None:
+            vector = self.seasonal_template(self.delay_templates, flight_date.month)
+        else:
+            vector = np.zeros(len(DELAY_FEATURES))
+            vector[self.delay_weather_slots] = np.array([flight.weather[key] for key in WEATHER_FIELDS], dtype=float)
+        vector[self.delay_dynamic_slots] = (
+            flight_date.year, flight_date.month, flight_date.day,
+            flight.airline_code, flight.origin_code, flight.dest_code,
+            flight.dep_time, flight.distance, flight.dep_time, flight.arr_time
+        )
+        return vector
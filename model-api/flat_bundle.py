@@ -0,0 +1,204 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+from datetime import datetime
+import numpy as np
+from tree_engine import CompiledEnsemble
+
+# Derlenmiş modellerin ve ön işleme parametrelerinin tek dosyalık düz paketi (models klasöründe)
+FLAT_BUNDLE_FILE = 'model_bundle.bin'
+
+# Dosya düzeni: MAGIC | başlık uzunluğu (<Q) | JSON başlık | hizalanmış dizi bölümü
+MAGIC = b'FLTMODEL'
+FORMAT_VERSION = 1
+PREAMBLE = struct.Struct('<8sQ')
+
+# Her dizi bu sınıra hizalanır (önbellek satırı; dtype hizalamasını da sağlar)
+ALIGNMENT = 64
+
+# Paketteki tahminciler ve ModelBundle'daki karşılıkları
+MODELS = ('cancelled', 'cancel_code', 'delay')
+
+# CompiledEnsemble'ın dizileri, motorun hesapladığı tiplerde saklanır
+ENSEMBLE_ARRAYS = ('feature', 'threshold', 'left', 'right', 'default_left', 'value', 'roots', 'tree_group',
+                   'base_margin')
+
+
+class ArtifactParams:
+    """joblib artefaktının API'nin kullandığı özniteliklerini taşıyan salt okunur kayıt
+
+    İmputer için statistics_, scaler için mean_/scale_, encoder için classes_;
+    sklearn içe aktarılmadan paket doğrulaması, ısınma ve uç noktalar aynı
+    öznitelikleri okur.
+    """
+
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+def aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class ArrayWriter:
+    """Dizileri hizalı ofsetlere yerleştirip başlıkta kullanılacak referanslarını döndürür"""
+
+    def __init__(self):
+        self.arrays = []
+        self.size = 0
+
+    def add(self, array):
+        array = np.ascontiguousarray(array)
+        offset = aligned(self.size)
+        self.arrays.append((offset, array))
+        self.size = offset + array.nbytes
+        return {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+
+    def write(self, f):
+        position = 0
+        for offset, array in self.arrays:
+            f.write(b'\0' * (offset - position))
+            f.write(array.tobytes())
+            position = offset + array.nbytes
+
+
+def json_value(value):
+    """Config değerlerini JSON'a yazılabilir hale getirir"""
+    if isinstance(value, dict):
+        return {str(key): json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_value(item) for item in value]
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    return value
+
+
+def ensemble_header(ensemble, writer):
+    """Derlenmiş topluluğun dizilerini yazar, başlık kaydını döndürür"""
+    arrays = {name: getattr(ensemble, name) for name in ENSEMBLE_ARRAYS if name != 'tree_group'}
+    arrays['tree_group'] = np.argmax(ensemble.group_matrix, axis=1).astype(np.int64)
+    arrays['base_margin'] = np.asarray(ensemble.base_margin, dtype=np.float64)
+    return {
+        'objective': ensemble.objective,
+        'n_groups': int(ensemble.n_groups),
+        'max_depth': int(ensemble.max_depth),
+        'n_features': int(ensemble.n_features),
+        'arrays': {name: writer.add(array) for name, array in arrays.items()}
+    }
+
+
+def export_bundle(bundle, path):
+    """Derlenmiş motorla yüklenmiş ModelBundle'ı tek bir düz dosyaya yazar
+
+    Modeller (iptal, iptal kodu, gecikme) imputer/scaler'ı gömülü düğüm
+    dizileri olarak, imputer/scaler/encoder parametreleri ve rota/havayolu
+    tabloları ayrı diziler olarak yazılır. Yazma geçici dosyaya yapılır ve
+    sonunda yerine taşınır.
+    """
+    predictors = dict(zip(MODELS, (bundle.cancel_predictor, bundle.code_predictor, bundle.delay_predictor)))
+    for name, predictor in predictors.items():
+        if not isinstance(predictor, CompiledEnsemble):
+            raise ValueError(f"{name} modeli derlenmiş motora çevrilemedi; düz pakete yazılamaz")
+
+    writer = ArrayWriter()
+    header = {
+        'format_version': FORMAT_VERSION,
+        'version': bundle.version,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'config': json_value(bundle.config),
+        'models': {name: ensemble_header(predictor, writer) for name, predictor in predictors.items()},
+        'preprocessing': {
+            'imputer': {'statistics_': writer.add(np.asarray(bundle.imputer.statistics_, dtype=np.float64))},
+            'scaler': {'mean_': writer.add(np.asarray(bundle.scaler.mean_, dtype=np.float64)),
+                       'scale_': writer.add(np.asarray(bundle.scaler.scale_, dtype=np.float64))},
+            'imputer_delay': {'statistics_': writer.add(np.asarray(bundle.imputer_delay.statistics_, dtype=np.float64))},
+            'scaler_delay': {'mean_': writer.add(np.asarray(bundle.scaler_delay.mean_, dtype=np.float64)),
+                             'scale_': writer.add(np.asarray(bundle.scaler_delay.scale_, dtype=np.float64))}
+        },
+        'encoders': {
+            'airline_encoder': [str(label) for label in bundle.airline_encoder.classes_],
+            'city_encoder': [str(label) for label in bundle.city_encoder.classes_]
+        },
+        'lookup_tables': {
+            name: None if table is None else writer.add(np.asarray(table, dtype=np.float32))
+            for name, table in (('route_popularity', bundle.route_popularity),
+                                ('airline_reliability', bundle.airline_reliability))
+        }
+    }
+    header['data_bytes'] = writer.size
+    encoded = json.dumps(header, ensure_ascii=False).encode('utf-8')
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, len(encoded)))
+        f.write(encoded)
+        f.write(b'\0' * (aligned(PREAMBLE.size + len(encoded)) - PREAMBLE.size - len(encoded)))
+        writer.write(f)
+    os.replace(tmp_path, path)
+    return {'path': path, 'mb': round(os.path.getsize(path) / 2 ** 20, 3), 'arrays': len(writer.arrays)}
+
+
+def read_bundle(path):
+    """Düz paketi salt okunur bellek eşlemesiyle açar
+
+    (başlık, artefaktlar) döndürür. Diziler eşlemenin üzerindeki düz ndarray
+    görünümleridir (kopya yok); aynı dosyayı açan tüm süreçler sayfa
+    önbelleğindeki tek kopyayı paylaşır.
+    """
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mapped) < PREAMBLE.size:
+        raise ValueError(f"{path} düz model paketi değil")
+    magic, header_size = PREAMBLE.unpack_from(mapped)
+    if magic != MAGIC:
+        raise ValueError(f"{path} düz model paketi değil")
+    header = json.loads(mapped[PREAMBLE.size:PREAMBLE.size + header_size].decode('utf-8'))
+    if header.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Desteklenmeyen düz paket sürümü: {header.get('format_version')}")
+    data_offset = aligned(PREAMBLE.size + header_size)
+    if len(mapped) < data_offset + header['data_bytes']:
+        raise ValueError(f"{path} eksik yazılmış (beklenen {data_offset + header['data_bytes']} bayt)")
+
+    def array(reference):
+        shape = tuple(reference['shape'])
+        return np.frombuffer(mapped, dtype=np.dtype(reference['dtype']), count=int(np.prod(shape)),
+                             offset=data_offset + reference['offset']).reshape(shape)
+
+    artifacts = {}
+    for name, model in header['models'].items():
+        arrays = {key: array(reference) for key, reference in model['arrays'].items()}
+        artifacts[name] = CompiledEnsemble(
+            n_groups=model['n_groups'], objective=model['objective'], max_depth=model['max_depth'],
+            n_features=model['n_features'], **arrays)
+    for name, params in header['preprocessing'].items():
+        artifacts[name] = ArtifactParams(**{key: array(reference) for key, reference in params.items()})
+    for name, classes in header['encoders'].items():
+        artifacts[name] = ArtifactParams(classes_=np.array(classes))
+    for name, reference in header['lookup_tables'].items():
+        artifacts[name] = None if reference is None else array(reference)
+    return header, artifacts
+
+
+def main():
+    """joblib artefaktlarını derleyip düz model paketine yazar"""
+    from flight_features import CANCEL_FEATURES
+    from model_bundle import artifact_paths, load_bundle
+
+    parser = argparse.ArgumentParser(description="Modelleri bellek eşlemeli düz pakete dönüştürür")
+    parser.add_argument('model_dir', nargs='?', default='models', help="joblib artefaktlarının klasörü")
+    parser.add_argument('--output', help=f"Paket dosyası (varsayılan: <model_dir>/{FLAT_BUNDLE_FILE})")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    bundle = load_bundle(artifact_paths(args.model_dir), CANCEL_FEATURES, 'compiled', model_format='joblib')
+    report = export_bundle(bundle, args.output or os.path.join(args.model_dir, FLAT_BUNDLE_FILE))
+    report.update(version=bundle.version, seconds=round(time.perf_counter() - start, 2))
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
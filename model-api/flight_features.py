@@ -0,0 +1,222 @@
+import os
+from bisect import bisect_right
+import numpy as np
+
+# İptal modellerinin eğitimdeki özellik sırası (model_config['features'] ve imputer ile aynı)
+CANCEL_FEATURES = [
+    'CRS_DEP_TIME', 'CRS_ARR_TIME', 'DISTANCE',
+    'tmin', 'tmax', 'prcp', 'snow', 'wdir', 'wspd', 'wpgt', 'pres', 'tsun',
+    'YEAR_NORMALIZED', 'MONTH', 'DAY', 'DAY_OF_WEEK', 'SEASON',
+    'MONTH_SIN', 'MONTH_COS', 'DAY_SIN', 'DAY_COS',
+    'WEATHER_COMPOSITE', 'DEP_TIME_DETAILED', 'DISTANCE_CATEGORY',
+    'AIR', 'ORG', 'DST', 'ROUTE_POPULARITY_LOG', 'AIRLINE_RELIABILITY'
+]
+
+# Gecikme modelinin (imputer_delay) beklediği özellik sırası, alfabetik
+DELAY_FEATURES = sorted([
+    'YEAR', 'MONTH', 'DAY', 'AIR', 'ORG', 'DST', 'CRS_DEP_TIME', 'DISTANCE',
+    'tmin', 'tmax', 'prcp', 'snow', 'wdir', 'wspd', 'wpgt', 'pres', 'tsun',
+    'DEP_TIME', 'CRS_ARR_TIME'
+])
+
+# Mesafe kategorisi sınırları (pd.cut ile aynı: sağı kapalı aralıklar)
+DISTANCE_BINS = [0, 400, 800, 1500, 3000, 6000]
+
+# Ay -> mevsim eşlemesi (indeks ay numarasıdır, 0 kullanılmaz): Kış, İlkbahar, Yaz, Sonbahar
+SEASON_BY_MONTH = np.array([0, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0])
+
+# Kalkış saati dilimleri ve kategorileri: gece (6), erken sabah (1), sabah (2),
+# öğlen (3), öğleden sonra (4), akşam (5), gece (6)
+DEP_HOUR_BINS = [5, 8, 12, 15, 19, 22]
+DEP_TIME_CATEGORIES = np.array([6, 1, 2, 3, 4, 5, 6])
+
+# Gecikme sınıfı sınırları (dakika, sağı kapalı): zamanında, hafif, orta, ciddi
+DELAY_CLASS_BINS = [0, 15, 30]
+
+# Rota popülerliği / havayolu güvenilirliği tabloları (model_config.joblib ile aynı klasörde)
+ROUTE_POPULARITY_FILE = 'route_popularity.npy'
+AIRLINE_RELIABILITY_FILE = 'airline_reliability.npy'
+
+# Tablo yoksa veya kod tablonun dışındaysa kullanılan değerler
+DEFAULT_ROUTE_POPULARITY_LOG = 5.0
+DEFAULT_AIRLINE_RELIABILITY = 0.05
+
+
+def season(month):
+    """Ay numarasını mevsim koduna çevirir"""
+    return SEASON_BY_MONTH[np.asarray(month).astype(int)]
+
+
+def cyclic(values, period):
+    """Döngüsel değerin sinüs ve kosinüs kodlaması"""
+    return np.sin(2 * np.pi * values / period), np.cos(2 * np.pi * values / period)
+
+
+def year_normalized(year, min_year, max_year):
+    """Yılı eğitim verisinin yıl aralığına göre 0-1 aralığına ölçekler"""
+    return (year - min_year) / (max_year - min_year)
+
+
+def weather_composite_score(weather):
+    """Hava durumu composite score hesaplar (0-10)
+
+    `weather` tek gün için sayılar ya da sütun dizileri içeren bir eşleme
+    (dict veya DataFrame) olabilir; eksik (NaN) değerler puan eklemez.
+    """
+    if isinstance(weather, dict) and (weather['prcp'] is None or isinstance(weather['prcp'], (int, float))):
+        return weather_composite_scalar(weather)
+
+    prcp = np.asarray(weather['prcp'], dtype=float)
+    snow = np.asarray(weather['snow'], dtype=float)
+    wspd = np.asarray(weather['wspd'], dtype=float)
+    tmax = np.asarray(weather['tmax'], dtype=float)
+    tmin = np.asarray(weather['tmin'], dtype=float)
+    pres = np.asarray(weather['pres'], dtype=float)
+
+    # fmax NaN'ı ve eşik altını 0 puana indirir
+    score = np.minimum(np.fmax(prcp / 10, 0), 3)                  # Yağış, max 3 puan
+    score = score + np.minimum(np.fmax(snow / 5, 0), 4)           # Kar, max 4 puan
+    score = score + np.minimum(np.fmax((wspd - 10) / 10, 0), 2)   # Rüzgar, max 2 puan
+    score = score + ((tmax > 35) | (tmin < -10))                  # Sıcaklık ekstremleri
+    score = score + ((pres < 1000) | (pres > 1025)) * 0.5         # Basınç
+    return np.minimum(score, 10)
+
+
+def weather_composite_scalar(weather):
+    """weather_composite_score'un tek gün (sayı veya None değerli dict) için NumPy'siz karşılığı
+
+    Aynı kayan nokta işlemleri aynı sırayla yapılır; sonuç vektörel yolla bit düzeyinde aynıdır.
+    """
+    prcp, snow, wspd, tmax, tmin, pres = [
+        np.nan if value is None else float(value)
+        for value in (weather['prcp'], weather['snow'], weather['wspd'],
+                      weather['tmax'], weather['tmin'], weather['pres'])]
+
+    # NaN ve eşik altı 0 puan (np.fmax(x, 0) gibi)
+    rain = prcp / 10
+    snowfall = snow / 5
+    wind = (wspd - 10) / 10
+    score = min(rain if rain > 0 else 0.0, 3)
+    score = score + min(snowfall if snowfall > 0 else 0.0, 4)
+    score = score + min(wind if wind > 0 else 0.0, 2)
+    score = score + (tmax > 35 or tmin < -10)
+    score = score + (pres < 1000 or pres > 1025) * 0.5
+    return min(score, 10)
+
+
+def categorize_time_detailed(dep_time):
+    """HHMM kalkış saatini 1-6 zaman dilimine ayırır, eksik değer için 0 döndürür"""
+    # Tek değer (istek yolu) için dizi kurmadan
+    if isinstance(dep_time, (int, float)):
+        if dep_time != dep_time:
+            return 0
+        return DEP_TIME_CATEGORIES[bisect_right(DEP_HOUR_BINS, dep_time // 100)]
+
+    dep_time = np.asarray(dep_time, dtype=float)
+    missing = np.isnan(dep_time)
+    hour = np.floor_divide(np.where(missing, 0, dep_time), 100)
+    return np.where(missing, 0, DEP_TIME_CATEGORIES[np.digitize(hour, DEP_HOUR_BINS)])
+
+
+def categorize_distance(distance):
+    """Mesafeyi 0-4 kategorisine ayırır, aralık dışı değerler için NaN döndürür"""
+    index = np.digitize(distance, DISTANCE_BINS, right=True) - 1
+    return np.where((index >= 0) & (index < len(DISTANCE_BINS) - 1), index, np.nan)
+
+
+def delay_class(delay):
+    """Kalkış gecikmesini 0-3 gecikme sınıfına ayırır"""
+    return np.digitize(delay, DELAY_CLASS_BINS, right=True)
+
+
+def city_codes(cities, classes):
+    """Şehir adlarını API'nin şehir kodlayıcısının (label_enc_origin) sınıflarına göre kodlar
+
+    API kalkış ve varış şehrini aynı kodlayıcıyla kodlar; bilinmeyen şehir
+    LabelIndex'teki gibi 0 koduna eşlenir.
+    """
+    classes = np.asarray(classes, dtype=object)
+    cities = np.asarray(cities, dtype=object)
+    codes = np.minimum(np.searchsorted(classes, cities), len(classes) - 1)
+    return np.where(classes[codes] == cities, codes, 0)
+
+
+def route_popularity_table(origin, destination, n_cities):
+    """Şehir kodlayıcısıyla kodlanmış (kalkış, varış) çiftine göre log1p(uçuş sayısı) tablosu, float32 (n_cities, n_cities)"""
+    routes = np.asarray(origin, dtype=np.int64) * n_cities + np.asarray(destination, dtype=np.int64)
+    counts = np.bincount(routes, minlength=n_cities * n_cities)
+    return np.log1p(counts).astype(np.float32).reshape(n_cities, n_cities)
+
+
+def airline_reliability_table(airline, cancelled, n_airlines):
+    """Kodlanmış havayoluna göre iptal oranı tablosu, float32 (n_airlines,)"""
+    airline = np.asarray(airline, dtype=np.int64)
+    flights = np.bincount(airline, minlength=n_airlines)
+    cancels = np.bincount(airline, weights=np.asarray(cancelled, dtype=float), minlength=n_airlines)
+    return (cancels / np.maximum(flights, 1)).astype(np.float32)
+
+
+def lookup(table, default, *codes):
+    """Tablodan kodlara göre değer okur; tablo yoksa veya kod aralık dışındaysa varsayılanı döndürür
+
+    Kodlar tek değer (istek başına) veya NumPy dizisi (toplu tahmin) olabilir.
+    """
+    if not isinstance(codes[0], np.ndarray):
+        if table is None:
+            return default
+        try:
+            index = tuple(int(code) for code in codes)
+            # Negatif indeks sondan saymasın
+            return float(table[index]) if min(index) >= 0 else default
+        except IndexError:
+            return default
+
+    index = tuple(np.asarray(code, dtype=np.int64) for code in codes)
+    values = np.full(index[0].shape, default, dtype=float)
+    if table is None:
+        return values
+    valid = np.ones(index[0].shape, dtype=bool)
+    for code, size in zip(index, table.shape):
+        valid &= (code >= 0) & (code < size)
+    values[valid] = table[tuple(code[valid] for code in index)]
+    return values
+
+
+def save_lookup_tables(directory, route_popularity, airline_reliability):
+    """Tabloları servisin bellek eşlemeli açacağı .npy dosyaları olarak kaydeder"""
+    np.save(os.path.join(directory, ROUTE_POPULARITY_FILE), np.ascontiguousarray(route_popularity, dtype=np.float32))
+    np.save(os.path.join(directory, AIRLINE_RELIABILITY_FILE), np.ascontiguousarray(airline_reliability, dtype=np.float32))
+
+
+def load_lookup_tables(directory):
+    """Tabloları salt okunur bellek eşlemesiyle açar; bulunmayan tablo için None döndürür
+
+    Eşlemenin düz ndarray görünümü döndürülür (kopya yok); np.memmap'in
+    Python düzeyindeki indeksleme maliyeti istek başına ödenmez.
+    """
+    tables = []
+    for filename in (ROUTE_POPULARITY_FILE, AIRLINE_RELIABILITY_FILE):
+        path = os.path.join(directory, filename)
+        tables.append(np.asarray(np.load(path, mmap_mode='r')) if os.path.exists(path) else None)
+    return tuple(tables)
+
+
+def derived_features(year, month, day, dep_time, distance, weather, min_year, max_year):
+    """Ham tarih, saat, mesafe ve hava durumu sütunlarından türetilen model özellikleri
+
+    Eğitim betikleri ve API aynı fonksiyonu kullanır; girdiler tek değer veya
+    aynı uzunlukta diziler olabilir.
+    """
+    month_sin, month_cos = cyclic(month, 12)
+    day_sin, day_cos = cyclic(day, 31)
+    return {
+        'YEAR_NORMALIZED': year_normalized(year, min_year, max_year),
+        'SEASON': season(month),
+        'MONTH_SIN': month_sin,
+        'MONTH_COS': month_cos,
+        'DAY_SIN': day_sin,
+        'DAY_COS': day_cos,
+        'WEATHER_COMPOSITE': weather_composite_score(weather),
+        'DEP_TIME_DETAILED': categorize_time_detailed(dep_time),
+        'DISTANCE_CATEGORY': categorize_distance(distance)
+    }
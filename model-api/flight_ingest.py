@@ -0,0 +1,176 @@
+import argparse
+import os
+import time
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from weather_store import WEATHER_FIELDS
+
+# Saklama tiplerinin Arrow karşılıkları; metin sütunları sözlük kodlamalı (pandas'ta categorical)
+ARROW_TYPES = {
+    'date': pa.date32(),
+    'category': pa.dictionary(pa.int32(), pa.string()),
+    'int8': pa.int8(),
+    'int16': pa.int16(),
+    'float32': pa.float32()
+}
+
+# Eğitim betiklerinin CSV'lerden kullandığı sütunlar ve saklama tipleri; diğer sütunlar hiç okunmaz
+CANCEL_SCHEMA = {
+    'FL_DATE': 'date',
+    'AIRLINE_CODE': 'category',
+    'ORIGIN_CITY_NAME': 'category',
+    'DEST_CITY_NAME': 'category',
+    'CRS_DEP_TIME': 'int16',
+    'CRS_ARR_TIME': 'int16',
+    'DISTANCE': 'float32',
+    'CANCELLED': 'int8',
+    'CANCELLATION_CODE': 'category',
+    **{field: 'float32' for field in WEATHER_FIELDS}
+}
+
+# Sıra, imputer_delay/scaler_delay'in eğitildiği sütun sırasıdır
+DELAY_SCHEMA = {
+    'FL_DATE': 'date',
+    'AIRLINE_CODE': 'category',
+    'ORIGIN_CITY': 'category',
+    'DEST_CITY': 'category',
+    'CANCELLED': 'int8',
+    'CRS_DEP_TIME': 'int16',
+    'DISTANCE': 'float32',
+    **{field: 'float32' for field in WEATHER_FIELDS},
+    'DEP_TIME': 'int16',
+    'DEP_DELAY': 'float32'
+}
+
+SCHEMAS = {'cancel': CANCEL_SCHEMA, 'delay': DELAY_SCHEMA}
+
+# CSV'den bir seferde okunan satır sayısı (aynı zamanda Parquet satır grubu boyutu)
+CHUNK_ROWS = 500_000
+
+
+def arrow_schema(schema):
+    return pa.schema([(name, ARROW_TYPES[kind]) for name, kind in schema.items()])
+
+
+def chunk_to_table(chunk, schema):
+    """CSV parçasını sabit Arrow şemasına dönüştürür (eksik değerler null olur)"""
+    arrays = []
+    for name, kind in schema.items():
+        values = chunk[name]
+        if kind == 'date':
+            array = pa.array(pd.to_datetime(values, format='%Y-%m-%d'), from_pandas=True).cast(pa.date32())
+        elif kind == 'category':
+            array = pa.array(values, type=pa.string(), from_pandas=True).dictionary_encode()
+            array = array.cast(ARROW_TYPES[kind])
+        else:
+            array = pa.array(values, from_pandas=True).cast(ARROW_TYPES[kind])
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=arrow_schema(schema))
+
+
+def convert_csv(csv_path, parquet_path, schema, chunk_rows=CHUNK_ROWS):
+    """CSV'yi parça parça okuyup sütun budanmış, küçük tipli tek bir Parquet dosyasına yazar
+
+    Bellekte aynı anda yalnızca bir parça bulunur; sayısal sütunlar doğrudan
+    float32 olarak ayrıştırılır. Yazma geçici dosyaya yapılır ve sonunda
+    yerine taşınır, yarım kalan dönüşüm eski dosyayı bozmaz.
+    """
+    start = time.perf_counter()
+    read_types = {name: ('string' if kind in ('date', 'category') else 'float32') for name, kind in schema.items()}
+    tmp_path = parquet_path + '.tmp'
+    rows = 0
+
+    writer = pq.ParquetWriter(tmp_path, arrow_schema(schema), compression='zstd')
+    try:
+        for chunk in pd.read_csv(csv_path, usecols=list(schema), dtype=read_types, chunksize=chunk_rows):
+            writer.write_table(chunk_to_table(chunk, schema))
+            rows += len(chunk)
+    finally:
+        writer.close()
+    os.replace(tmp_path, parquet_path)
+
+    return {
+        'rows': rows,
+        'csv_mb': round(os.path.getsize(csv_path) / 2 ** 20, 2),
+        'parquet_mb': round(os.path.getsize(parquet_path) / 2 ** 20, 2),
+        'seconds': round(time.perf_counter() - start, 2)
+    }
+
+
+def parquet_path_for(csv_path):
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+
+def ensure_parquet(csv_path, schema, chunk_rows=CHUNK_ROWS):
+    """CSV'nin Parquet kopyasının yolunu döndürür
+
+    Kopya yoksa, CSV daha yeniyse veya şema değişmişse yeniden dönüştürür.
+    """
+    parquet_path = parquet_path_for(csv_path)
+    stale = (not os.path.exists(parquet_path)
+             or os.path.getmtime(parquet_path) < os.path.getmtime(csv_path)
+             or not pq.read_schema(parquet_path).remove_metadata().equals(arrow_schema(schema)))
+    if stale:
+        report = convert_csv(csv_path, parquet_path, schema, chunk_rows)
+        print(f"{csv_path} -> {parquet_path}: {report}")
+    return parquet_path
+
+
+def to_frame(table):
+    # Tarihler datetime64, sözlük sütunları categorical, null içermeyen tamsayılar küçük tipte kalır
+    return table.to_pandas(date_as_object=False, self_destruct=True)
+
+
+def read_columns(path, columns=None, filters=None):
+    """Parquet veri setinden yalnızca istenen sütunları (ve filtreye uyan satırları) okur"""
+    return to_frame(pq.read_table(path, columns=columns, filters=filters))
+
+
+def iter_batches(path, columns=None, batch_rows=CHUNK_ROWS):
+    """Veri setini DataFrame parçaları halinde akıtır (tamamı belleğe alınmaz)"""
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_rows, columns=columns):
+        yield to_frame(pa.Table.from_batches([batch]))
+
+
+def load_training_frame(csv_path, kind, columns=None, filters=None):
+    """Eğitim verisini Parquet kopyasından okur (ilk çalıştırmada CSV'den oluşturulur)"""
+    return read_columns(ensure_parquet(csv_path, SCHEMAS[kind]), columns, filters)
+
+
+def compare_load(csv_path, parquet_path, columns):
+    """Varsayılan pd.read_csv ile Parquet okumasının süre ve bellek karşılaştırması"""
+    results = {}
+    for name, load in (('csv', lambda: pd.read_csv(csv_path)),
+                       ('parquet', lambda: read_columns(parquet_path, columns))):
+        start = time.perf_counter()
+        frame = load()
+        results[name] = {
+            'seconds': round(time.perf_counter() - start, 2),
+            'memory_mb': round(float(frame.memory_usage(deep=True).sum()) / 2 ** 20, 2),
+            'columns': frame.shape[1]
+        }
+        del frame
+    return results
+
+
+def main():
+    """Eğitim CSV'sini Parquet'e dönüştürür"""
+    parser = argparse.ArgumentParser(description="Eğitim CSV'lerini sütunlu Parquet veri setine dönüştürür")
+    parser.add_argument('csv')
+    parser.add_argument('--kind', choices=sorted(SCHEMAS), required=True, help="Veri setini kullanan eğitim betiği")
+    parser.add_argument('--output', help="Parquet dosyası (varsayılan: CSV ile aynı ad)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--compare', action='store_true', help="CSV ve Parquet okuma süresi/belleğini karşılaştır")
+    args = parser.parse_args()
+
+    schema = SCHEMAS[args.kind]
+    output = args.output or parquet_path_for(args.csv)
+    print(convert_csv(args.csv, output, schema, args.chunk_rows))
+    if args.compare:
+        print(compare_load(args.csv, output, list(schema)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+
+class FlightRequest:
+    """Tek uçuş isteğinin bir kez ayrıştırılmış değerleri
+
+    İstek başında `parse` ile kurulur; önbellek anahtarı, iptal ve gecikme
+    özellik vektörleri, düzeltmeler ve mikro toplu iş aynı nesneyi kullanır.
+    Kodlar (AIR/ORG/DST) ve kayıtlı hava durumu ilk özellik hazırlığında bir
+    kez yazılır (`resolved`).
+
+    Alanlar: flight_date (datetime), airline/origin/destination (istekteki
+    değer), dep_time/arr_time (HHMM int), distance (float), airline_code/
+    origin_code/dest_code (int), weather (kayıtlı hava durumu veya None).
+    """
+
+    __slots__ = ('flight_date', 'airline', 'origin', 'destination', 'dep_time', 'arr_time', 'distance',
+                 'resolved', 'airline_code', 'origin_code', 'dest_code', 'weather')
+
+    def __init__(self, flight_date, airline, origin, destination, dep_time, arr_time, distance):
+        self.flight_date = flight_date
+        self.airline = airline
+        self.origin = origin
+        self.destination = destination
+        self.dep_time = dep_time
+        self.arr_time = arr_time
+        self.distance = distance
+        self.resolved = False
+        self.airline_code = self.origin_code = self.dest_code = 0
+        self.weather = None
+
+    @classmethod
+    def parse(cls, data):
+        """İstek gövdesini ayrıştırır; hatalı alanda istisna fırlatır"""
+        return cls(
+            datetime.strptime(data['date'], '%Y-%m-%d'),
+            data.get('airline', 'Unknown'),
+            data.get('origin', 'Unknown'),
+            data.get('destination', 'Unknown'),
+            int(data.get('departure_time', '00:00').replace(':', '')),
+            int(data.get('arrival_time', '00:00').replace(':', '')),
+            float(data.get('distance', 0))
+        )
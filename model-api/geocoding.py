@@ -0,0 +1,154 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Koordinat tablosu biçim sürümü; biçim değişirse artırılır
+GEOCODE_TABLE_VERSION = 1
+DEFAULT_TABLE_PATH = os.path.join('models', f'city_coords_v{GEOCODE_TABLE_VERSION}.json')
+
+# Nominatim kullanım politikası: saniyede en fazla bir istek
+NOMINATIM_INTERVAL = 1.0
+
+
+def load_table(path):
+    """Sürümlü koordinat tablosunu yükler; dosya yoksa boş tablo döndürür"""
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, encoding='utf-8') as f:
+        table = json.load(f)
+    if table.get('version') != GEOCODE_TABLE_VERSION:
+        raise ValueError(f"Desteklenmeyen koordinat tablosu sürümü: {table.get('version')}")
+
+    return {name: (None if coords is None else {'lat': coords[0], 'lon': coords[1]})
+            for name, coords in table['cities'].items()}
+
+
+def save_table(path, coordinates):
+    """{şehir: koordinat veya None} eşlemesini sürümlü tablo olarak yazar"""
+    table = {
+        'version': GEOCODE_TABLE_VERSION,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'cities': {name: (None if coords is None else [coords['lat'], coords['lon']])
+                   for name, coords in sorted(coordinates.items())}
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(table, f, ensure_ascii=False, indent=1)
+
+
+class GeocodingService:
+    """Önceden hesaplanmış tablo + sınırlı LRU ile şehir koordinatı çözümleyici
+
+    Tablo başlangıçta bir kez yüklenir. Tabloda olmayan isimler LRU'da tutulur,
+    bulunamayanlar `negative_ttl` saniye boyunca negatif önbellekte kalır.
+    Ağ erişimi sadece `allow_network=True` ile (tablo oluşturma, toplu
+    doldurma) yapılır; istek yolunda hiçbir zaman Nominatim beklenmez.
+    """
+
+    def __init__(self, table_path=DEFAULT_TABLE_PATH, cache_size=1024,
+                 negative_ttl=3600, allow_network=False):
+        self.table = load_table(table_path)
+        self.cache_size = cache_size
+        self.negative_ttl = negative_ttl
+        self.allow_network = allow_network
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.geolocator = None
+        self.last_request = 0.0
+
+    def get_coordinates(self, city_name, country=None):
+        """Koordinatları {'lat', 'lon'} olarak döndürür, bulunamazsa None döndürür"""
+        cache_key = f"{city_name}, {country}" if country else city_name
+        if cache_key in self.table:
+            return self.table[cache_key]
+
+        with self.lock:
+            entry = self.cache.get(cache_key)
+            if entry is not None:
+                coords, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self.cache.move_to_end(cache_key)
+                    return coords
+                del self.cache[cache_key]
+
+        if not self.allow_network:
+            coords = None
+        else:
+            coords = self.geocode(cache_key)
+
+        with self.lock:
+            expires_at = None if coords is not None else time.monotonic() + self.negative_ttl
+            self.cache[cache_key] = (coords, expires_at)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return coords
+
+    def geocode(self, query):
+        """Nominatim üzerinden tek bir ismi çözümler (hız sınırına uyarak)"""
+        if self.geolocator is None:
+            from geopy.geocoders import Nominatim
+            self.geolocator = Nominatim(user_agent="flight_predictor")
+
+        wait = NOMINATIM_INTERVAL - (time.monotonic() - self.last_request)
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            location = self.geolocator.geocode(query, timeout=10)
+        except Exception as e:
+            print(f"Geocoding hatası ({query}): {str(e)}")
+            location = None
+        finally:
+            self.last_request = time.monotonic()
+
+        if location is None:
+            return None
+        return {'lat': location.latitude, 'lon': location.longitude}
+
+
+def build_table(city_names, path=DEFAULT_TABLE_PATH):
+    """Tüm şehirleri bir kez çözümleyip koordinat tablosunu oluşturur
+
+    Mevcut tablodaki başarılı kayıtlar korunur, sadece eksikler yeniden sorgulanır.
+    """
+    existing = load_table(path)
+    service = GeocodingService(table_path=path, allow_network=True)
+
+    coordinates = {}
+    for city_name in city_names:
+        coords = existing.get(city_name)
+        if coords is None:
+            coords = service.geocode(city_name)
+        coordinates[city_name] = coords
+
+    save_table(path, coordinates)
+    return coordinates
+
+
+def main():
+    """Encoder şehir sınıfları için koordinat tablosunu oluşturur"""
+    parser = argparse.ArgumentParser(description="Şehir koordinat tablosunu oluşturur")
+    parser.add_argument('--output', default=DEFAULT_TABLE_PATH)
+    parser.add_argument('--cities', nargs='*',
+                        help="Şehir listesi (varsayılan: label_enc_origin ve label_enc_dest sınıfları)")
+    args = parser.parse_args()
+
+    cities = args.cities
+    if not cities:
+        import joblib
+        cities = set()
+        for name in ('label_enc_origin.joblib', 'label_enc_dest.joblib'):
+            cities.update(joblib.load(os.path.join('models', name)).classes_)
+        cities = sorted(cities)
+
+    coordinates = build_table(cities, args.output)
+    missing = [name for name, coords in coordinates.items() if coords is None]
+    print(f"{len(coordinates) - len(missing)}/{len(coordinates)} şehir çözümlendi -> {args.output}")
+    if missing:
+        print(f"Çözümlenemeyenler: {missing}")
+
+
+if __name__ == '__main__':
+    main()
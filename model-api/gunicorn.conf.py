@@ -0,0 +1,32 @@
+import multiprocessing
+import os
+
+# Sunucu adresi ve worker sayısı (varsayılan: çekirdek sayısı)
+bind = os.environ.get('BIND', '0.0.0.0:5050')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('WORKER_THREADS', 1))
+
+# Uygulama (ve modeller) fork'tan önce master süreçte yüklenir
+preload_app = True
+
+# Yanıt vermeyen worker süresi ve kapanırken isteklerin bitirilmesi için beklenen süre
+timeout = int(os.environ.get('WORKER_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', 30))
+
+# Worker canlılık dosyaları diske değil belleğe yazılsın
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+
+def post_fork(server, worker):
+    """Fork edilen worker'ın süreç bilgisini ve fork ile paylaşılamayan kaynaklarını kurar"""
+    import cancel_delay_api
+    cancel_delay_api.init_worker(server.pid)
+
+
+def on_reload(server):
+    """SIGHUP: modelleri master'da yeniden yükler; yeni worker'lar yeni paketle başlar,
+    eski worker'lar süren isteklerini bitirip kapanır"""
+    import wsgi
+    if not wsgi.preload_models():
+        server.log.error("Model paketi yeniden yüklenemedi, önceki paket kullanılıyor")
@@ -0,0 +1,330 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import xgboost as xgb
+from sklearn.impute import SimpleImputer
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+import streaming_train as st
+from flight_features import delay_class
+from flight_ingest import CHUNK_ROWS, SCHEMAS, ensure_parquet, iter_batches
+
+# Aranan değerler; mevcut elle seçilmiş değerler her zaman ilk aday olarak denenir
+# (betikte verilmeyen parametreler için listenin ilk değeri XGBoost varsayılanıdır)
+SEARCH_SPACES = {
+    'cancel': {
+        'max_depth': [3, 4, 5, 6, 8],
+        'learning_rate': [0.03, 0.05, 0.1, 0.2],
+        'min_child_weight': [1, 5, 10, 20, 40],
+        'subsample': [0.6, 0.8, 1.0],
+        'colsample_bytree': [0.6, 0.8, 1.0],
+        'reg_alpha': [0.0, 0.1, 1.0, 2.0, 5.0],
+        'reg_lambda': [0.1, 1.0, 2.0, 5.0],
+        'gamma': [0.0, 0.5, 1.0, 2.0],
+        'scale_pos_weight': [1.0, 2.0, 4.0, 8.0]
+    },
+    'delay': {
+        'max_depth': [4, 6, 8, 10, 12],
+        'learning_rate': [0.03, 0.05, 0.1, 0.2],
+        'min_child_weight': [1, 5, 10, 20],
+        'subsample': [0.6, 0.8, 1.0],
+        'colsample_bytree': [0.6, 0.8, 1.0],
+        'reg_lambda': [1.0, 0.1, 2.0, 5.0],
+        'gamma': [0.0, 0.5, 1.0]
+    }
+}
+
+BASE_PARAMS = {'cancel': st.CANCEL_PARAMS, 'delay': st.DELAY_PARAMS}
+
+# Erken durdurma ve sıralama metriği: (metrik, büyük olan mı daha iyi)
+METRICS = {'cancel': ('auc', True), 'delay': ('mlogloss', False)}
+
+# İşçi süreçlerde fold başına bir kez kurulan DMatrix'ler
+_worker_folds = {}
+
+
+def cancel_matrix(path, batch_rows, sample, seed):
+    """İptal modelinin ham özellik matrisi ve hedefi (isteğe bağlı parça başına örnekleme ile)"""
+    context = st.cancel_context(path, batch_rows)
+    features, targets = [], []
+    for index, frame in enumerate(iter_batches(path, list(SCHEMAS['cancel']), batch_rows)):
+        keep = sample_mask(len(frame), index, sample, seed)
+        features.append(st.cancel_features(frame, context)[keep])
+        targets.append(frame['CANCELLED'].to_numpy(np.int8)[keep])
+    return np.concatenate(features), np.concatenate(targets)
+
+
+def delay_matrix(path, batch_rows, sample, seed):
+    """Gecikme modelinin ham özellik matrisi ve hedefi
+
+    delay_model.py ile aynı şekilde hedef sınıf, tüm veriye fit edilmiş
+    imputer/scaler ile ölçeklenmiş DEP_DELAY üzerinden hesaplanır.
+    """
+    classes = st.delay_classes(path, batch_rows)
+    chunks = [st.delay_features(frame, classes)[sample_mask(len(frame), index, sample, seed)]
+              for index, frame in enumerate(st.delay_frames(path, batch_rows))]
+    X = np.concatenate(chunks)
+    target = st.DELAY_COLUMNS.index('DEP_DELAY')
+    scaled_target = StandardScaler().fit_transform(SimpleImputer(strategy='median').fit_transform(X))[:, target]
+    model_columns = [st.DELAY_COLUMNS.index(name) for name in st.DELAY_MODEL_COLUMNS]
+    return X[:, model_columns], delay_class(scaled_target)
+
+
+def sample_mask(n_rows, chunk_index, sample, seed):
+    if sample >= 1:
+        return np.ones(n_rows, dtype=bool)
+    return np.random.default_rng([seed, chunk_index, 1]).random(n_rows) < sample
+
+
+def class_weights(kind, y):
+    """streaming_train ile aynı SMOTE karşılığı satır ağırlıkları"""
+    counts = np.bincount(y)
+    if kind == 'cancel':
+        return np.where(y == 1, st.cancel_positive_weight(counts), 1.0)
+    return st.balanced_class_weights(counts)[y]
+
+
+def fold_cache_dir(cache_root, path, kind, folds, sample, seed):
+    """Veri dosyası ve bölme ayarları değişmediği sürece aynı kalan fold önbelleği klasörü"""
+    stat = os.stat(path)
+    key = json.dumps([os.path.abspath(path), stat.st_size, stat.st_mtime_ns, kind, folds, sample, seed])
+    return os.path.join(cache_root, f"{kind}-{hashlib.sha1(key.encode()).hexdigest()[:12]}")
+
+
+def build_folds(path, kind, folds, sample, seed, cache_root, batch_rows=CHUNK_ROWS):
+    """Fold matrislerini bir kez imputer/scaler'dan geçirip .npy olarak kaydeder
+
+    Her fold'un imputer ve scaler'ı yalnızca o fold'un eğitim satırlarına fit
+    edilir. Dosyalar işçi süreçlerde bellek eşlemeli açılır, böylece
+    ön işleme aday sayısından bağımsız olarak bir kez yapılır.
+    """
+    directory = fold_cache_dir(cache_root, path, kind, folds, sample, seed)
+    manifest_path = os.path.join(directory, 'manifest.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            return directory, json.load(f)
+
+    start = time.perf_counter()
+    X, y = (cancel_matrix if kind == 'cancel' else delay_matrix)(path, batch_rows, sample, seed)
+    os.makedirs(directory, exist_ok=True)
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    for fold, (train_index, valid_index) in enumerate(splitter.split(X, y)):
+        imputer = SimpleImputer(strategy='median').fit(X[train_index])
+        scaler = StandardScaler().fit(imputer.transform(X[train_index]))
+        arrays = {
+            'X_train': scaler.transform(imputer.transform(X[train_index])).astype(np.float32),
+            'y_train': y[train_index],
+            'w_train': class_weights(kind, y[train_index]).astype(np.float32),
+            'X_valid': scaler.transform(imputer.transform(X[valid_index])).astype(np.float32),
+            'y_valid': y[valid_index]
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f'fold{fold}_{name}.npy'), array)
+
+    manifest = {
+        'rows': int(len(X)), 'features': int(X.shape[1]), 'folds': folds,
+        'classes': int(y.max()) + 1, 'seconds': round(time.perf_counter() - start, 2)
+    }
+    # Manifest en son yazılır; yarım kalan önbellek bir sonraki çalıştırmada yeniden kurulur
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+    return directory, manifest
+
+
+def load_fold(directory, fold):
+    """Fold'u (işçi süreç başına bir kez) bellek eşlemeli dizilerden DMatrix olarak kurar"""
+    key = (directory, fold)
+    if key not in _worker_folds:
+        arrays = {name: np.load(os.path.join(directory, f'fold{fold}_{name}.npy'), mmap_mode='r')
+                  for name in ('X_train', 'y_train', 'w_train', 'X_valid', 'y_valid')}
+        train = xgb.QuantileDMatrix(arrays['X_train'], label=arrays['y_train'], weight=arrays['w_train'])
+        valid = xgb.QuantileDMatrix(arrays['X_valid'], label=arrays['y_valid'], ref=train)
+        _worker_folds[key] = (train, valid)
+    return _worker_folds[key]
+
+
+def evaluate(directory, fold, params, rounds, early_stopping):
+    """Bir adayı bir fold'da en fazla `rounds` ağaçla, erken durdurmalı eğitir"""
+    start = time.perf_counter()
+    train, valid = load_fold(directory, fold)
+    booster = xgb.train(params, train, num_boost_round=rounds, evals=[(valid, 'valid')],
+                        early_stopping_rounds=early_stopping, verbose_eval=False)
+    return {
+        'score': float(booster.best_score),
+        'best_iteration': int(booster.best_iteration),
+        'seconds': round(time.perf_counter() - start, 3)
+    }
+
+
+def candidate_params(kind, n_candidates, seed):
+    """Aramadaki aday parametre kümeleri; aynı tohumla her zaman aynı liste üretilir"""
+    space = SEARCH_SPACES[kind]
+    base = {name: BASE_PARAMS[kind][name] for name in space if name in BASE_PARAMS[kind]}
+    candidates, seen = [], set()
+    rng = np.random.default_rng(seed)
+    # Mevcut parametreler de aranan değerler arasında olmalı
+    start = {name: base.get(name, values[0]) for name, values in space.items()}
+    for params in [start] + [None] * (50 * n_candidates):
+        if len(candidates) == n_candidates:
+            break
+        if params is None:
+            params = {name: values[rng.integers(len(values))] for name, values in space.items()}
+        key = json.dumps(params, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            candidates.append({name: float(value) if isinstance(value, float) else int(value)
+                               for name, value in params.items()})
+    return candidates
+
+
+def eval_metric(kind, n_classes):
+    """Erken durdurma metriği ve büyük olanın daha iyi olup olmadığı"""
+    metric, maximize = METRICS[kind]
+    if metric == 'mlogloss' and n_classes <= 2:
+        metric = 'logloss'
+    return metric, maximize
+
+
+def full_params(kind, candidate, n_classes, nthread):
+    """Aday değerlerini temel parametrelerle birleştirip xgb.train parametrelerine çevirir"""
+    params = dict(BASE_PARAMS[kind])
+    params.update(candidate)
+    if kind == 'delay' and n_classes > 2:
+        params.update(objective='multi:softprob', num_class=n_classes)
+    elif kind == 'delay':
+        params.update(objective='binary:logistic')
+    params.update(eval_metric=eval_metric(kind, n_classes)[0], nthread=nthread)
+    return st.booster_params(params)
+
+
+def rung_budgets(min_rounds, max_rounds, eta):
+    """Ardışık yarılama basamaklarının ağaç bütçeleri (ör. 50, 150, 400)"""
+    budgets, rounds = [], min_rounds
+    while rounds < max_rounds:
+        budgets.append(rounds)
+        rounds *= eta
+    return budgets + [max_rounds]
+
+
+class StudyLog:
+    """Her değerlendirmeyi JSONL dosyasına ekleyen, yarıda kalan aramayı sürdürmeyi sağlayan kayıt"""
+
+    def __init__(self, path, config):
+        self.path = path
+        self.results = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                lines = f.readlines()
+            if lines and not lines[-1].endswith('\n'):
+                # Çökme anında yarım yazılmış son satır atılır, yeni kayıtlar ona eklenmesin
+                lines.pop()
+                with open(path, 'w') as f:
+                    f.writelines(lines)
+            for line in lines:
+                record = json.loads(line)
+                if record.get('type') == 'study' and record['config'] != config:
+                    raise ValueError(f"{path} farklı ayarlarla başlatılmış bir aramaya ait; başka bir --log kullanın")
+                if record.get('type') == 'trial':
+                    self.results[(record['candidate'], record['fold'], record['rounds'])] = record
+        else:
+            self.append({'type': 'study', 'config': config})
+
+    def append(self, record):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+    def add(self, candidate, fold, rounds, params, result):
+        record = {'type': 'trial', 'candidate': candidate, 'fold': fold, 'rounds': rounds,
+                  'params': params, **result}
+        self.append(record)
+        self.results[(candidate, fold, rounds)] = record
+
+
+def run_search(args):
+    path = args.data if args.data.endswith('.parquet') else ensure_parquet(args.data, SCHEMAS[args.kind])
+    directory, manifest = build_folds(path, args.kind, args.folds, args.sample, args.seed,
+                                      args.cache_dir, args.batch_rows)
+    print(f"Fold önbelleği: {directory} ({manifest['rows']} satır, {manifest['features']} özellik)")
+
+    candidates = candidate_params(args.kind, args.candidates, args.seed)
+    budgets = rung_budgets(args.min_rounds, args.max_rounds, args.eta)
+    config = {'kind': args.kind, 'data': os.path.abspath(path), 'folds': args.folds, 'sample': args.sample,
+              'seed': args.seed, 'candidates': candidates, 'budgets': budgets, 'eta': args.eta,
+              'early_stopping': args.early_stopping}
+    log = StudyLog(args.log, config)
+    metric, maximize = eval_metric(args.kind, manifest['classes'])
+    nthread = max(1, (os.cpu_count() or 1) // args.workers)
+
+    survivors = list(range(len(candidates)))
+    # Elle seçilmiş parametrelerin (aday 0) elendiği basamaktaki skoru karşılaştırma için saklanır
+    baseline = None
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for rung, rounds in enumerate(budgets):
+            pending = [(candidate, fold) for candidate in survivors for fold in range(args.folds)
+                       if (candidate, fold, rounds) not in log.results]
+            start = time.perf_counter()
+            futures = {
+                pool.submit(evaluate, directory, fold,
+                            full_params(args.kind, candidates[candidate], manifest['classes'], nthread),
+                            rounds, args.early_stopping): (candidate, fold)
+                for candidate, fold in pending
+            }
+            for future in as_completed(futures):
+                candidate, fold = futures[future]
+                log.add(candidate, fold, rounds, candidates[candidate], future.result())
+
+            scores = {candidate: np.mean([log.results[(candidate, fold, rounds)]['score']
+                                          for fold in range(args.folds)]) for candidate in survivors}
+            ranked = sorted(survivors, key=scores.get, reverse=maximize)
+            if 0 in scores:
+                baseline = {'rounds': rounds, 'score': float(scores[0])}
+            print(f"Basamak {rung + 1}/{len(budgets)}: {rounds} ağaç, {len(survivors)} aday "
+                  f"({len(pending)} yeni değerlendirme, {time.perf_counter() - start:.1f} sn), "
+                  f"en iyi {metric}: {scores[ranked[0]]:.5f}")
+            if rung < len(budgets) - 1:
+                survivors = ranked[:max(1, len(ranked) // args.eta)]
+
+    best = ranked[0]
+    best_rounds = int(np.mean([log.results[(best, fold, budgets[-1])]['best_iteration']
+                               for fold in range(args.folds)])) + 1
+    result = {
+        'kind': args.kind, 'metric': metric, 'score': float(scores[best]),
+        'baseline': baseline,
+        'params': candidates[best], 'n_estimators': best_rounds
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    return result
+
+
+def main():
+    """Önbelleğe alınmış fold matrisleriyle paralel, ardışık yarılamalı hiperparametre araması"""
+    parser = argparse.ArgumentParser(description="İptal/gecikme modelleri için paralel hiperparametre araması")
+    parser.add_argument('data', help="Eğitim CSV'si veya flight_ingest ile oluşturulmuş Parquet dosyası")
+    parser.add_argument('--kind', choices=sorted(SCHEMAS), required=True)
+    parser.add_argument('--folds', type=int, default=3)
+    parser.add_argument('--candidates', type=int, default=27, help="İlk basamaktaki aday sayısı")
+    parser.add_argument('--min-rounds', type=int, default=50, help="İlk basamağın ağaç bütçesi")
+    parser.add_argument('--max-rounds', type=int, default=400, help="Son basamağın ağaç bütçesi")
+    parser.add_argument('--eta', type=int, default=3, help="Her basamakta adayların 1/eta'sı kalır")
+    parser.add_argument('--early-stopping', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--sample', type=float, default=1.0, help="Aramada kullanılacak satır oranı")
+    parser.add_argument('--batch-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--cache-dir', default='search_cache', help="Fold matrislerinin önbellek klasörü")
+    parser.add_argument('--log', help="Sürdürülebilir arama kaydı (varsayılan: search_<kind>.jsonl)")
+    parser.add_argument('--output', help="En iyi parametrelerin yazılacağı JSON dosyası")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    args.log = args.log or f'search_{args.kind}.jsonl'
+    run_search(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+import numpy as np
+from metrics import counter
+
+# Sözlükte bulunmayan kategoriler için sayaç
+UNKNOWN_CATEGORIES = counter('unknown_category_total',
+                             'Encoder sınıflarında bulunmayan kategori sayısı',
+                             ('encoder',))
+
+
+class LabelIndex:
+    """LabelEncoder.classes_ üzerinden kurulan sözlük tabanlı hızlı kodlayıcı
+
+    Bilinmeyen değerler istisna fırlatmak yerine varsayılan koda eşlenir ve
+    `unknown_category_total` sayacına yazılır.
+    """
+
+    def __init__(self, classes, name):
+        self.name = name
+        self.classes = list(classes)
+        self.index = {str(label): code for code, label in enumerate(self.classes)}
+
+    def __len__(self):
+        return len(self.classes)
+
+    def encode(self, value, default=0):
+        """Tek bir değeri kodlar"""
+        code = self.index.get(str(value))
+        if code is None:
+            UNKNOWN_CATEGORIES.inc(encoder=self.name)
+            return default
+        return code
+
+    def encode_many(self, values, default=0):
+        """Değer listesini tek geçişte int64 diziye kodlar"""
+        codes = np.fromiter((self.index.get(str(value), -1) for value in values),
+                            dtype=np.int64, count=len(values))
+        unknown = codes < 0
+        if unknown.any():
+            UNKNOWN_CATEGORIES.inc(int(unknown.sum()), encoder=self.name)
+            codes[unknown] = default
+        return codes
@@ -0,0 +1,239 @@
+import bisect
+from collections import deque
+import os
+import threading
+import time
+import numpy as np
+
+
+class Counter:
+    """Etiketlere göre ayrılmış, iş parçacığı güvenli artan sayaç"""
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        return self.values.get(key, 0)
+
+    def snapshot(self):
+        """Etiket sözlüğü -> değer çiftlerinin kopyasını döndürür"""
+        with self.lock:
+            items = list(self.values.items())
+        return [(dict(zip(self.label_names, key)), value) for key, value in items]
+
+
+# record ile tamponlanan gözlemlerin kovalara işlenme eşiği (anahtar başına)
+PENDING_LIMIT = 4096
+
+
+class Histogram:
+    """Etiketlere göre ayrılmış, sabit kovalı iş parçacığı güvenli histogram
+
+    Her kova `değer <= üst sınır` gözlemlerini sayar; son kova +Inf'tir.
+    """
+
+    def __init__(self, name, help_text, buckets, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.label_names = tuple(label_names)
+        self.bucket_array = np.asarray(self.buckets, dtype=np.float64)
+        # anahtar -> [kova sayıları, toplam, gözlem sayısı]
+        self.values = {}
+        # anahtar -> henüz kovalara işlenmemiş gözlemler (record ile eklenenler; kuyruk hiç değiştirilmez)
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        self.observe_key(tuple(labels.get(name, '') for name in self.label_names), value)
+
+    def observe_key(self, key, value):
+        """Etiket değerleri demeti ile gözlem ekler (sıcak yol için kwargs'sız)"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def record(self, key, value):
+        """Gözlemi kilitsiz kuyruğa ekler; kovalar kuyruk dolunca veya snapshot'ta toplu güncellenir
+
+        deque.append GIL altında atomik olduğu için sıcak yolda kilit ve kova
+        araması yapılmaz. Kuyruk yerine yenisi konmaz; boşaltma kilit altında
+        baştan ve o anki uzunluk kadar yapılır, böylece eşzamanlı eklenen
+        gözlemler kaybolmaz ve iki kez sayılmaz.
+        """
+        samples = self.pending.get(key)
+        if samples is None:
+            samples = self.pending.setdefault(key, deque())
+        samples.append(value)
+        if len(samples) >= PENDING_LIMIT:
+            self.flush(key)
+
+    def flush(self, key=None):
+        """Kuyruktaki gözlemleri tek vektörel geçişte kovalara işler"""
+        for key in ([key] if key is not None else list(self.pending)):
+            samples = self.pending.get(key)
+            if not samples:
+                continue
+            with self.lock:
+                # Yalnızca boşaltan taraf (kilit altında) popleft yapar; sondan eklenenler sonraki boşaltmaya kalır
+                values = np.array([samples.popleft() for _ in range(len(samples))], dtype=np.float64)
+                if not len(values):
+                    continue
+                counts = np.bincount(np.searchsorted(self.bucket_array, values, side='left'),
+                                     minlength=len(self.buckets) + 1)
+                state = self.values.get(key)
+                if state is None:
+                    state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                for index, count in enumerate(counts.tolist()):
+                    state[0][index] += count
+                state[1] += float(values.sum())
+                state[2] += len(values)
+
+    def snapshot(self):
+        """Etiket sözlüğü -> {'buckets': [(üst sınır, kümülatif sayı)], 'sum', 'count'} çiftlerini döndürür"""
+        self.flush()
+        with self.lock:
+            items = [(key, list(state[0]), state[1], state[2]) for key, state in self.values.items()]
+
+        result = []
+        for key, counts, total, count in items:
+            cumulative, buckets = 0, []
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                buckets.append((bound, cumulative))
+            result.append((dict(zip(self.label_names, key)),
+                           {'buckets': buckets, 'sum': total, 'count': count}))
+        return result
+
+    def quantiles(self, qs=(0.5, 0.95, 0.99)):
+        """Her etiket için kovalardan doğrusal ara değerleme ile yüzdelik tahminleri döndürür"""
+        return [(labels, {q: bucket_quantile(q, value['buckets']) for q in qs})
+                for labels, value in self.snapshot() if value['count']]
+
+
+def bucket_quantile(q, buckets):
+    """Kümülatif kovalardan q yüzdeliğini tahmin eder (Prometheus histogram_quantile gibi)"""
+    total = buckets[-1][1]
+    rank = q * total
+    lower_bound, lower_count = 0.0, 0
+    for bound, cumulative in buckets:
+        if cumulative >= rank:
+            if bound == float('inf'):
+                return lower_bound
+            if cumulative == lower_count:
+                return bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / (cumulative - lower_count)
+        lower_bound, lower_count = bound, cumulative
+    return lower_bound
+
+
+class StageTimer:
+    """İstek aşamalarının süresini tek bir histogramda `stage` etiketiyle toplar
+
+    `lap(aşama, başlangıç)` başlangıçtan bu yana geçen süreyi kaydeder ve
+    şimdiki zamanı döndürür; ardışık aşamalar böylece aşama başına tek
+    perf_counter çağrısıyla ölçülür. Kapalıyken sadece zamanı döndürür.
+    """
+
+    def __init__(self, histogram, enabled=True):
+        self.histogram = histogram
+        self.enabled = enabled
+
+    def lap(self, stage, since):
+        now = time.perf_counter()
+        if self.enabled:
+            self.histogram.record((stage,), now - since)
+        return now
+
+
+# Süreç genelindeki metrik kayıt defteri
+REGISTRY = {}
+_registry_lock = threading.Lock()
+
+
+def counter(name, help_text, label_names=()):
+    """Kayıtlı sayacı döndürür, yoksa oluşturur"""
+    with _registry_lock:
+        if name not in REGISTRY:
+            REGISTRY[name] = Counter(name, help_text, label_names)
+        return REGISTRY[name]
+
+
+def histogram(name, help_text, buckets, label_names=()):
+    """Kayıtlı histogramı döndürür, yoksa oluşturur"""
+    with _registry_lock:
+        if name not in REGISTRY:
+            REGISTRY[name] = Histogram(name, help_text, buckets, label_names)
+        return REGISTRY[name]
+
+
+def format_labels(labels, extra=None):
+    items = list(labels.items()) + list((extra or {}).items())
+    if not items:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in items)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(items, escaped)) + '}'
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus():
+    """Kayıtlı tüm metrikleri Prometheus metin biçiminde döndürür
+
+    Histogramlar için ayrıca p50/p95/p99 tahminleri `<ad>_quantile` gauge'u olarak yazılır.
+    """
+    with _registry_lock:
+        metrics = sorted(REGISTRY.values(), key=lambda metric: metric.name)
+
+    lines = []
+    for metric in metrics:
+        if isinstance(metric, Counter):
+            lines.append(f'# HELP {metric.name} {metric.help_text}')
+            lines.append(f'# TYPE {metric.name} counter')
+            for labels, value in metric.snapshot():
+                lines.append(f'{metric.name}{format_labels(labels)} {format_value(value)}')
+            continue
+
+        lines.append(f'# HELP {metric.name} {metric.help_text}')
+        lines.append(f'# TYPE {metric.name} histogram')
+        for labels, value in metric.snapshot():
+            for bound, cumulative in value['buckets']:
+                lines.append(f'{metric.name}_bucket{format_labels(labels, {"le": format_value(bound)})} {cumulative}')
+            lines.append(f'{metric.name}_sum{format_labels(labels)} {format_value(value["sum"])}')
+            lines.append(f'{metric.name}_count{format_labels(labels)} {value["count"]}')
+
+        lines.append(f'# HELP {metric.name}_quantile {metric.help_text} (kovalardan tahmini yüzdelikler)')
+        lines.append(f'# TYPE {metric.name}_quantile gauge')
+        for labels, values in metric.quantiles():
+            for q, estimate in values.items():
+                lines.append(f'{metric.name}_quantile{format_labels(labels, {"quantile": q})} {format_value(float(estimate))}')
+
+    return '\n'.join(lines) + '\n'
+
+
+# İstek aşamalarının süre dağılımı (1 µs - 1 s arası logaritmik kovalar)
+STAGE_LATENCY = histogram('stage_latency_seconds', 'İstek aşamalarının süresi',
+                          (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+                           1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0),
+                          ('stage',))
+stage_timer = StageTimer(STAGE_LATENCY, enabled=os.environ.get('STAGE_TIMING', '1') != '0')
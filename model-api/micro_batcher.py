@@ -0,0 +1,111 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from metrics import histogram
+
+# Mikro toplu iş boyutu ve isteklerin kuyrukta bekleme süresi dağılımları
+BATCH_SIZE = histogram('micro_batch_size', 'Tek model geçişinde birleştirilen istek sayısı',
+                       (1, 2, 4, 8, 16, 32, 64, 128, 256))
+QUEUE_WAIT = histogram('micro_batch_queue_wait_seconds', 'İsteğin kuyrukta toplu işi bekleme süresi',
+                       (0.0001, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1))
+
+
+class MicroBatcher:
+    """Tekil istekleri kuyrukta toplayıp tek çağrıda işleyen ve sonuçları dağıtan toplayıcı
+
+    Toplu iş, `max_batch_size` dolunca ya da ilk isteğin gelişinden itibaren
+    `max_wait` saniye geçince işlenir. Uyarlamalıdır: önceki toplu iş tek
+    istekten oluştuysa (düşük yük) kuyrukta bekleyen yoksa hiç beklenmez,
+    böylece gecikme yalnızca eşzamanlı yük altında artar.
+    """
+
+    def __init__(self, process_batch, max_batch_size=32, max_wait=0.002):
+        # process_batch(öğeler) -> aynı sırada sonuç listesi
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = None
+        self.thread = None
+        self.pid = None
+        self.lock = threading.Lock()
+        self.last_batch_size = 0
+
+    def submit(self, item):
+        """Öğeyi kuyruğa ekler; sonucu taşıyan Future döndürür"""
+        future = Future()
+        self.ensure_started().put((item, future, time.perf_counter()))
+        return future
+
+    def ensure_started(self):
+        """İşleyici iş parçacığını bu süreçte ilk kullanımda başlatır (fork sonrası yeniden)"""
+        if self.pid != os.getpid():
+            with self.lock:
+                if self.pid != os.getpid():
+                    self.queue = queue.SimpleQueue()
+                    self.thread = threading.Thread(target=self.run, args=(self.queue,),
+                                                   name='micro-batcher', daemon=True)
+                    self.thread.start()
+                    self.pid = os.getpid()
+        return self.queue
+
+    def run(self, pending):
+        while True:
+            batch = [pending.get()]
+            deadline = batch[0][2] + self.max_wait
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(pending.get_nowait())
+                    continue
+                except queue.Empty:
+                    pass
+                # Düşük yükte (önceki toplu iş tekil) tek istek beklemeden işlenir
+                idle = self.last_batch_size <= 1 and len(batch) == 1
+                timeout = deadline - time.perf_counter()
+                if idle or timeout <= 0:
+                    break
+                try:
+                    batch.append(pending.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self.flush(batch)
+
+    def flush(self, batch):
+        """Toplu işi işler ve her isteğin Future'ına kendi sonucunu yazar"""
+        now = time.perf_counter()
+        for _, _, enqueued_at in batch:
+            QUEUE_WAIT.observe(now - enqueued_at)
+        BATCH_SIZE.observe(len(batch))
+        self.last_batch_size = len(batch)
+
+        try:
+            results = self.process_batch([item for item, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self):
+        """Ayarları ve toplu iş boyutu / kuyruk bekleme histogramlarını döndürür"""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'batch_size': summarize(BATCH_SIZE),
+            'queue_wait_seconds': summarize(QUEUE_WAIT)
+        }
+
+
+def summarize(metric):
+    """Etiketsiz histogramı JSON'a uygun sözlüğe çevirir (+Inf kovası metin olarak)"""
+    for _, value in metric.snapshot():
+        return {
+            'buckets': {('+Inf' if bound == float('inf') else str(bound)): count
+                        for bound, count in value['buckets']},
+            'sum': value['sum'],
+            'count': value['count']
+        }
+    return None
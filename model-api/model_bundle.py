@@ -0,0 +1,300 @@
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import joblib
+import numpy as np
+from flight_features import (AIRLINE_RELIABILITY_FILE, DEFAULT_AIRLINE_RELIABILITY, DEFAULT_ROUTE_POPULARITY_LOG,
+                             ROUTE_POPULARITY_FILE, load_lookup_tables, lookup)
+from flat_bundle import FLAT_BUNDLE_FILE, read_bundle
+from tree_engine import build_predictor
+from feature_plan import FeaturePlan
+from label_index import LabelIndex
+
+# Paketi oluşturan artefakt dosyaları (models klasörüne göre)
+ARTIFACT_FILES = {
+    'model_cancelled': 'model_cancelled.joblib',
+    'model_code': 'model_cancel_code.joblib',
+    'model_delay': 'model_delay.joblib',
+    'airline_encoder': 'label_enc_airline.joblib',
+    'city_encoder': 'label_enc_origin.joblib',
+    'imputer': 'imputer.joblib',
+    'scaler': 'scaler.joblib',
+    'imputer_delay': 'imputer_delay.joblib',
+    'scaler_delay': 'scaler_delay.joblib',
+    'config': 'model_config.joblib'
+}
+
+logger = logging.getLogger('flight_api.model_bundle')
+
+# Config'te yıl aralığı yoksa kullanılan (min_year, max_year)
+DEFAULT_YEAR_RANGE = (2015, 2024)
+
+
+def artifact_paths(model_dir):
+    """Bir model klasöründeki artefakt yollarını döndürür"""
+    return {name: os.path.join(model_dir, filename) for name, filename in ARTIFACT_FILES.items()}
+
+
+def import_model_libraries():
+    """Pickle'ların ihtiyaç duyduğu ağır kütüphaneleri ana iş parçacığında bir kez içe aktarır
+
+    Modül yüklenirken değil, ilk model yüklemesinde çağrılır; paralel yükleme
+    iş parçacıklarının import kilidinde beklemesini de önler.
+    """
+    import sklearn.impute
+    import sklearn.preprocessing
+    import xgboost
+    try:
+        # Gecikme modeli ImbPipeline olarak kaydedildi
+        import imblearn.pipeline
+    except ImportError:
+        pass
+
+
+def load_artifact(path):
+    """Tek bir joblib dosyasını yükler; (nesne, süre ms) döndürür
+
+    Sıkıştırılmamış dosyalardaki numpy dizileri mmap ile salt okunur açılır.
+    """
+    import xgboost
+
+    start = time.perf_counter()
+    # Ana iş parçacığı dışında xgboost eski pickle uyarısını doğrudan stderr'e yazar
+    with xgboost.config_context(verbosity=0):
+        artifact = joblib.load(path, mmap_mode='r')
+    return artifact, (time.perf_counter() - start) * 1000
+
+
+def bundle_version(paths, config):
+    """Config'te sürüm yoksa artefakt içeriklerinin özetinden sürüm üretir"""
+    if config.get('version'):
+        return str(config['version'])
+
+    digest = hashlib.sha256()
+    for name in sorted(paths):
+        digest.update(name.encode())
+        with open(paths[name], 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+class ModelBundle:
+    """Bir model sürümünün tüm artefaktları, tahmincileri ve config'i
+
+    Oluşturulduktan sonra değiştirilmez; yeniden yüklemede yeni bir paket
+    kurulur ve etkin paket tek bir referans atamasıyla değiştirilir. İstekler
+    başta aldıkları paketi sonuna kadar kullanır, böylece farklı sürümlerin
+    artefaktları hiçbir zaman karışmaz.
+    """
+
+    def __init__(self, version, config, artifacts, engine, load_report, seasonal_weather=None):
+        self.version = version
+        self.config = config
+        self.features = list(config.get('features', []))
+        # YEAR_NORMALIZED için eğitim verisinin yıl aralığı
+        self.min_year = int(config.get('min_year', DEFAULT_YEAR_RANGE[0]))
+        self.max_year = int(config.get('max_year', DEFAULT_YEAR_RANGE[1]))
+        self.engine = engine
+        self.load_report = load_report
+
+        # Düz paketten yüklemede joblib modelleri yoktur (None), tahminciler hazır gelir
+        self.model_cancelled = artifacts.get('model_cancelled')
+        self.model_code = artifacts.get('model_code')
+        self.model_delay = artifacts.get('model_delay')
+        self.imputer = artifacts['imputer']
+        self.scaler = artifacts['scaler']
+        self.imputer_delay = artifacts['imputer_delay']
+        self.scaler_delay = artifacts['scaler_delay']
+        self.airline_encoder = artifacts['airline_encoder']
+        self.city_encoder = artifacts['city_encoder']
+        # Bellek eşlemeli rota popülerliği / havayolu güvenilirliği tabloları (yoksa None)
+        self.route_popularity = artifacts.get('route_popularity')
+        self.airline_reliability = artifacts.get('airline_reliability')
+
+        # Encoder sınıflarından kurulan sözlük tabanlı kodlayıcılar
+        self.airline_index = LabelIndex(self.airline_encoder.classes_, 'airline')
+        self.city_index = LabelIndex(self.city_encoder.classes_, 'city')
+
+        # Ham özellik alıp olasılık döndüren tahminciler (derlenmiş motor veya sklearn yolu)
+        compile_start = time.perf_counter()
+        predictors = artifacts.get('predictors')
+        if predictors is None:
+            self.cancel_predictor = build_predictor(self.model_cancelled, self.imputer, self.scaler, engine)
+            self.code_predictor = build_predictor(self.model_code, self.imputer, self.scaler, engine)
+            self.delay_predictor = build_predictor(self.model_delay, self.imputer_delay, self.scaler_delay, engine)
+        else:
+            self.cancel_predictor = predictors['cancelled']
+            self.code_predictor = predictors['cancel_code']
+            self.delay_predictor = predictors['delay']
+        self.load_report['compile_ms'] = round((time.perf_counter() - compile_start) * 1000, 2)
+
+        # Tek istek özellik vektörlerini üreten plan (tarih tablosu ve mevsimsel profiller önceden hesaplanır)
+        self.feature_plan = FeaturePlan(self.min_year, self.max_year, self.route_popularity_log,
+                                        self.airline_reliability_rate, seasonal_weather)
+
+    def route_popularity_log(self, org, dst):
+        """Kodlanmış kalkış/varış için ROUTE_POPULARITY_LOG (tek değer veya dizi)"""
+        return lookup(self.route_popularity, DEFAULT_ROUTE_POPULARITY_LOG, org, dst)
+
+    def airline_reliability_rate(self, air):
+        """Kodlanmış havayolu için AIRLINE_RELIABILITY (tek değer veya dizi)"""
+        return lookup(self.airline_reliability, DEFAULT_AIRLINE_RELIABILITY, air)
+
+    def describe(self):
+        """Sürüm ve config özetini döndürür"""
+        return {
+            'version': self.version,
+            'engine': self.engine,
+            'format': self.load_report.get('format'),
+            'features': len(self.features),
+            'best_threshold': self.config.get('best_threshold'),
+            'min_year': self.config.get('min_year'),
+            'max_year': self.config.get('max_year'),
+            'lookup_tables': self.route_popularity is not None and self.airline_reliability is not None,
+            'loaded_at': self.load_report.get('loaded_at')
+        }
+
+
+def validate_config(config, feature_order, n_features):
+    """Config'teki özellik kümesinin API'nin ürettiği özelliklerle uyuştuğunu doğrular"""
+    features = config.get('features')
+    if features is None:
+        return
+    if set(features) != set(feature_order):
+        missing = sorted(set(features) ^ set(feature_order))
+        raise ValueError(f"Config özellikleri API ile uyuşmuyor: {missing}")
+    if list(features) != list(feature_order):
+        raise ValueError("Config özellik sırası API'nin özellik sırasından farklı")
+    if len(features) != n_features:
+        raise ValueError(f"Config {len(features)} özellik içeriyor, imputer {n_features} bekliyor")
+
+
+def validate_lookup_tables(artifacts):
+    """Tabloların encoder sınıf sayılarıyla uyuştuğunu doğrular"""
+    route_popularity = artifacts.get('route_popularity')
+    airline_reliability = artifacts.get('airline_reliability')
+    n_cities = len(artifacts['city_encoder'].classes_)
+    if route_popularity is not None and route_popularity.shape != (n_cities, n_cities):
+        raise ValueError(f"Rota tablosu boyutu {route_popularity.shape} şehir kodlayıcısıyla uyuşmuyor")
+    if airline_reliability is not None and airline_reliability.shape != (len(artifacts['airline_encoder'].classes_),):
+        raise ValueError(f"Havayolu tablosu boyutu {airline_reliability.shape} havayolu kodlayıcısıyla uyuşmuyor")
+
+
+def warm_up(bundle, batch_sizes=(1, 64)):
+    """Tahmincileri imputer istatistiklerinden oluşan satırlarla önceden çalıştırır
+
+    İlk gerçek isteğin tembel başlatma (bellek eşleme, önbellek ısınması)
+    maliyetini ödememesi için paket etkinleştirilmeden önce çağrılır.
+    """
+    start = time.perf_counter()
+    pairs = [(bundle.cancel_predictor, bundle.imputer),
+             (bundle.code_predictor, bundle.imputer),
+             (bundle.delay_predictor, bundle.imputer_delay)]
+    for predictor, imputer in pairs:
+        row = np.asarray(imputer.statistics_, dtype=np.float64)
+        for size in batch_sizes:
+            proba = predictor.predict_proba(np.tile(row, (size, 1)))
+            if not np.all(np.isfinite(proba)):
+                raise ValueError("Isınma tahmini geçersiz olasılık üretti")
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def flat_bundle_path(paths):
+    """Model klasöründeki düz paketin yolu; yoksa veya joblib artefaktlarından eskiyse None
+
+    Yeniden eğitilip dışa aktarılmamış modellerin yerine eski paketin
+    sunulmaması için artefaktların değişiklik zamanlarına bakılır.
+    """
+    directory = os.path.dirname(paths['config'])
+    path = os.path.join(directory, FLAT_BUNDLE_FILE)
+    if not os.path.exists(path):
+        return None
+    sources = list(paths.values()) + [os.path.join(directory, name)
+                                      for name in (ROUTE_POPULARITY_FILE, AIRLINE_RELIABILITY_FILE)]
+    newest = max((os.path.getmtime(source) for source in sources if os.path.exists(source)), default=0)
+    if newest > os.path.getmtime(path):
+        logger.warning(f"{path} joblib artefaktlarından eski, joblib artefaktları yükleniyor")
+        return None
+    return path
+
+
+def finish_bundle(version, config, artifacts, engine, load_report, seasonal_weather, start):
+    """Paketi kurar, ısıtır ve yükleme raporunu tamamlar"""
+    bundle = ModelBundle(version, config, artifacts, engine, load_report, seasonal_weather)
+    load_report['warm_up_ms'] = warm_up(bundle)
+    load_report['total_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return bundle
+
+
+def load_flat_bundle(path, feature_order, seasonal_weather=None):
+    """Düz paketten (flat_bundle) ModelBundle kurar; pickle açılmaz, sklearn/xgboost içe aktarılmaz"""
+    start = time.perf_counter()
+    header, artifacts = read_bundle(path)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    config = header['config']
+    validate_config(config, feature_order, len(artifacts['imputer'].statistics_))
+    validate_lookup_tables(artifacts)
+    artifacts['predictors'] = {name: artifacts.pop(name) for name in ('cancelled', 'cancel_code', 'delay')}
+
+    load_report = {
+        'imports_ms': 0.0,
+        'artifacts_ms': {'flat_bundle': round(load_ms, 2)},
+        'parallel_load_ms': round(load_ms, 2),
+        'engine': 'compiled',
+        'format': 'flat',
+        'loaded_at': datetime.now().isoformat(timespec='seconds')
+    }
+    return finish_bundle(header['version'], config, artifacts, 'compiled', load_report, seasonal_weather, start)
+
+
+def load_bundle(paths, feature_order, engine='compiled', workers=4, seasonal_weather=None, model_format='auto'):
+    """Artefaktları paralel yükleyip doğrulanmış ve ısıtılmış bir ModelBundle kurar
+
+    `seasonal_weather` ay numarasıyla indekslenen mevsimsel hava durumu
+    profilleridir (0. eleman kullanılmaz); özellik planına derlenir.
+    `model_format` 'auto' ise derlenmiş motorda güncel bir düz paket varsa o
+    kullanılır; 'flat' düz paketi, 'joblib' pickle artefaktlarını zorunlu kılar.
+    """
+    if model_format == 'flat':
+        if engine != 'compiled':
+            raise ValueError("Düz model paketi yalnızca derlenmiş motorla kullanılabilir")
+        return load_flat_bundle(os.path.join(os.path.dirname(paths['config']), FLAT_BUNDLE_FILE),
+                                feature_order, seasonal_weather)
+    if model_format == 'auto' and engine == 'compiled':
+        path = flat_bundle_path(paths)
+        if path is not None:
+            return load_flat_bundle(path, feature_order, seasonal_weather)
+
+    start = time.perf_counter()
+    import_model_libraries()
+    imports_ms = (time.perf_counter() - start) * 1000
+
+    load_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(load_artifact, path) for name, path in paths.items()}
+        loaded = {name: future.result() for name, future in futures.items()}
+    load_ms = (time.perf_counter() - load_start) * 1000
+
+    artifacts = {name: item[0] for name, item in loaded.items()}
+    config = dict(artifacts.pop('config'))
+    validate_config(config, feature_order, len(artifacts['imputer'].statistics_))
+
+    # Tablolar model_config.joblib ile aynı klasörde; eski model klasörlerinde bulunmayabilir
+    artifacts['route_popularity'], artifacts['airline_reliability'] = load_lookup_tables(
+        os.path.dirname(paths['config']))
+    validate_lookup_tables(artifacts)
+
+    load_report = {
+        'imports_ms': round(imports_ms, 2),
+        'artifacts_ms': {name: round(item[1], 2) for name, item in loaded.items()},
+        'parallel_load_ms': round(load_ms, 2),
+        'engine': engine,
+        'format': 'joblib',
+        'loaded_at': datetime.now().isoformat(timespec='seconds')
+    }
+    return finish_bundle(bundle_version(paths, config), config, artifacts, engine, load_report,
+                         seasonal_weather, start)
@@ -0,0 +1,195 @@
+import argparse
+import os
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Bir iş parçacığının tek seferde ürettiği sentetik satır sayısı
+GENERATE_BLOCK_ROWS = 65_536
+
+
+def target_counts(class_counts, sampling_strategy='auto'):
+    """Sınıf başına üretilecek sentetik satır sayısı (imblearn SMOTE kurallarıyla aynı)
+
+    `sampling_strategy` float ise (yalnızca iki sınıf) azınlık sınıfı çoğunluğun
+    bu oranına çıkarılır; 'auto' ise çoğunluk dışındaki tüm sınıflar çoğunluk
+    sınıfının sayısına tamamlanır.
+    """
+    class_counts = {key: int(value) for key, value in class_counts.items()}
+    majority = max(class_counts, key=class_counts.get)
+    n_majority = class_counts[majority]
+    if sampling_strategy == 'auto':
+        return {key: n_majority - value for key, value in sorted(class_counts.items()) if key != majority}
+    if len(class_counts) != 2:
+        raise ValueError("Oran olarak sampling_strategy yalnızca iki sınıflı hedefte kullanılabilir")
+    targets = {key: int(n_majority * sampling_strategy - value)
+               for key, value in sorted(class_counts.items()) if key != majority}
+    if any(n_new <= 0 for n_new in targets.values()):
+        raise ValueError("sampling_strategy azınlık sınıfını küçültmeyi gerektiriyor; oranı artırın")
+    return targets
+
+
+def count_weights(class_counts, sampling_strategy='auto'):
+    """Ağırlık modu: her sınıfın satırlarına, aşırı örnekleme sonrası sınıf büyüklüğünü veren ağırlık"""
+    targets = target_counts(class_counts, sampling_strategy)
+    return {key: (value + max(targets.get(key, 0), 0)) / value for key, value in class_counts.items()}
+
+
+def class_counts_of(y):
+    classes, counts = np.unique(y, return_counts=True)
+    return dict(zip(classes.tolist(), counts.tolist()))
+
+
+def sample_weights(y, sampling_strategy='auto'):
+    """SMOTE yerine satır ağırlığı kullanan karşılaştırma modu; veri kopyalanmaz"""
+    y = np.asarray(y)
+    weights = count_weights(class_counts_of(y), sampling_strategy)
+    classes = np.array(sorted(weights))
+    return np.array([weights[key] for key in classes.tolist()])[np.searchsorted(classes, y)]
+
+
+def run_blocks(function, blocks, n_jobs):
+    """Blokları iş parçacıklarında çalıştırır (NumPy kopyalama ve aritmetikte GIL'i bırakır)"""
+    if n_jobs == 1 or len(blocks) == 1:
+        return [function(block) for block in blocks]
+    with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        return list(pool.map(function, blocks))
+
+
+def minority_neighbors(X_class, k_neighbors, rows, algorithm='auto', n_jobs=None):
+    """`rows` satırlarının sınıf içindeki (kendisi hariç) en yakın k komşusu
+
+    İndeks yalnızca sınıfın kendi satırlarıyla kurulur ve yalnızca sentetik
+    satır üretiminde kullanılacak satırlar sorgulanır. 'auto' imblearn ile aynı
+    yöntemi seçer (az boyutta kd-tree, aksi halde blok blok paralel kaba kuvvet).
+    """
+    from sklearn.neighbors import NearestNeighbors
+    index = NearestNeighbors(n_neighbors=k_neighbors + 1, algorithm=algorithm, n_jobs=n_jobs).fit(X_class)
+    nearest = index.kneighbors(X_class[rows], return_distance=False)
+    # imblearn ilk komşuyu (satırın kendisi) atar; kopya satırlarda kendisi başka sırada gelebilir
+    if np.array_equal(nearest[:, 0], rows):
+        return nearest[:, 1:]
+    keep = nearest != rows[:, None]
+    keep[keep.all(axis=1), -1] = False
+    return nearest[keep].reshape(len(rows), k_neighbors)
+
+
+def smote_resample(X, y, sampling_strategy='auto', k_neighbors=5, random_state=None,
+                   algorithm='auto', n_jobs=None):
+    """imblearn SMOTE.fit_resample ile aynı sonucu veren, daha hızlı ve daha az bellek kullanan aşırı örnekleme
+
+    Aynı random_state ile aynı satırlar ve adımlar çekilir. Komşu araması yalnızca
+    azınlık sınıfının örneklenen satırları için yapılır, üretim paralel bloklarla;
+    orijinal ve sentetik satırlar ara kopyalar ve vstack yerine baştan
+    ayrılmış tek bir diziye yazılır. pandas girdisi pandas olarak döner.
+    """
+    columns = X.columns if isinstance(X, pd.DataFrame) else None
+    name = y.name if isinstance(y, pd.Series) else None
+    X_values = np.asarray(X)
+    y_values = np.asarray(y)
+    n_jobs = n_jobs or os.cpu_count() or 1
+
+    targets = {key: n_new for key, n_new in target_counts(class_counts_of(y_values), sampling_strategy).items()
+               if n_new > 0}
+    n_rows = len(X_values)
+    X_out = np.empty((n_rows + sum(targets.values()), X_values.shape[1]), dtype=X_values.dtype)
+    y_out = np.empty(len(X_out), dtype=y_values.dtype)
+    X_out[:n_rows] = X_values
+    y_out[:n_rows] = y_values
+
+    offset = n_rows
+    for key, n_new in targets.items():
+        X_class = X_values[y_values == key]
+        # imblearn her sınıf için aynı tohumla yeni bir RandomState kurar
+        rng = random_state if isinstance(random_state, np.random.RandomState) else np.random.RandomState(random_state)
+        sample_indices = rng.randint(low=0, high=len(X_class) * k_neighbors, size=n_new)
+        steps = rng.uniform(size=n_new)[:, np.newaxis]
+        rows = np.floor_divide(sample_indices, k_neighbors)
+        cols = np.mod(sample_indices, k_neighbors)
+
+        sampled = np.unique(rows)
+        neighbors = np.empty((len(X_class), k_neighbors), dtype=np.intp)
+        neighbors[sampled] = minority_neighbors(X_class, k_neighbors, sampled, algorithm, n_jobs)
+
+        def generate(block, offset=offset, X_class=X_class, neighbors=neighbors, rows=rows, cols=cols, steps=steps):
+            # out = x + adım * (komşu - x), sonuç doğrudan çıktı dizisine yazılır
+            out = X_out[offset + block.start:offset + block.stop]
+            base = X_class[rows[block]]
+            np.take(X_class, neighbors[rows[block], cols[block]], axis=0, out=out)
+            out -= base
+            out *= steps[block]
+            out += base
+
+        blocks = [slice(start, min(start + GENERATE_BLOCK_ROWS, n_new)) for start in range(0, n_new, GENERATE_BLOCK_ROWS)]
+        run_blocks(generate, blocks, n_jobs)
+        y_out[offset:offset + n_new] = key
+        offset += n_new
+
+    if columns is not None:
+        X_out = pd.DataFrame(X_out, columns=columns)
+    if name is not None or isinstance(y, pd.Series):
+        y_out = pd.Series(y_out, name=name)
+    return X_out, y_out
+
+
+def measure(function):
+    """Fonksiyonun süresi ve Python/NumPy tahsislerinin tepe değeri (MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {'seconds': round(seconds, 3), 'peak_mb': round(peak / 2 ** 20, 1)}
+
+
+def compare_samplers(X, y, sampling_strategy='auto', k_neighbors=5, random_state=42, n_jobs=None):
+    """imblearn SMOTE, smote_resample ve ağırlık modunun süre/bellek karşılaştırması"""
+    from imblearn.over_sampling import SMOTE
+
+    report = {'rows': int(len(X)), 'features': int(X.shape[1]), 'classes': class_counts_of(y)}
+    reference, report['imblearn'] = measure(lambda: SMOTE(sampling_strategy=sampling_strategy, k_neighbors=k_neighbors,
+                                                          random_state=random_state).fit_resample(X, y))
+    resampled, report['smote_resample'] = measure(lambda: smote_resample(X, y, sampling_strategy, k_neighbors,
+                                                                         random_state, n_jobs=n_jobs))
+    _, report['weights'] = measure(lambda: sample_weights(y, sampling_strategy))
+
+    report['resampled_rows'] = int(len(resampled[0]))
+    report['identical_rows'] = round(float(np.mean(np.all(np.asarray(reference[0]) == np.asarray(resampled[0]), axis=1))), 4)
+    report['saved'] = {
+        'seconds': round(report['imblearn']['seconds'] - report['smote_resample']['seconds'], 3),
+        'peak_mb': round(report['imblearn']['peak_mb'] - report['smote_resample']['peak_mb'], 1)
+    }
+    return report
+
+
+def main():
+    """Eğitim verisinin ölçeklenmiş matrisinde imblearn SMOTE ile bu modülü karşılaştırır"""
+    import json
+    from sklearn.impute import SimpleImputer
+    from sklearn.preprocessing import StandardScaler
+    from flight_ingest import SCHEMAS, ensure_parquet
+    from hyperparam_search import cancel_matrix, delay_matrix
+
+    parser = argparse.ArgumentParser(description="Azınlık sınıfı aşırı örnekleme süre/bellek karşılaştırması")
+    parser.add_argument('data', help="Eğitim CSV'si veya flight_ingest ile oluşturulmuş Parquet dosyası")
+    parser.add_argument('--kind', choices=sorted(SCHEMAS), required=True)
+    parser.add_argument('--sample', type=float, default=1.0, help="Kullanılacak satır oranı")
+    parser.add_argument('--n-jobs', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    path = args.data if args.data.endswith('.parquet') else ensure_parquet(args.data, SCHEMAS[args.kind])
+    build = cancel_matrix if args.kind == 'cancel' else delay_matrix
+    X, y = build(path, 500_000, args.sample, args.seed)
+    X = StandardScaler().fit_transform(SimpleImputer(strategy='median').fit_transform(X))
+
+    # Eğitim betiklerindeki SMOTE ayarları
+    settings = {'cancel': (0.15, 3), 'delay': ('auto', 5)}[args.kind]
+    print(json.dumps(compare_samplers(X, y, *settings, random_state=args.seed, n_jobs=args.n_jobs), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+from metrics import counter
+
+# Önbellek olay sayaçları (hit, miss, eviction, expired, shared, invalidation)
+CACHE_EVENTS = counter('result_cache_events_total', 'Tahmin sonucu önbelleği olayları', ('event',))
+
+
+class _Flight:
+    """Aynı anahtar için süren tek hesaplama; bekleyen istekler sonucunu paylaşır"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResultCache:
+    """Boyut sınırlı, TTL'li LRU sonuç önbelleği ve singleflight tekilleştirme
+
+    Aynı anahtar için eşzamanlı gelen istekler tek bir hesaplamayı bekler.
+    `invalidate` (örneğin modeller yeniden yüklendiğinde) tüm kayıtları siler;
+    o sırada süren hesaplamaların sonuçları önbelleğe yazılmaz.
+    """
+
+    def __init__(self, max_size=10000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.in_flight = {}
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def get_or_compute(self, key, compute, should_store=None):
+        """Önbellekteki değeri döndürür ya da hesaplar; (değer, bu çağrıda hesaplandı mı) döndürür"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self.entries.move_to_end(key)
+                    CACHE_EVENTS.inc(event='hit')
+                    return value, False
+                del self.entries[key]
+                CACHE_EVENTS.inc(event='expired')
+
+            flight = self.in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self.in_flight[key] = flight
+                generation = self.generation
+                CACHE_EVENTS.inc(event='miss')
+            else:
+                CACHE_EVENTS.inc(event='shared')
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, False
+
+        try:
+            flight.value = compute()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+                storable = (flight.error is None and generation == self.generation and
+                            (should_store is None or should_store(flight.value)))
+                if storable:
+                    self.entries[key] = (flight.value, time.monotonic() + self.ttl)
+                    while len(self.entries) > self.max_size:
+                        self.entries.popitem(last=False)
+                        CACHE_EVENTS.inc(event='eviction')
+            flight.done.set()
+
+        return flight.value, True
+
+    def invalidate(self):
+        """Tüm kayıtları siler ve süren hesaplamaların sonuçlarını geçersiz kılar"""
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
+        CACHE_EVENTS.inc(event='invalidation')
+
+    def stats(self):
+        """Önbellek boyutu ve olay sayaçlarını döndürür"""
+        with self.lock:
+            size = len(self.entries)
+            in_flight = len(self.in_flight)
+        events = {labels['event']: value for labels, value in CACHE_EVENTS.snapshot()}
+        return {
+            'size': size,
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl,
+            'in_flight': in_flight,
+            'hits': events.get('hit', 0),
+            'misses': events.get('miss', 0),
+            'shared': events.get('shared', 0),
+            'evictions': events.get('eviction', 0),
+            'expired': events.get('expired', 0),
+            'invalidations': events.get('invalidation', 0)
+        }
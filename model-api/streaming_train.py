@@ -0,0 +1,485 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import warnings
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from xgboost import XGBClassifier
+from flight_features import CANCEL_FEATURES, city_codes, delay_class, derived_features, save_lookup_tables
+from flight_ingest import CHUNK_ROWS, SCHEMAS, ensure_parquet, iter_batches
+from oversampling import count_weights
+from weather_store import WEATHER_FIELDS
+
+# cancel_model.py / delay_model.py ile aynı model parametreleri (n_estimators -> num_boost_round)
+CANCEL_PARAMS = {
+    'scale_pos_weight': 4.0, 'max_depth': 4, 'learning_rate': 0.05, 'subsample': 0.8,
+    'colsample_bytree': 0.8, 'reg_alpha': 2.0, 'reg_lambda': 2.0, 'min_child_weight': 20,
+    'gamma': 2.0, 'objective': 'binary:logistic', 'eval_metric': 'logloss', 'random_state': 42
+}
+CANCEL_ROUNDS = 150
+
+CANCEL_CODE_PARAMS = {
+    'n_estimators': 100, 'max_depth': 4, 'learning_rate': 0.1, 'subsample': 0.8,
+    'colsample_bytree': 0.8, 'reg_alpha': 0.1, 'reg_lambda': 0.1, 'objective': 'multi:softprob',
+    'eval_metric': 'mlogloss', 'random_state': 42, 'n_jobs': -1
+}
+
+DELAY_PARAMS = {
+    'max_depth': 10, 'learning_rate': 0.1, 'subsample': 0.8, 'colsample_bytree': 0.8,
+    'random_state': 42, 'eval_metric': 'mlogloss'
+}
+DELAY_ROUNDS = 100
+
+# cancel_model.py'deki SMOTE(sampling_strategy=0.15) yerine kullanılan azınlık/çoğunluk oranı
+CANCEL_MINORITY_RATIO = 0.15
+
+# Gecikme modelinin imputer/scaler sütunları (delay_model.py'deki DataFrame sırası)
+DELAY_COLUMNS = ['CRS_DEP_TIME', 'DISTANCE', *WEATHER_FIELDS, 'DEP_TIME', 'DEP_DELAY',
+                 'YEAR', 'MONTH', 'DAY', 'AIR', 'ORG', 'DST']
+# Gecikme modelinin kullandığı sütunlar (hedef ve DEP_TIME çıkarılmış ilk 17 sütun)
+DELAY_MODEL_COLUMNS = [name for name in DELAY_COLUMNS if name not in ('DEP_DELAY', 'DEP_TIME')]
+
+
+class StreamingStats:
+    """Parça parça güncellenen medyan imputer + StandardScaler istatistikleri
+
+    Medyan, sütun başına birleştirilen değer sayımlarından tam olarak hesaplanır
+    (uçuş verisinin sütunları sınırlı sayıda farklı değer içerir). Ortalama ve
+    varyans, eksik değerlerin medyanla doldurulmuş hali için kaydırılmış
+    toplamlardan türetilir; böylece tek geçiş yeterlidir.
+    """
+
+    def __init__(self, n_features):
+        self.n_rows = 0
+        self.shift = None
+        self.sums = np.zeros(n_features)
+        self.squares = np.zeros(n_features)
+        self.missing = np.zeros(n_features, dtype=np.int64)
+        self.values = [np.empty(0) for _ in range(n_features)]
+        self.counts = [np.empty(0, dtype=np.int64) for _ in range(n_features)]
+
+    def update(self, X):
+        missing = np.isnan(X)
+        if self.shift is None:
+            # Büyük değerlerde kareler toplamının hassasiyet kaybını önlemek için ilk parçanın ortalaması
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                self.shift = np.nan_to_num(np.nanmean(X, axis=0)) if len(X) else np.zeros(X.shape[1])
+        centered = np.where(missing, 0.0, X - self.shift)
+        self.sums += centered.sum(axis=0)
+        self.squares += (centered ** 2).sum(axis=0)
+        self.missing += missing.sum(axis=0)
+        self.n_rows += len(X)
+
+        for j in range(X.shape[1]):
+            values, counts = np.unique(X[~missing[:, j], j], return_counts=True)
+            merged, inverse = np.unique(np.concatenate([self.values[j], values]), return_inverse=True)
+            self.counts[j] = np.bincount(inverse, weights=np.concatenate([self.counts[j], counts]),
+                                         minlength=len(merged)).astype(np.int64)
+            self.values[j] = merged
+
+    def medians(self, feature_names):
+        medians = np.empty(len(self.values))
+        for j, (values, counts) in enumerate(zip(self.values, self.counts)):
+            total = counts.sum()
+            if total == 0:
+                # SimpleImputer bu sütunu sessizce atardı; API'nin özellik sırası bozulmasın diye hata verilir
+                raise ValueError(f"{feature_names[j]} sütununda hiç değer yok, medyan hesaplanamaz")
+            cumulative = np.cumsum(counts)
+            lower = values[np.searchsorted(cumulative, (total - 1) // 2, side='right')]
+            upper = values[np.searchsorted(cumulative, total // 2, side='right')]
+            medians[j] = (lower + upper) / 2
+        return medians
+
+    def mean_and_var(self, medians):
+        """Medyanla doldurulmuş verinin sütun ortalaması ve (ddof=0) varyansı"""
+        delta = medians - self.shift
+        sums = self.sums + self.missing * delta
+        squares = self.squares + self.missing * delta ** 2
+        mean = sums / self.n_rows
+        return self.shift + mean, np.maximum(squares / self.n_rows - mean ** 2, 0.0)
+
+    def fitted_transformers(self, feature_names):
+        """Kaydedilip API tarafından yüklenebilecek SimpleImputer ve StandardScaler döndürür
+
+        sklearn iç alanlarının doğru kurulması için ikisi de tek satırla fit edilir,
+        ardından akış istatistikleri üzerine yazılır.
+        """
+        medians = self.medians(feature_names)
+        mean, var = self.mean_and_var(medians)
+
+        row = pd.DataFrame([medians], columns=feature_names)
+        imputer = SimpleImputer(strategy='median').fit(row)
+        imputer.statistics_ = medians
+
+        scaler = StandardScaler().fit(row)
+        scaler.mean_ = mean
+        scaler.var_ = var
+        scaler.scale_ = np.where(var > 0, np.sqrt(var), 1.0)
+        scaler.n_samples_seen_ = self.n_rows
+        return imputer, scaler
+
+
+def transform(X, imputer, scaler):
+    """Parçaya imputer ve scaler uygular (sklearn transform ile aynı sonuç, DataFrame'siz)"""
+    X = np.where(np.isnan(X), imputer.statistics_, X)
+    return (X - scaler.mean_) / scaler.scale_
+
+
+class ChunkIter(xgb.DataIter):
+    """Parquet parçalarını özelliklere dönüştürüp XGBoost'a sırayla veren veri yineleyicisi"""
+
+    def __init__(self, batches, cache_prefix):
+        # batches: her çağrıda (X, y, ağırlık) üçlülerini yeniden üreten fonksiyon
+        self.batches = batches
+        self.iterator = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self.iterator is None:
+            self.iterator = iter(self.batches())
+        try:
+            X, y, weight = next(self.iterator)
+        except StopIteration:
+            return False
+        input_data(data=X, label=y, weight=weight)
+        return True
+
+    def reset(self):
+        self.iterator = None
+
+
+def test_mask(n_rows, chunk_index, test_size, seed):
+    """Parça içindeki test satırları; her geçişte aynı parçada aynı sonucu verir"""
+    return np.random.default_rng([seed, chunk_index]).random(n_rows) < test_size
+
+
+def encode(values, classes):
+    """Categorical sütunu sıralı sınıf listesine göre LabelEncoder koduna çevirir"""
+    lookup = np.searchsorted(classes, np.asarray(values.cat.categories, dtype=object))
+    return lookup[values.cat.codes.to_numpy()]
+
+
+def route_destination(frame, origins):
+    """Varış şehrini rota tablosu için kalkış şehri sınıflarına göre kodlar (API'deki city_index gibi)"""
+    values = frame['DEST_CITY_NAME']
+    return city_codes(values.cat.categories, origins)[values.cat.codes.to_numpy()]
+
+
+def category_classes(path, columns, batch_rows):
+    """Sütunlardaki farklı değerleri sıralı (LabelEncoder.classes_ ile aynı) olarak döndürür"""
+    seen = {name: set() for name in columns}
+    for frame in iter_batches(path, columns, batch_rows):
+        for name in columns:
+            seen[name].update(frame[name].cat.remove_unused_categories().cat.categories)
+    return {name: np.array(sorted(values), dtype=object) for name, values in seen.items()}
+
+
+def label_encoder(classes):
+    encoder = LabelEncoder()
+    encoder.classes_ = classes
+    return encoder
+
+
+def booster_params(params, max_bin=256):
+    """XGBClassifier parametrelerini xgb.train parametrelerine (hist) çevirir"""
+    converted = {key: value for key, value in params.items() if key not in ('random_state', 'n_estimators', 'n_jobs')}
+    converted.update(tree_method='hist', seed=params.get('random_state', 0), max_bin=max_bin)
+    return converted
+
+
+def cancel_positive_weight(class_counts):
+    """SMOTE(sampling_strategy=0.15) ile aynı azınlık/çoğunluk oranını veren iptal sınıfı ağırlığı"""
+    return count_weights(dict(enumerate(class_counts)), CANCEL_MINORITY_RATIO)[1]
+
+
+def balanced_class_weights(class_counts):
+    """SMOTE'un tüm sınıfları çoğunluk sınıfına eşitlemesine karşılık gelen sınıf ağırlıkları"""
+    weights = count_weights(dict(enumerate(class_counts)))
+    return np.array([weights[key] for key in range(len(class_counts))])
+
+
+def train_external(params, rounds, batches, cache_dir, max_bin=256):
+    """Dış bellek (ExtMemQuantileDMatrix, hist) ile eğitip XGBClassifier döndürür"""
+    start = time.perf_counter()
+    iterator = ChunkIter(batches, os.path.join(cache_dir, 'xgb'))
+    matrix = xgb.ExtMemQuantileDMatrix(iterator, max_bin=max_bin)
+    booster = xgb.train(booster_params(params, max_bin), matrix, num_boost_round=rounds)
+
+    # API ve tree_engine aynı sklearn arayüzünü beklediği için booster XGBClassifier'a yüklenir
+    model = XGBClassifier()
+    model.load_model(bytearray(booster.save_raw('json')))
+    print(f"Dış bellek eğitimi: {matrix.num_row()} satır, {time.perf_counter() - start:.1f} sn")
+    return model
+
+
+def cancel_context(path, batch_rows):
+    """İptal özelliklerinin veri setinin tamamına bağlı kısımları (ilk geçiş)"""
+    classes = category_classes(path, ['AIRLINE_CODE', 'ORIGIN_CITY_NAME', 'DEST_CITY_NAME', 'CANCELLATION_CODE'],
+                               batch_rows)
+    airlines, origins, dests = classes['AIRLINE_CODE'], classes['ORIGIN_CITY_NAME'], classes['DEST_CITY_NAME']
+    cancel_codes = np.array(sorted(set(classes['CANCELLATION_CODE']) | {'N'}), dtype=object)
+
+    min_year, max_year = None, None
+    # Rota tablosunun iki ekseni de API'nin şehir kodlayıcısı (kalkış şehirleri) ile kodlanır
+    route_counts = np.zeros(len(origins) * len(origins), dtype=np.int64)
+    cancel_sums = np.zeros(len(airlines))
+    flight_counts = np.zeros(len(airlines))
+    columns = ['FL_DATE', 'AIRLINE_CODE', 'ORIGIN_CITY_NAME', 'DEST_CITY_NAME', 'CANCELLED']
+    for frame in iter_batches(path, columns, batch_rows):
+        years = frame['FL_DATE'].dt.year
+        min_year = years.min() if min_year is None else min(min_year, years.min())
+        max_year = years.max() if max_year is None else max(max_year, years.max())
+        air = encode(frame['AIRLINE_CODE'], airlines)
+        routes = encode(frame['ORIGIN_CITY_NAME'], origins) * len(origins) + route_destination(frame, origins)
+        route_counts += np.bincount(routes, minlength=len(route_counts))
+        cancel_sums += np.bincount(air, weights=frame['CANCELLED'].to_numpy(float), minlength=len(airlines))
+        flight_counts += np.bincount(air, minlength=len(airlines))
+
+    return {
+        'airlines': airlines, 'origins': origins, 'dests': dests, 'cancel_codes': cancel_codes,
+        'min_year': int(min_year), 'max_year': int(max_year),
+        # flight_features.route_popularity_table / airline_reliability_table ile aynı float32 tablolar
+        'route_popularity': np.log1p(route_counts).astype(np.float32).reshape(len(origins), len(origins)),
+        'airline_reliability': (cancel_sums / np.maximum(flight_counts, 1)).astype(np.float32)
+    }
+
+
+def cancel_features(frame, context):
+    """cancel_model.py ile aynı 29 ham özelliği (CANCEL_FEATURES sırasıyla) hesaplar"""
+    dates = frame['FL_DATE']
+    air = encode(frame['AIRLINE_CODE'], context['airlines'])
+    org = encode(frame['ORIGIN_CITY_NAME'], context['origins'])
+    dst = encode(frame['DEST_CITY_NAME'], context['dests'])
+
+    columns = {name: frame[name].to_numpy(float) for name in ['CRS_DEP_TIME', 'CRS_ARR_TIME', 'DISTANCE', *WEATHER_FIELDS]}
+    columns.update({
+        'MONTH': dates.dt.month.to_numpy(float),
+        'DAY': dates.dt.day.to_numpy(float),
+        'DAY_OF_WEEK': dates.dt.dayofweek.to_numpy(float),
+        'AIR': air, 'ORG': org, 'DST': dst,
+        'ROUTE_POPULARITY_LOG': context['route_popularity'][org, route_destination(frame, context['origins'])].astype(float),
+        'AIRLINE_RELIABILITY': context['airline_reliability'][air].astype(float)
+    })
+    columns.update(derived_features(dates.dt.year.to_numpy(), columns['MONTH'], columns['DAY'],
+                                    columns['CRS_DEP_TIME'], columns['DISTANCE'], columns,
+                                    context['min_year'], context['max_year']))
+    return np.column_stack([columns[name] for name in CANCEL_FEATURES]).astype(float)
+
+
+def train_cancel(path, output_dir, cache_dir, batch_rows, test_size, seed):
+    """İptal ve iptal kodu modellerini veri setini belleğe almadan eğitir"""
+    context = cancel_context(path, batch_rows)
+    columns = list(SCHEMAS['cancel'])
+
+    def chunks():
+        for index, frame in enumerate(iter_batches(path, columns, batch_rows)):
+            codes = encode(frame['CANCELLATION_CODE'].cat.add_categories('N').fillna('N'), context['cancel_codes'])
+            yield (cancel_features(frame, context), frame['CANCELLED'].to_numpy(np.int8), codes,
+                   test_mask(len(frame), index, test_size, seed))
+
+    # İkinci geçiş: imputer/scaler istatistikleri (cancel_model.py gibi yalnızca eğitim satırları),
+    # sınıf sayıları ve (küçük) iptal edilmiş satırlar
+    stats = StreamingStats(len(CANCEL_FEATURES))
+    class_counts = np.zeros(2, dtype=np.int64)
+    cancelled_rows = {False: ([], []), True: ([], [])}
+    for X, y, codes, test in chunks():
+        stats.update(X[~test])
+        class_counts += np.bincount(y[~test], minlength=2)
+        for is_test in (False, True):
+            rows = (y == 1) & (test == is_test)
+            cancelled_rows[is_test][0].append(X[rows])
+            cancelled_rows[is_test][1].append(codes[rows])
+    imputer, scaler = stats.fitted_transformers(CANCEL_FEATURES)
+
+    # SMOTE yerine azınlık sınıfı ağırlığı (aynı azınlık/çoğunluk oranı)
+    positive_weight = cancel_positive_weight(class_counts)
+    print(f"Eğitim sınıf dağılımı: {class_counts.tolist()}, iptal ağırlığı: {positive_weight:.2f}")
+
+    def train_batches():
+        for X, y, _, test in chunks():
+            keep = ~test
+            yield (transform(X[keep], imputer, scaler), y[keep],
+                   np.where(y[keep] == 1, positive_weight, 1.0))
+
+    model_cancelled = train_external(CANCEL_PARAMS, CANCEL_ROUNDS, train_batches, cache_dir)
+
+    # İptal kodu modeli yalnızca iptal edilmiş satırlarla eğitilir; bu alt küme belleğe sığar
+    X_code = transform(np.concatenate(cancelled_rows[False][0]), imputer, scaler)
+    y_code = np.concatenate(cancelled_rows[False][1])
+    code_classes, y_code = np.unique(y_code, return_inverse=True)
+    if len(code_classes) != code_classes.max() + 1:
+        raise ValueError(f"İptal kodu sınıfları ardışık değil: {code_classes.tolist()}")
+    model_cancel_code = XGBClassifier(**CANCEL_CODE_PARAMS).fit(X_code, y_code)
+
+    # Test parçaları üzerinde değerlendirme
+    y_test, proba_test = [], []
+    for X, y, _, test in chunks():
+        y_test.append(y[test])
+        proba_test.append(model_cancelled.predict_proba(transform(X[test], imputer, scaler))[:, 1])
+    y_test, proba_test = np.concatenate(y_test), np.concatenate(proba_test)
+    print(f"İptal modeli test doğruluğu: {accuracy_score(y_test, proba_test >= 0.5):.3f}, "
+          f"ROC-AUC: {roc_auc_score(y_test, proba_test):.4f}")
+    X_code_test = np.concatenate(cancelled_rows[True][0])
+    if len(X_code_test):
+        code_pred = model_cancel_code.predict(transform(X_code_test, imputer, scaler))
+        print(f"İptal kodu test doğruluğu: {accuracy_score(np.concatenate(cancelled_rows[True][1]), code_pred):.3f}")
+
+    artifacts = {
+        'model_cancelled': model_cancelled,
+        'model_cancel_code': model_cancel_code,
+        'imputer': imputer,
+        'scaler': scaler,
+        'label_enc_airline': label_encoder(context['airlines']),
+        'label_enc_origin': label_encoder(context['origins']),
+        'label_enc_dest': label_encoder(context['dests']),
+        'label_enc_cancel_code': label_encoder(context['cancel_codes']),
+        'model_config': {
+            'features': list(CANCEL_FEATURES),
+            'best_threshold': 0.5,
+            'min_year': context['min_year'],
+            'max_year': context['max_year']
+        }
+    }
+    save_artifacts(artifacts, output_dir)
+    save_lookup_tables(output_dir, context['route_popularity'], context['airline_reliability'])
+
+
+def delay_frames(path, batch_rows):
+    """İptal edilmemiş uçuşları parça parça döndürür"""
+    for frame in iter_batches(path, list(SCHEMAS['delay']), batch_rows):
+        yield frame[frame['CANCELLED'].to_numpy() == 0]
+
+
+def delay_classes(path, batch_rows):
+    return category_classes(path, ['AIRLINE_CODE', 'ORIGIN_CITY', 'DEST_CITY'], batch_rows)
+
+
+def delay_features(frame, classes):
+    """delay_model.py ile aynı 19 ham sütunu (DELAY_COLUMNS sırasıyla, hedef dahil) hesaplar"""
+    dates = frame['FL_DATE']
+    columns = {name: frame[name].to_numpy(float) for name in SCHEMAS['delay'] if name in DELAY_COLUMNS}
+    columns.update({
+        'YEAR': dates.dt.year.to_numpy(float),
+        'MONTH': dates.dt.month.to_numpy(float),
+        'DAY': dates.dt.day.to_numpy(float),
+        'AIR': encode(frame['AIRLINE_CODE'], classes['AIRLINE_CODE']),
+        'ORG': encode(frame['ORIGIN_CITY'], classes['ORIGIN_CITY']),
+        'DST': encode(frame['DEST_CITY'], classes['DEST_CITY'])
+    })
+    return np.column_stack([columns[name] for name in DELAY_COLUMNS]).astype(float)
+
+
+def train_delay(path, output_dir, cache_dir, batch_rows, test_size, seed):
+    """Gecikme modelini veri setini belleğe almadan eğitir"""
+    classes = delay_classes(path, batch_rows)
+
+    def raw_chunks():
+        for index, frame in enumerate(delay_frames(path, batch_rows)):
+            X = delay_features(frame, classes)
+            yield X, test_mask(len(X), index, test_size, seed)
+
+    # delay_model.py ile aynı: imputer/scaler tüm sütunlara (hedef dahil) bölmeden önce uygulanır
+    stats = StreamingStats(len(DELAY_COLUMNS))
+    for X, _ in raw_chunks():
+        stats.update(X)
+    imputer, scaler = stats.fitted_transformers(DELAY_COLUMNS)
+
+    target = DELAY_COLUMNS.index('DEP_DELAY')
+    model_columns = [DELAY_COLUMNS.index(name) for name in DELAY_MODEL_COLUMNS]
+
+    def chunks():
+        for X, test in raw_chunks():
+            scaled = transform(X, imputer, scaler)
+            # delay_model.py ile aynı: sınıflar ölçeklenmiş DEP_DELAY üzerinden hesaplanır
+            yield scaled[:, model_columns], delay_class(scaled[:, target]), test
+
+    class_counts = np.zeros(4, dtype=np.int64)
+    for _, y, test in chunks():
+        class_counts += np.bincount(y[~test], minlength=4)
+    present = np.flatnonzero(class_counts)
+    if not np.array_equal(present, np.arange(len(present))):
+        raise ValueError(f"Gecikme sınıfları ardışık değil: {class_counts.tolist()}")
+    class_counts = class_counts[:len(present)]
+
+    # SMOTE yerine tüm sınıfları çoğunluk sınıfı ağırlığına eşitleyen sınıf ağırlıkları
+    class_weights = balanced_class_weights(class_counts)
+    print(f"Eğitim sınıf dağılımı: {class_counts.tolist()}, ağırlıklar: {np.round(class_weights, 2).tolist()}")
+
+    def train_batches():
+        for X, y, test in chunks():
+            yield X[~test], y[~test], class_weights[y[~test]]
+
+    params = dict(DELAY_PARAMS)
+    if len(class_counts) > 2:
+        params.update(objective='multi:softprob', num_class=len(class_counts))
+    else:
+        params.update(objective='binary:logistic', eval_metric='logloss')
+    model = train_external(params, DELAY_ROUNDS, train_batches, cache_dir)
+
+    correct, total = 0, 0
+    for X, y, test in chunks():
+        correct += int((model.predict(X[test]) == y[test]).sum())
+        total += int(test.sum())
+    print(f"Gecikme modeli test doğruluğu: {correct / max(total, 1):.4f}")
+
+    from imblearn.pipeline import Pipeline as ImbPipeline
+    artifacts = {
+        'model_delay': ImbPipeline([('classifier', model)]),
+        'imputer_delay': imputer,
+        'scaler_delay': scaler,
+        # delay_model.py'de tek encoder sırayla yeniden fit edildiği için son hali varış şehirleridir
+        'label_enc_delay': label_encoder(classes['DEST_CITY'])
+    }
+    save_artifacts(artifacts, output_dir)
+
+
+def save_artifacts(artifacts, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    for name, artifact in artifacts.items():
+        joblib.dump(artifact, os.path.join(output_dir, f'{name}.joblib'))
+    print("Kaydedilen dosyalar:")
+    for name in artifacts:
+        print(f"✅ {name}.joblib")
+
+
+def main():
+    """Eğitim verisini belleğe almadan (dış bellek XGBoost) iptal veya gecikme modelini eğitir"""
+    parser = argparse.ArgumentParser(description="Bellekten büyük veri setleri için akışlı model eğitimi")
+    parser.add_argument('data', help="Eğitim CSV'si veya flight_ingest ile oluşturulmuş Parquet dosyası")
+    parser.add_argument('--kind', choices=sorted(SCHEMAS), required=True)
+    parser.add_argument('--output', default='models_streaming', help="Artefaktların yazılacağı klasör")
+    parser.add_argument('--batch-rows', type=int, default=CHUNK_ROWS, help="XGBoost'a verilen parça boyutu")
+    parser.add_argument('--cache-dir', help="XGBoost dış bellek önbelleği klasörü (varsayılan: geçici klasör)")
+    parser.add_argument('--test-size', type=float, default=None,
+                        help="Test oranı (varsayılan: iptal 0.3, gecikme 0.2; eğitim betikleriyle aynı)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    path = args.data
+    if not path.endswith('.parquet'):
+        path = ensure_parquet(path, SCHEMAS[args.kind])
+
+    cache_dir = args.cache_dir or tempfile.mkdtemp(prefix='xgb-extmem-')
+    os.makedirs(cache_dir, exist_ok=True)
+    try:
+        if args.kind == 'cancel':
+            train_cancel(path, args.output, cache_dir, args.batch_rows,
+                         0.3 if args.test_size is None else args.test_size, args.seed)
+        else:
+            train_delay(path, args.output, cache_dir, args.batch_rows,
+                        0.2 if args.test_size is None else args.test_size, args.seed)
+    finally:
+        if not args.cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
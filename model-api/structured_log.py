@@ -0,0 +1,114 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from metrics import counter
+
+# Günlük seviyesi, istek yolu tanılama kayıtlarının örnekleme oranı ve kuyruk kapasitesi
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+
+# Kuyruk dolu olduğu için atılan kayıtlar
+DROPPED_LOGS = counter('log_records_dropped_total', 'Günlük kuyruğu dolu olduğu için atılan kayıt sayısı')
+
+
+class JsonFormatter(logging.Formatter):
+    """Kaydı, `fields` ile verilen alanlarla birlikte tek satır JSON olarak biçimlendirir"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'pid': record.process
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Kuyruk doluysa beklemek yerine kaydı atan QueueHandler
+
+    Biçimlendirme ve yazma dinleyici iş parçacığında yapılır; istek iş
+    parçacığı yalnızca kaydı kuyruğa koyar.
+    """
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DROPPED_LOGS.inc()
+
+    def prepare(self, record):
+        # Biçimlendirme dinleyicide yapılacağı için kaydı olduğu gibi aktar
+        return record
+
+
+_listener = None
+_listener_pid = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging(name='flight_api', level=LOG_LEVEL, queue_size=LOG_QUEUE_SIZE):
+    """Kuyruk tabanlı JSON günlüğünü kurar; fork sonrası çağrılırsa dinleyiciyi yeniden başlatır"""
+    global _listener, _listener_pid
+
+    logger = logging.getLogger(name)
+    with _setup_lock:
+        if _listener_pid == os.getpid():
+            return logger
+
+        records = queue.Queue(maxsize=queue_size)
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(JsonFormatter())
+
+        for handler in list(logger.handlers):
+            if isinstance(handler, DroppingQueueHandler):
+                logger.removeHandler(handler)
+        logger.addHandler(DroppingQueueHandler(records))
+        logger.setLevel(level)
+        logger.propagate = False
+
+        _listener = QueueListener(records, stream, respect_handler_level=False)
+        _listener.start()
+        _listener_pid = os.getpid()
+    return logger
+
+
+def stop_logging():
+    """Kuyruktaki kayıtları yazıp dinleyiciyi durdurur"""
+    global _listener_pid
+    with _setup_lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            _listener.stop()
+            _listener_pid = None
+
+
+atexit.register(stop_logging)
+
+
+def sampled(rate=LOG_SAMPLE_RATE):
+    """Bu mesajın örneklemeye girip girmediğine karar verir (kayıt oluşturmadan önce)"""
+    return rate >= 1.0 or random.random() < rate
+
+
+def log_event(logger, level, message, sample_rate=None, exc_info=None, **fields):
+    """Yapılandırılmış alanlarla kayıt yazar; `sample_rate` verilirse o oranda örnekler
+
+    Seviye kapalıysa veya örneklemeye girmezse kayıt nesnesi hiç oluşturulmaz.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if sample_rate is not None and not sampled(sample_rate):
+        return
+    logger.log(level, message, exc_info=exc_info, extra={'fields': fields})
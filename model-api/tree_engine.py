@@ -0,0 +1,275 @@
+import json
+import logging
+import time
+import numpy as np
+from metrics import stage_timer
+
+logger = logging.getLogger('flight_api.tree_engine')
+
+# Derlenebilen XGBoost hedef fonksiyonları
+BINARY_OBJECTIVES = ('binary:logistic', 'reg:logistic')
+MULTICLASS_OBJECTIVES = ('multi:softprob', 'multi:softmax')
+
+# Derlenmiş motor ile sklearn yolu arasında izin verilen olasılık farkı
+VERIFY_TOLERANCE = 1e-4
+
+
+def unwrap_classifier(model):
+    """Pipeline içindeki son adımı (sınıflandırıcıyı) döndürür"""
+    if hasattr(model, 'steps'):
+        return model.steps[-1][1]
+    return model
+
+
+class CompiledEnsemble:
+    """XGBoost ağaç topluluğunun düz NumPy düğüm dizilerine derlenmiş hali
+
+    Girdi olarak imputer/scaler uygulanmamış ham özellikleri alır; ölçekleme
+    eşik değerlerine, imputer istatistikleri ise eksik değer yönlerine
+    gömülüdür.
+    """
+
+    def __init__(self, feature, threshold, left, right, default_left, value,
+                 roots, tree_group, n_groups, base_margin, objective, max_depth,
+                 n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.n_groups = n_groups
+        self.base_margin = base_margin
+        self.objective = objective
+        self.max_depth = max_depth
+        self.n_features = n_features
+        # Ağaç -> sınıf grubu toplama matrisi
+        self.group_matrix = np.zeros((len(roots), n_groups))
+        self.group_matrix[np.arange(len(roots)), tree_group] = 1.0
+
+    def predict_margin(self, X):
+        """Ham özelliklerden her sınıf grubu için margin değerini hesaplar"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.max_depth):
+            values = X[rows, self.feature[nodes]]
+            go_left = np.where(np.isnan(values), self.default_left[nodes],
+                               values < self.threshold[nodes])
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return self.value[nodes] @ self.group_matrix + self.base_margin
+
+    def predict_proba(self, X):
+        """Ham özelliklerden sınıf olasılıklarını hesaplar"""
+        margin = self.predict_margin(X)
+        if self.objective in BINARY_OBJECTIVES:
+            proba = 1.0 / (1.0 + np.exp(-margin[:, 0]))
+            return np.column_stack([1.0 - proba, proba])
+
+        exp = np.exp(margin - margin.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        """Ham özelliklerden sınıf etiketlerini hesaplar"""
+        return np.argmax(self.predict_proba(X), axis=1)
+
+
+class SklearnModelPath:
+    """imputer/scaler + sklearn modeli zincirini derlenmiş motorla aynı arayüzde sunar"""
+
+    def __init__(self, model, imputer, scaler):
+        self.model = model
+        self.imputer = imputer
+        self.scaler = scaler
+        self.n_features = unwrap_classifier(model).n_features_in_
+
+    def transform(self, X):
+        """Ham özellikleri modelin beklediği ölçeklenmiş forma getirir"""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        started = time.perf_counter()
+        imputed = self.imputer.transform(X)
+        started = stage_timer.lap('imputer_transform', started)
+        scaled = self.scaler.transform(imputed)
+        stage_timer.lap('scaler_transform', started)
+        return scaled[:, :self.n_features]
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(self.transform(X))
+
+    def predict(self, X):
+        return self.model.predict(self.transform(X))
+
+
+def compile_xgb_model(model, imputer=None, scaler=None):
+    """XGBoost modelini, imputer ve scaler'ı eşiklere gömerek düz dizilere derler"""
+    classifier = unwrap_classifier(model)
+    learner = json.loads(classifier.get_booster().save_raw('json'))['learner']
+    booster = learner['gradient_booster']
+    objective = learner['objective']['name']
+
+    if booster['name'] != 'gbtree':
+        raise ValueError(f"Desteklenmeyen booster: {booster['name']}")
+    if objective not in BINARY_OBJECTIVES + MULTICLASS_OBJECTIVES:
+        raise ValueError(f"Desteklenmeyen hedef fonksiyonu: {objective}")
+
+    n_model_features = int(learner['learner_model_param']['num_feature'])
+    mean = np.zeros(n_model_features)
+    scale = np.ones(n_model_features)
+    if scaler is not None and scaler.with_mean:
+        mean = np.asarray(scaler.mean_, dtype=np.float64)[:n_model_features]
+    if scaler is not None and scaler.with_std:
+        scale = np.asarray(scaler.scale_, dtype=np.float64)[:n_model_features]
+
+    statistics = None
+    if imputer is not None:
+        if not np.isnan(imputer.missing_values):
+            raise ValueError("Sadece NaN eksik değerli imputer derlenebilir")
+        statistics = np.asarray(imputer.statistics_, dtype=np.float64)[:n_model_features]
+
+    trees = booster['model']['trees']
+    tree_info = booster['model']['tree_info']
+
+    features, conditions, lefts, rights, defaults, leaves, roots = [], [], [], [], [], [], []
+    max_depth = 0
+    offset = 0
+    for tree in trees:
+        if any(tree['split_type']):
+            raise ValueError("Kategorik bölünmeler desteklenmiyor")
+
+        left = np.asarray(tree['left_children'], dtype=np.int64)
+        right = np.asarray(tree['right_children'], dtype=np.int64)
+        is_leaf = left == -1
+        node_ids = np.arange(len(left))
+
+        # Yapraklar kendine döner, böylece tüm ağaçlar sabit sayıda adımda ilerletilir
+        features.append(np.where(is_leaf, 0, tree['split_indices']))
+        conditions.append(np.asarray(tree['split_conditions'], dtype=np.float64))
+        lefts.append(np.where(is_leaf, node_ids, left) + offset)
+        rights.append(np.where(is_leaf, node_ids, right) + offset)
+        defaults.append(np.asarray(tree['default_left'], dtype=bool))
+        leaves.append(is_leaf)
+        roots.append(offset)
+        max_depth = max(max_depth, tree_depth(left, right))
+        offset += len(left)
+
+    feature = np.concatenate(features)
+    condition = np.concatenate(conditions)
+    is_leaf = np.concatenate(leaves)
+
+    # Ölçekli eşiği ham özellik uzayına taşı: float32((x - mean) / scale) < t  <=>  x < r
+    threshold = np.where(is_leaf, 0.0,
+                         raw_thresholds(condition, mean[feature], scale[feature]))
+    # Eksik değer imputer istatistiğiyle doldurulacağı için yönü derleme anında belirle
+    default_left = np.concatenate(defaults)
+    if statistics is not None:
+        default_left = np.where(is_leaf, default_left, statistics[feature] < threshold)
+
+    base_score = np.asarray(
+        json.loads(learner['learner_model_param']['base_score']), dtype=np.float64)
+    if objective in BINARY_OBJECTIVES:
+        n_groups = 1
+        base_margin = np.log(base_score / (1.0 - base_score))
+    else:
+        n_groups = int(learner['learner_model_param']['num_class'])
+        base_margin = np.broadcast_to(base_score, (n_groups,)).copy()
+
+    return CompiledEnsemble(
+        feature=feature,
+        threshold=threshold,
+        left=np.concatenate(lefts),
+        right=np.concatenate(rights),
+        default_left=default_left,
+        value=np.where(is_leaf, condition, 0.0),
+        roots=np.asarray(roots, dtype=np.int64),
+        tree_group=np.asarray(tree_info, dtype=np.int64),
+        n_groups=n_groups,
+        base_margin=base_margin,
+        objective=objective,
+        max_depth=max_depth,
+        n_features=n_model_features
+    )
+
+
+def float_keys(x):
+    """float64 değerleri sıralaması korunan int64 anahtarlara çevirir"""
+    bits = np.asarray(x, dtype=np.float64).view(np.int64)
+    return np.where(bits >= 0, bits, -(bits & 0x7FFFFFFFFFFFFFFF))
+
+
+def keys_to_floats(keys):
+    """float_keys dönüşümünün tersi"""
+    bits = np.where(keys >= 0, keys, (-keys) | np.int64(-0x8000000000000000))
+    return bits.view(np.float64)
+
+
+def raw_thresholds(condition, mean, scale):
+    """Ölçekli float32 eşikleri ham float64 uzayındaki tam sınır değerlerine çevirir
+
+    XGBoost girdiyi float32'ye çevirip `x < t` karşılaştırması yapar. Ham değer
+    x için float32((x - mean) / scale) monoton olduğundan, bu koşulu sağlayan
+    değerler x < r biçimindedir; r ikili arama ile bit düzeyinde bulunur.
+    """
+    target = condition.astype(np.float32)
+    lo = np.full(len(condition), float_keys(-np.finfo(np.float64).max))
+    hi = np.full(len(condition), float_keys(np.inf))
+
+    with np.errstate(over='ignore', invalid='ignore'):
+        while np.any(lo + 1 < hi):
+            # (lo + hi) // 2, int64 taşması olmadan
+            mid = (lo >> 1) + (hi >> 1) + (lo & hi & 1)
+            scaled = ((keys_to_floats(mid) - mean) / scale).astype(np.float32)
+            below = scaled < target
+            lo = np.where(below, mid, lo)
+            hi = np.where(below, hi, mid)
+
+    return keys_to_floats(hi)
+
+
+def tree_depth(left, right):
+    """Ağacın kökten en derin yaprağa kadar olan bölünme sayısını döndürür"""
+    depth = 0
+    level = [0]
+    while True:
+        level = [child for node in level if left[node] != -1
+                 for child in (left[node], right[node])]
+        if not level:
+            return depth
+        depth += 1
+
+
+def probe_matrix(imputer, scaler, n_rows=64, seed=0):
+    """Doğrulama için scaler dağılımından örneklenmiş, eksik değerli ham satırlar üretir"""
+    rng = np.random.default_rng(seed)
+    X = scaler.mean_ + rng.normal(size=(n_rows, len(scaler.mean_))) * scaler.scale_
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X
+
+
+def verify_compiled(compiled, reference, X, tolerance=VERIFY_TOLERANCE):
+    """Derlenmiş motorun sklearn yolu ile aynı olasılıkları ürettiğini doğrular"""
+    difference = np.abs(compiled.predict_proba(X) - reference.predict_proba(X)).max()
+    return difference <= tolerance, float(difference)
+
+
+def build_predictor(model, imputer, scaler, engine='compiled'):
+    """Tercih edilen motoru kurar; derleme ya da doğrulama başarısızsa sklearn yoluna döner"""
+    reference = SklearnModelPath(model, imputer, scaler)
+    if engine != 'compiled':
+        return reference
+
+    try:
+        compiled = compile_xgb_model(model, imputer, scaler)
+        matches, difference = verify_compiled(compiled, reference,
+                                              probe_matrix(imputer, scaler))
+        if not matches:
+            logger.warning(f"Derlenmiş model doğrulanamadı (fark={difference:.2e}), sklearn yolu kullanılıyor")
+            return reference
+        return compiled
+    except Exception as e:
+        logger.warning(f"Model derleme hatası: {str(e)}, sklearn yolu kullanılıyor")
+        return reference
@@ -0,0 +1,158 @@
+import argparse
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime, date, timedelta
+
+# Modellerin kullandığı günlük hava durumu alanları
+WEATHER_FIELDS = ['tmin', 'tmax', 'prcp', 'snow', 'wdir', 'wspd', 'wpgt', 'pres', 'tsun']
+
+DEFAULT_STORE_PATH = os.path.join('models', 'weather.sqlite')
+
+# Bellekteki LRU önbelleğinde, kayıt bulunamadığını belirten işaret
+_MISSING = object()
+
+
+def date_key(value):
+    """date/datetime/str değerini 'YYYY-MM-DD' anahtarına çevirir"""
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    return str(value)[:10]
+
+
+class MeteostatFetcher:
+    """Meteostat'tan bir şehir için tarih aralığını tek çağrıda çeker"""
+
+    def __init__(self, geocode):
+        # geocode(city_name) -> {'lat': ..., 'lon': ...}
+        self.geocode = geocode
+
+    def fetch(self, city_name, start, end):
+        from meteostat import Point, Daily
+
+        coords = self.geocode(city_name)
+        if coords is None:
+            return {}
+
+        data = Daily(Point(coords['lat'], coords['lon']), start, end).fetch()
+        rows = {}
+        for day, values in data.fillna(0).iterrows():
+            rows[date_key(day)] = {field: float(values.get(field, 0)) for field in WEATHER_FIELDS}
+        return rows
+
+
+class StaticFetcher:
+    """Ağ erişimi olmadan sabit profil döndüren yerel fetcher (testler ve yerel çalışma için)"""
+
+    def __init__(self, profile_for_date):
+        # profile_for_date(date) -> hava durumu sözlüğü
+        self.profile_for_date = profile_for_date
+
+    def fetch(self, city_name, start, end):
+        rows = {}
+        day = start
+        while day <= end:
+            rows[date_key(day)] = dict(self.profile_for_date(day))
+            day += timedelta(days=1)
+        return rows
+
+
+class WeatherStore:
+    """(şehir, tarih) anahtarlı SQLite hava durumu deposu, önünde bellek içi LRU ile
+
+    İstek anında sadece yerel okuma yapılır; ağ erişimi yalnızca `fill` ile
+    toplu doldurma sırasında, takılabilir fetcher üzerinden gerçekleşir.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, fetcher=None, cache_size=4096):
+        self.path = path
+        self.fetcher = fetcher
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        columns = ', '.join(f'{field} REAL' for field in WEATHER_FIELDS)
+        self.connection.execute(
+            f'CREATE TABLE IF NOT EXISTS weather (city TEXT, day TEXT, {columns}, '
+            'PRIMARY KEY (city, day))')
+        self.connection.commit()
+
+    def get(self, city_name, day):
+        """Kayıtlı hava durumunu döndürür, kayıt yoksa None döndürür"""
+        key = (str(city_name), date_key(day))
+        with self.lock:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache.move_to_end(key)
+                return None if cached is _MISSING else cached
+
+            row = self.connection.execute(
+                f"SELECT {', '.join(WEATHER_FIELDS)} FROM weather WHERE city = ? AND day = ?",
+                key).fetchone()
+            weather = dict(zip(WEATHER_FIELDS, row)) if row is not None else None
+
+            self.cache[key] = _MISSING if weather is None else weather
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            return weather
+
+    def put_many(self, city_name, rows):
+        """{tarih: hava durumu} kayıtlarını depoya yazar"""
+        placeholders = ', '.join('?' for _ in range(len(WEATHER_FIELDS) + 2))
+        values = [(str(city_name), date_key(day), *[weather.get(field, 0) for field in WEATHER_FIELDS])
+                  for day, weather in rows.items()]
+        with self.lock:
+            self.connection.executemany(
+                f'INSERT OR REPLACE INTO weather VALUES ({placeholders})', values)
+            self.connection.commit()
+            # Yeni kayıtlar önceki (eksik) önbellek girdilerini geçersiz kılar
+            self.cache.clear()
+        return len(values)
+
+    def fill(self, city_names, start, end):
+        """Her şehir için tarih aralığını tek fetcher çağrısıyla çekip depoya yazar"""
+        if self.fetcher is None:
+            raise ValueError("Toplu doldurma için fetcher gerekli")
+
+        written = {}
+        for city_name in city_names:
+            try:
+                written[city_name] = self.put_many(city_name, self.fetcher.fetch(city_name, start, end))
+            except Exception as e:
+                print(f"Hava durumu doldurma hatası ({city_name}): {str(e)}")
+                written[city_name] = 0
+        return written
+
+    def close(self):
+        self.connection.close()
+
+
+def main():
+    """Şehir listesi için hava durumu deposunu toplu doldurur"""
+    parser = argparse.ArgumentParser(description="Hava durumu deposunu toplu doldurur")
+    parser.add_argument('--start', required=True, help="Başlangıç tarihi (YYYY-MM-DD)")
+    parser.add_argument('--end', required=True, help="Bitiş tarihi (YYYY-MM-DD)")
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH)
+    parser.add_argument('--cities', nargs='*',
+                        help="Şehir listesi (varsayılan: label_enc_origin sınıfları)")
+    args = parser.parse_args()
+
+    from geocoding import GeocodingService
+
+    cities = args.cities
+    if not cities:
+        import joblib
+        cities = list(joblib.load(os.path.join('models', 'label_enc_origin.joblib')).classes_)
+
+    geocoder = GeocodingService(allow_network=True)
+    store = WeatherStore(args.store, fetcher=MeteostatFetcher(geocoder.get_coordinates))
+    written = store.fill(cities,
+                         datetime.strptime(args.start, '%Y-%m-%d'),
+                         datetime.strptime(args.end, '%Y-%m-%d'))
+    print(f"{sum(written.values())} kayıt yazıldı ({len(cities)} şehir)")
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+import gc
+import logging
+import sys
+import cancel_delay_api
+from cancel_delay_api import app
+
+# Pre-fork sunucu giriş noktası: gunicorn -c gunicorn.conf.py wsgi:app
+# Modeller master süreçte bir kez yüklenir, worker'lar fork ile copy-on-write paylaşır.
+
+def preload_models():
+    """Modelleri master süreçte yükler ve kalıcı nesneleri GC takibinden çıkarır
+
+    Dondurulmuş nesnelerin GC başlıklarına fork sonrası yazılmadığı için
+    model sayfaları worker'lara kopyalanmadan paylaşılır.
+    """
+    # Önceki paketin dondurulmuş nesneleri yeniden toplanabilsin
+    gc.unfreeze()
+    loaded = cancel_delay_api.load_models(reload=cancel_delay_api.model_bundle is not None)
+    gc.collect()
+    gc.freeze()
+    return loaded
+
+if not preload_models():
+    logging.getLogger('flight_api').critical("Modeller yüklenemedi! Uygulama kapatılıyor...")
+    sys.exit(1)